@@ -0,0 +1,149 @@
+import math
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict
+from metrics import LatencyWindow, Counters
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't get an LLM slot, with a suggested retry delay"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Bounded concurrency gate with a short wait queue
+
+    At most ``max_concurrent`` callers hold a slot at a time. Up to
+    ``max_queue`` more wait for at most ``queue_timeout`` seconds; anyone
+    beyond that, or whose wait times out, is rejected with
+    ``AdmissionRejected`` instead of piling more load onto the backend.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._wait_times = LatencyWindow()
+        self._hold_times = LatencyWindow()
+        self._counters = Counters()
+
+    @contextmanager
+    def admit(self):
+        """Hold a slot for the duration of the block"""
+        started = time.monotonic()
+
+        with self._condition:
+            if self._in_flight >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    self._counters.increment('rejected_queue_full')
+                    raise AdmissionRejected('LLM queue is full', self._retry_after())
+
+                self._waiting += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._in_flight < self.max_concurrent,
+                        timeout=self.queue_timeout
+                    )
+                finally:
+                    self._waiting -= 1
+
+                if not admitted:
+                    self._counters.increment('rejected_timeout')
+                    raise AdmissionRejected('Timed out waiting for an LLM slot', self._retry_after())
+
+            self._in_flight += 1
+            self._counters.increment('admitted')
+
+        admitted_at = time.monotonic()
+        self._wait_times.observe(admitted_at - started)
+        try:
+            yield
+        finally:
+            self._hold_times.observe(time.monotonic() - admitted_at)
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def stats(self) -> Dict:
+        """Queue depth, counters and wait/hold times for monitoring"""
+        with self._condition:
+            in_flight, waiting = self._in_flight, self._waiting
+        stats = {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'in_flight': in_flight,
+            'queue_depth': waiting,
+            'wait_time': self._wait_times.summary(),
+            'hold_time': self._hold_times.summary()
+        }
+        stats.update(self._counters.snapshot())
+        return stats
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a slot frees up, from recent hold times"""
+        backlog = (self._waiting + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(self._hold_times.mean() * backlog))
+
+
+class AsyncAdmissionGate(AdmissionGate):
+    """AdmissionGate for asyncio code, where waiting requests hold no thread
+
+    Same limits, counters and stats as ``AdmissionGate``; must only be used
+    from one event loop.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        super().__init__(max_concurrent, max_queue, queue_timeout)
+        # Created on first use so it binds to the running loop
+        self._async_condition = None
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the ``async with`` block"""
+        if self._async_condition is None:
+            self._async_condition = asyncio.Condition()
+        condition = self._async_condition
+        started = time.monotonic()
+
+        async with condition:
+            if self._in_flight >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    self._counters.increment('rejected_queue_full')
+                    raise AdmissionRejected('LLM queue is full', self._retry_after())
+
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self._in_flight < self.max_concurrent),
+                        timeout=self.queue_timeout
+                    )
+                    admitted = True
+                except asyncio.TimeoutError:
+                    admitted = False
+                finally:
+                    self._waiting -= 1
+
+                if not admitted:
+                    self._counters.increment('rejected_timeout')
+                    raise AdmissionRejected('Timed out waiting for an LLM slot', self._retry_after())
+
+            self._in_flight += 1
+            self._counters.increment('admitted')
+
+        admitted_at = time.monotonic()
+        self._wait_times.observe(admitted_at - started)
+        try:
+            yield
+        finally:
+            self._hold_times.observe(time.monotonic() - admitted_at)
+            async with condition:
+                self._in_flight -= 1
+                condition.notify()
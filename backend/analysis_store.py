@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Dict, Optional
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recent_analyses (
+    id TEXT PRIMARY KEY,
+    entry TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recent_analyses_by_use ON recent_analyses(used_at DESC);
+"""
+
+
+class AnalysisStore:
+    """Store of recent analyses, used to re-score edited resumes
+
+    Entries expire after ``Config.ANALYSIS_STORE_TTL`` seconds and the least
+    recently used entries are evicted once ``Config.ANALYSIS_STORE_SIZE`` is
+    reached, so an analysis id only lives for the length of an editing session.
+
+    Entries are kept in a SQLite file (``Config.ANALYSIS_STORE_PATH``, by
+    default the job store's), so an id returned by one worker process, or
+    shared with a coalesced request, can be re-scored by any other. Each
+    thread uses its own connection.
+    """
+
+    def __init__(self, max_size: int = None, ttl: int = None, path: str = None):
+        self.max_size = max_size or Config.ANALYSIS_STORE_SIZE
+        self.ttl = ttl or Config.ANALYSIS_STORE_TTL
+        self.path = path or Config.ANALYSIS_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Drop the parent's connections, SQLite connections can't cross a fork"""
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=Config.JOB_STORE_BUSY_TIMEOUT)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def save(self, entry: Dict) -> str:
+        """Store an analysis and return its id"""
+        analysis_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO recent_analyses (id, entry, saved_at, used_at) VALUES (?, ?, ?, ?)',
+                (analysis_id, json.dumps(entry), now, now)
+            )
+            self._evict(db, now)
+        return analysis_id
+
+    def get(self, analysis_id: str) -> Optional[Dict]:
+        """Get a stored analysis, or None if it is unknown or expired"""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                'SELECT entry, saved_at FROM recent_analyses WHERE id = ?', (analysis_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            entry, saved_at = row
+            if now - saved_at > self.ttl:
+                db.execute('DELETE FROM recent_analyses WHERE id = ?', (analysis_id,))
+                return None
+
+            db.execute('UPDATE recent_analyses SET used_at = ? WHERE id = ?', (now, analysis_id))
+        return json.loads(entry)
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        """Drop expired and least recently used entries"""
+        db.execute('DELETE FROM recent_analyses WHERE saved_at < ?', (now - self.ttl,))
+        db.execute(
+            'DELETE FROM recent_analyses WHERE id IN '
+            '(SELECT id FROM recent_analyses ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_size,)
+        )
@@ -1,13 +1,31 @@
-from flask import Flask, request, jsonify
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+import io
 import os
+import json
+import threading
+import uuid
+from contextlib import nullcontext
 from config import Config
 from resume_parser import ResumeParser
 from keyword_extractor import KeywordExtractor
 from ats_scorer import ATSScorer
 from suggestions_generator import SuggestionsGenerator
 from llm_suggestion_generator import LLMSuggestionGenerator
+from analysis_store import AnalysisStore
+from admission import AdmissionGate, AdmissionRejected
+from single_flight import SingleFlight, request_key
+from resume_archive import ArchiveLimitError, open_archive, iter_resumes
+from feature_store import load_shared
+from job_store import FILE_FIELDS, JobStore, parse_timestamp
+from pipeline import Pipeline
+from cancellation import Cancelled, CancellationToken, check, wsgi_disconnect_probe
+import cancellation
+import process_stats
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}})
@@ -16,15 +34,34 @@ app.config.from_object(Config)
 # Initialize components
 resume_parser = ResumeParser()
 keyword_extractor = KeywordExtractor()
-ats_scorer = ATSScorer()
+ats_scorer = ATSScorer(keyword_extractor.skill_index)
 suggestions_generator = SuggestionsGenerator()
 llm_generator = LLMSuggestionGenerator()
+analysis_store = AnalysisStore()
+job_store = JobStore()
+single_flight = SingleFlight()
+llm_gate = AdmissionGate(Config.LLM_MAX_CONCURRENCY, Config.LLM_MAX_QUEUE, Config.LLM_QUEUE_TIMEOUT)
+
+# Warm-up state reported by /api/ready
+warmup_state = {
+    'status': 'pending',
+    'import_seconds': round(time.perf_counter() - _import_started, 3),
+    'warmup_seconds': None,
+    'cold_start_seconds': None,
+    'error': None
+}
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+@app.after_request
+def count_request(response):
+    """Count requests served by this process for /api/metrics"""
+    process_stats.record_request()
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -33,6 +70,31 @@ def health_check():
         'message': 'ATS Resume Checker API is running'
     }), 200
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint, reports warm-up state"""
+    ready = warmup_state['status'] == 'ready'
+    return jsonify({
+        'ready': ready,
+        'warmup': warmup_state,
+        'ollama_available': llm_generator.ollama_available,
+        'ollama_probe_finished': llm_generator.probe_finished.is_set()
+    }), 200 if ready else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Runtime metrics for monitoring"""
+    return jsonify({
+        'process': process_stats.process_info(),
+        'llm': llm_generator.status(),
+        'llm_admission': llm_gate.stats(),
+        'single_flight': single_flight.stats(),
+        'pipeline': analysis_pipeline.stats(),
+        'cancellations': cancellation.stats(),
+        'job_store': job_store.stats(),
+        'keyword_matching': keyword_extractor.skill_index.stats()
+    }), 200
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_resume():
     """Main analysis endpoint"""
@@ -53,88 +115,361 @@ def analyze_resume():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file format. Only PDF and DOCX allowed'}), 400
         
-        # Save file
+        try:
+            keyword_mode = keyword_extractor.resolve_mode(request.form.get('keyword_mode'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        debug = debug_requested(request.form.get('debug'))
+        file_data = file.read()
         filename = secure_filename(file.filename)
-        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        token = request_token()
+        
+        def analyze():
+            filepath = save_upload(filename, file_data)
+            try:
+                # Parsed while the job keywords are extracted
+                return analyze_file(filepath, job_description, keyword_mode=keyword_mode, debug=debug,
+                                    cancel_token=token)
+                
+            finally:
+                # Clean up uploaded file
+                if os.path.exists(filepath):
+                    os.remove(filepath)
         
+        # Identical concurrent requests (double clicks, retries) share one run
+        key = request_key('analyze', file_data, os.path.splitext(filename)[1], job_description, keyword_mode, debug)
         try:
-            # Parse resume
-            resume_data = resume_parser.parse_resume(filepath)
-            
-            # Extract keywords from job description
-            job_keywords = keyword_extractor.extract_keywords(job_description)
-            
-            # Find missing keywords
-            missing_keywords = keyword_extractor.find_missing_keywords(
-                resume_data['raw_text'], 
-                job_keywords
-            )
-            
-            # Calculate ATS score
-            score_data = ats_scorer.calculate_score(
-                resume_data, 
-                job_description, 
-                job_keywords
-            )
+            response, _ = single_flight.do(key, analyze)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Cancelled as e:
+            return cancelled_response(e)
+        
+        return jsonify(response), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analyze/<analysis_id>/rescore', methods=['POST'])
+def rescore_resume(analysis_id):
+    """Re-score an edited resume against the job of a previous analysis"""
+    try:
+        previous = analysis_store.get(analysis_id)
+        if previous is None:
+            return jsonify({'error': 'Analysis not found or expired'}), 404
+        
+        if 'resume' not in request.files:
+            return jsonify({'error': 'No resume file provided'}), 400
+        
+        file = request.files['resume']
+        
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file format. Only PDF and DOCX allowed'}), 400
+        
+        # Save file under a unique name, rescores of the same filename may run at once
+        filepath = save_upload(secure_filename(file.filename), file.read())
+        
+        try:
+            try:
+                response = analyze_file(filepath, previous['job_description'], previous,
+                                        debug=debug_requested(request.form.get('debug')),
+                                        cancel_token=request_token())
+            except AdmissionRejected as e:
+                return busy_response(e)
+            except Cancelled as e:
+                return cancelled_response(e)
+            response['previous_analysis_id'] = analysis_id
             
-            # Generate suggestions
-            suggestions = suggestions_generator.generate_suggestions(
-                missing_keywords,
-                score_data,
-                resume_data['sections']
-            )
+            return jsonify(response), 200
             
-            # Calculate keyword density
-            keyword_density = keyword_extractor.calculate_keyword_density(
-                resume_data['raw_text'],
-                job_keywords['all_keywords']
-            )
+        finally:
+            # Clean up uploaded file
+            if os.path.exists(filepath):
+                os.remove(filepath)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analyze/multi', methods=['POST'])
+def analyze_resume_multi():
+    """Score one resume against many job descriptions"""
+    try:
+        if 'resume' not in request.files:
+            return jsonify({'error': 'No resume file provided'}), 400
+        
+        file = request.files['resume']
+        
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file format. Only PDF and DOCX allowed'}), 400
+        
+        try:
+            jobs = parse_jobs(request.form.get('jobs', ''))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        top_n = request.form.get('top_n', Config.MULTI_JD_SUGGESTIONS_TOP_N, type=int)
+        
+        try:
+            keyword_mode = keyword_extractor.resolve_mode(request.form.get('keyword_mode'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        file_data = file.read()
+        filename = secure_filename(file.filename)
+        token = request_token()
+        
+        def analyze_multi():
+            filepath = save_upload(filename, file_data)
+            try:
+                # Parse resume once for all jobs
+                resume_data = resume_parser.parse_resume(filepath, token)
+                
+                return run_multi_analysis(resume_data, jobs, top_n, keyword_mode, token)
+                
+            finally:
+                # Clean up uploaded file
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+        
+        # Identical concurrent requests (double clicks, retries) share one run
+        key = request_key('analyze_multi', file_data, os.path.splitext(filename)[1], jobs, top_n, keyword_mode)
+        try:
+            response, _ = single_flight.do(key, analyze_multi)
+        except Cancelled as e:
+            return cancelled_response(e)
+        
+        return jsonify(response), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analyze/archive', methods=['POST'])
+def analyze_archive():
+    """Score every resume in a ZIP archive against one job, streaming NDJSON results"""
+    if 'archive' not in request.files:
+        return jsonify({'error': 'No archive file provided'}), 400
+    
+    file = request.files['archive']
+    job_description = request.form.get('job_description', '')
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not job_description:
+        return jsonify({'error': 'No job description provided'}), 400
+    
+    try:
+        keyword_mode = keyword_extractor.resolve_mode(request.form.get('keyword_mode'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The upload is spooled to a temporary file by werkzeug; entries are
+    # decompressed one at a time from there, never extracted to uploads/
+    try:
+        archive = open_archive(file.stream)
+    except ArchiveLimitError as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    events = analyze_archive_entries(archive, job_description, keyword_mode)
+    return Response(stream_with_context(ndjson_lines(events)), mimetype='application/x-ndjson')
+
+def analyze_archive_entries(archive, job_description: str, keyword_mode: str):
+    """Parse and score the resumes of an open archive as they are read
+    
+    Yields one event per line of the archive response: a ``start`` event
+    with the job keywords, a ``result``, ``skipped`` or ``error`` event per
+    archive entry, and a closing ``summary``. Only rule-based suggestions
+    are generated; the LLM would take minutes per resume at archive scale.
+    The archive is closed when the generator finishes or is abandoned.
+    """
+    counts = {'analyzed': 0, 'skipped': 0, 'failed': 0}
+    summary = {'type': 'summary', 'success': True}
+    try:
+        job_keywords = keyword_extractor.extract_keywords(job_description, keyword_mode)
+        yield {'type': 'start', 'keyword_mode': keyword_mode, 'job_keywords': job_keywords}
+        
+        for entry in iter_resumes(archive):
+            if 'skipped' in entry:
+                counts['skipped'] += 1
+                yield {'type': 'skipped', 'entry': entry['name'], 'reason': entry['skipped']}
+                continue
             
-            # Generate LLM-powered suggestions
-            llm_suggestions = {}
             try:
-                if Config.OLLAMA_ENABLED:
-                    llm_suggestions = llm_generator.generate_suggestions(
-                        job_description,
-                        missing_keywords,
-                        resume_data['sections'],
-                        score_data['overall_score']
-                    )
+                resume_data = resume_parser.parse_resume_bytes(entry['data'], entry['type'])
+                analysis = score_analysis(resume_data, job_description, keyword_mode=keyword_mode)
             except Exception as e:
-                print(f"LLM generation error: {e}")
-                llm_suggestions = {
-                    'llm_unavailable': True,
-                    'message': 'AI suggestions temporarily unavailable'
-                }
+                counts['failed'] += 1
+                yield {'type': 'error', 'entry': entry['name'], 'error': str(e)}
+                continue
             
-            # Prepare response
-            response = {
-                'success': True,
-                'score': score_data,
+            counts['analyzed'] += 1
+            yield {
+                'type': 'result',
+                'entry': entry['name'],
+                'file_type': entry['type'],
+                'score': analysis['score_data'],
                 'keywords': {
-                    'found': job_keywords,
-                    'missing': missing_keywords,
-                    'density': round(keyword_density, 2)
-                },
-                'suggestions': suggestions,
-                'llm_suggestions': llm_suggestions,
-                'resume_sections': {
-                    'has_summary': bool(resume_data['sections'].get('summary')),
-                    'has_experience': bool(resume_data['sections'].get('experience')),
-                    'has_education': bool(resume_data['sections'].get('education')),
-                    'has_skills': bool(resume_data['sections'].get('skills')),
-                    'word_count': resume_data['total_words']
+                    'missing': analysis['missing_keywords'],
+                    'density': round(analysis['keyword_density'], 2)
                 },
+                'suggestions': analysis['suggestions'],
+                'resume_sections': resume_sections(resume_data),
                 'contact_info': resume_data['contact_info']
             }
-            
-            return jsonify(response), 200
-            
-        finally:
-            # Clean up uploaded file
-            if os.path.exists(filepath):
-                os.remove(filepath)
+    except Exception as e:
+        # Headers are already sent, so failures end the stream in the summary
+        summary['success'] = False
+        summary['error'] = str(e)
+    finally:
+        archive.close()
+    
+    summary.update(counts)
+    yield summary
+
+def ndjson_lines(events):
+    """Serialize events as newline-delimited JSON"""
+    for event in events:
+        yield json.dumps(event) + '\n'
+
+@app.route('/api/features/rerank', methods=['POST'])
+def rerank_features():
+    """Re-rank stored analyses under a new weight profile without re-parsing"""
+    try:
+        return jsonify(rerank_stored_features(request.get_json(silent=True) or {})), 200
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def rerank_stored_features(body: dict) -> dict:
+    """Rank the feature store at ``Config.FEATURE_STORE_PATH`` under the profile in a request body
+    
+    The body may hold ``weights`` (overriding ``Config.WEIGHTS``),
+    ``semantic_blend``, ``job_id`` and ``top`` (best resumes per job,
+    default ``FEATURE_RERANK_TOP_N``). Raises ``ValueError`` for a bad
+    profile and ``FileNotFoundError`` when no store is configured.
+    """
+    if not isinstance(body, dict):
+        raise ValueError('Body must be a JSON object')
+    path = Config.FEATURE_STORE_PATH
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError('No feature store configured, set FEATURE_STORE_PATH')
+    
+    weights = body.get('weights')
+    if weights is not None and not isinstance(weights, dict):
+        raise ValueError('weights must be a JSON object')
+    try:
+        top = int(body.get('top') or Config.FEATURE_RERANK_TOP_N)
+    except (TypeError, ValueError):
+        raise ValueError('top must be an integer')
+    weights, semantic_blend = ats_scorer.resolve_profile(weights, body.get('semantic_blend'))
+    job_id = body.get('job_id')
+    
+    started = time.perf_counter()
+    store = load_shared(path)
+    ranked = store.rank(weights, semantic_blend, None if job_id is None else str(job_id), top)
+    return {
+        'success': True,
+        'weights': weights,
+        'semantic_blend': semantic_blend,
+        'stored_pairs': len(store),
+        'rank_ms': round((time.perf_counter() - started) * 1000, 1),
+        'results': ranked
+    }
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """One page of tracked jobs, filtered by status, country and application date"""
+    try:
+        return jsonify(list_stored_jobs(request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/jobs', methods=['POST'])
+@app.route('/api/jobs/<job_id>', methods=['PUT'])
+def save_job(job_id=None):
+    """Create or replace a tracked job, as JSON or as multipart with a ``job`` field and files"""
+    try:
+        if request.mimetype == 'multipart/form-data':
+            job = json.loads(request.form.get('job') or '{}')
+            files = {field: (file.filename, file.read()) for field, file in request.files.items() if file.filename}
+        else:
+            job, files = request.get_json(silent=True), {}
+        return jsonify(store_job(job, files, job_id)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """A tracked job with its description and file metadata"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Delete a tracked job with its analyses and unshared files"""
+    if not job_store.delete_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True}), 200
+
+@app.route('/api/jobs/<job_id>/files/<field>', methods=['GET'])
+def download_job_file(job_id, field):
+    """Download a job's ``cvFile`` or ``coverLetterFile``"""
+    if field not in FILE_FIELDS:
+        return jsonify({'error': f"Unknown file '{field}'"}), 404
+    stored = job_store.get_file(job_id, field)
+    if stored is None:
+        return jsonify({'error': 'File not found'}), 404
+    name, data = stored
+    return send_file(io.BytesIO(data), download_name=name, as_attachment=True)
+
+@app.route('/api/jobs/<job_id>/analyze', methods=['POST'])
+def analyze_job(job_id):
+    """Analyze a tracked job's resume against its description and save the result with the job"""
+    try:
+        job = job_store.get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        try:
+            keyword_mode = keyword_extractor.resolve_mode(request.form.get('keyword_mode'))
+            response = analyze_stored_job(
+                job, request.form.get('job_description'), keyword_mode,
+                debug_requested(request.form.get('debug')), request_token()
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Cancelled as e:
+            return cancelled_response(e)
+        
+        return jsonify(response), 200
     
     except Exception as e:
         return jsonify({
@@ -142,6 +477,591 @@ def analyze_resume():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>/analyses', methods=['GET'])
+def list_job_analyses(job_id):
+    """Saved analyses of a tracked job, newest first"""
+    if job_store.get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'analyses': job_store.list_analyses(job_id)}), 200
+
+@app.route('/api/jobs/<job_id>/analyses/<analysis_id>', methods=['GET'])
+def get_job_analysis(job_id, analysis_id):
+    """Full response of a saved analysis"""
+    analysis = job_store.get_analysis(job_id, analysis_id)
+    if analysis is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(analysis), 200
+
+def list_stored_jobs(args) -> dict:
+    """One page of ``JobStore.list_jobs`` for request query parameters
+    
+    Takes ``status``, ``country``, ``since`` and ``until`` (epoch
+    milliseconds or YYYY-MM-DD), ``limit`` and ``cursor``. Raises
+    ``ValueError`` for bad values.
+    """
+    try:
+        limit = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be positive')
+    return job_store.list_jobs(
+        status=args.get('status') or None,
+        country=args.get('country') or None,
+        since=parse_timestamp(args.get('since')),
+        until=parse_timestamp(args.get('until')),
+        limit=limit,
+        cursor=args.get('cursor') or None
+    )
+
+def store_job(job: dict, files: dict, job_id: str = None) -> dict:
+    """Validate a job and its uploaded ``(filename, data)`` files and save them
+    
+    Files go under 'cvFile' and 'coverLetterFile', the names the job tracker
+    uses. Raises ``ValueError`` for anything the store shouldn't take.
+    """
+    if not isinstance(job, dict):
+        raise ValueError('Job must be a JSON object')
+    if job_id is not None:
+        job = dict(job, id=job_id)
+    if job.get('description') is not None and not isinstance(job['description'], str):
+        raise ValueError('description must be a string')
+    
+    stored_files = {}
+    for field, (filename, data) in files.items():
+        if field not in FILE_FIELDS:
+            raise ValueError(f"Unknown file field '{field}', expected {', '.join(FILE_FIELDS)}")
+        if not allowed_file(filename):
+            raise ValueError('Invalid file format. Only PDF and DOCX allowed')
+        if len(data) > Config.MAX_FILE_SIZE:
+            raise ValueError('File too large. Maximum size is 5MB')
+        stored_files[field] = (secure_filename(filename), data)
+    return job_store.save_job(job, stored_files)
+
+def analyze_stored_job(job: dict, job_description: str = None, keyword_mode: str = None,
+                       debug: bool = False, cancel_token: CancellationToken = None) -> dict:
+    """Analyze a stored job's resume and save the response with the job
+    
+    ``job_description`` defaults to the job's own. The parsed resume and
+    the job keywords come from the store's caches when this resume and
+    description were analyzed before, so only scoring and suggestions run;
+    otherwise they are computed by the pipeline and cached. ``keyword_mode``
+    must be resolved already, as it is part of the keyword cache key.
+    Raises ``ValueError`` when the job has no resume or description.
+    """
+    values, job_description = stored_job_inputs(job, job_description, keyword_mode)
+    debug_info = {} if debug else None
+    try:
+        run = run_analysis_pipeline(values, job_description, None, keyword_mode, debug_info, cancel_token)
+    finally:
+        remove_stored_job_upload(values)
+    
+    cache_stored_job_results(job, values, run.results, job_description, keyword_mode)
+    response = finish_analysis(collect_analysis(run), run.results['resume'], job_description,
+                               run.results['llm_suggestions'], debug_info)
+    return save_stored_job_analysis(job, job_description, keyword_mode, response)
+
+def stored_job_inputs(job: dict, job_description: str, keyword_mode: str) -> tuple:
+    """Pipeline values for a stored job's resume, and the job description to use
+    
+    Cached parses and keywords are passed as values so their stages are
+    skipped; an unparsed resume is written to a temporary file for the
+    parse stage, removed with ``remove_stored_job_upload``.
+    """
+    job_description = job_description or job['description']
+    if not job['cvFile']:
+        raise ValueError('Job has no resume attached')
+    if not job_description:
+        raise ValueError('No job description provided')
+    
+    values = {'keyword_mode': keyword_mode}
+    job_keywords = job_store.job_keywords(job_description, keyword_mode)
+    if job_keywords is not None:
+        values['job_keywords'] = job_keywords
+    resume_data = job_store.parsed_resume(job['cvFile']['hash'])
+    if resume_data is not None:
+        values['resume'] = resume_data
+    else:
+        filename, data = job_store.get_file(job['id'], 'cvFile')
+        values['resume_path'] = save_upload(filename, data)
+    return values, job_description
+
+def remove_stored_job_upload(values: dict):
+    """Delete the temporary resume file of ``stored_job_inputs``, if it wrote one"""
+    filepath = values.get('resume_path')
+    if filepath and os.path.exists(filepath):
+        os.remove(filepath)
+
+def cache_stored_job_results(job: dict, values: dict, results: dict, job_description: str, keyword_mode: str):
+    """Cache the parse and keywords a stored job's analysis had to compute"""
+    if 'resume' not in values:
+        job_store.store_parsed_resume(job['cvFile']['hash'], results['resume'])
+    if 'job_keywords' not in values:
+        job_store.store_job_keywords(job_description, keyword_mode, results['job_keywords'])
+
+def save_stored_job_analysis(job: dict, job_description: str, keyword_mode: str, response: dict) -> dict:
+    """Save an analysis response with its job, adding the saved id as ``job_analysis_id``"""
+    saved = {name: value for name, value in response.items() if name != 'debug'}
+    response['job_analysis_id'] = job_store.save_analysis(job['id'], job['cvFile']['hash'], job_description,
+                                                          keyword_mode, saved)
+    return response
+
+def run_multi_analysis(resume_data: dict, jobs: list, top_n: int, keyword_mode: str,
+                       cancel_token: CancellationToken = None) -> dict:
+    """Score a parsed resume against many jobs, with suggestions for the best ``top_n``
+    
+    ``cancel_token`` is checked before keyword extraction and before each job is scored.
+    """
+    check(cancel_token, 'multi.job_keywords')
+    keyword_mode = keyword_extractor.resolve_mode(keyword_mode)
+    
+    # Extract keywords for all job descriptions in one batch
+    all_job_keywords = keyword_extractor.extract_keywords_batch(
+        [job['description'] for job in jobs],
+        keyword_mode
+    )
+    
+    matrix = []
+    for job, job_keywords in zip(jobs, all_job_keywords):
+        check(cancel_token, 'multi.score')
+        missing_keywords = keyword_extractor.find_missing_keywords(
+            resume_data['raw_text'],
+            job_keywords
+        )
+        score_data = ats_scorer.calculate_score(
+            resume_data,
+            job['description'],
+            job_keywords
+        )
+        keyword_density = keyword_extractor.calculate_keyword_density(
+            resume_data['raw_text'],
+            job_keywords['all_keywords']
+        )
+        matrix.append({
+            'job_id': job['id'],
+            'title': job['title'],
+            'company': job['company'],
+            'score': score_data,
+            'keywords': {
+                'missing': missing_keywords,
+                'density': round(keyword_density, 2)
+            }
+        })
+    
+    # Sort by fit, best match first
+    matrix.sort(key=lambda row: row['score']['overall_score'], reverse=True)
+    
+    # Rule-based suggestions only for the best matching jobs
+    for rank, row in enumerate(matrix, start=1):
+        row['rank'] = rank
+        if rank <= top_n:
+            row['suggestions'] = suggestions_generator.generate_suggestions(
+                row['keywords']['missing'],
+                row['score'],
+                resume_data['sections']
+            )
+    
+    return {
+        'success': True,
+        'jobs_analyzed': len(matrix),
+        'keyword_mode': keyword_mode,
+        'matrix': matrix,
+        'resume_sections': resume_sections(resume_data),
+        'contact_info': resume_data['contact_info']
+    }
+
+def run_analysis(resume_data: dict, job_description: str, previous: dict = None,
+                 keyword_mode: str = None, debug: bool = False, cancel_token: CancellationToken = None) -> dict:
+    """Score a parsed resume against a job description and build the API response
+    
+    When ``previous`` is a stored analysis of an earlier version of the same
+    resume, only the parts whose inputs changed are recomputed: score
+    components are reused per section, and LLM prompts that come out
+    identical are answered from the previous analysis' prompt cache.
+    ``keyword_mode`` picks the keyword extraction engine; a re-score keeps
+    the keywords, and so the mode, of the analysis it builds on. With
+    ``debug`` the response gets a ``debug`` block with the stage timings
+    and the telemetry of each LLM call. Once ``cancel_token`` is cancelled
+    the analysis stops at the next stage, PDF page or LLM stream chunk and
+    raises ``Cancelled``.
+    """
+    return execute_analysis({'resume': resume_data}, job_description, previous, keyword_mode, debug,
+                            cancel_token)
+
+def analyze_file(filepath: str, job_description: str, previous: dict = None,
+                 keyword_mode: str = None, debug: bool = False, cancel_token: CancellationToken = None) -> dict:
+    """``run_analysis`` for an uploaded file, parsed while the job keywords are extracted"""
+    return execute_analysis({'resume_path': filepath}, job_description, previous, keyword_mode, debug,
+                            cancel_token)
+
+def execute_analysis(values: dict, job_description: str, previous: dict, keyword_mode: str,
+                     debug: bool, cancel_token: CancellationToken = None) -> dict:
+    """Run every stage of an analysis, LLM suggestions included, and build the API response"""
+    debug_info = {} if debug else None
+    run = run_analysis_pipeline(values, job_description, previous, keyword_mode, debug_info, cancel_token)
+    analysis = collect_analysis(run)
+    return finish_analysis(analysis, run.results['resume'], job_description,
+                           run.results['llm_suggestions'], debug_info)
+
+def run_analysis_pipeline(values: dict, job_description: str, previous: dict, keyword_mode: str,
+                          debug_info: dict, cancel_token: CancellationToken = None, llm: bool = True):
+    """Pipeline run of an analysis and its parsed resume, with LLM suggestions unless ``llm`` is off
+    
+    ``values`` may hold the value of any stage, which is then skipped.
+    """
+    return analysis_pipeline.run(
+        dict(ANALYSIS_INPUTS, **values, job_description=job_description, previous=previous,
+             requested_mode=keyword_mode, debug_info=debug_info),
+        ANALYSIS_VALUES + ('resume', 'llm_suggestions') if llm else ANALYSIS_VALUES + ('resume',),
+        cancel_token
+    )
+
+def score_analysis(resume_data: dict, job_description: str, previous: dict = None,
+                   keyword_mode: str = None, cancel_token: CancellationToken = None) -> dict:
+    """Deterministic stages of an analysis: keywords, score and rule-based suggestions"""
+    run = analysis_pipeline.run(
+        dict(ANALYSIS_INPUTS, resume=resume_data, job_description=job_description, previous=previous,
+             requested_mode=keyword_mode),
+        ANALYSIS_VALUES,
+        cancel_token
+    )
+    return collect_analysis(run)
+
+def collect_analysis(run) -> dict:
+    """Analysis record from the values of a pipeline run"""
+    analysis = {name: run.results[name] for name in ANALYSIS_VALUES}
+    analysis['pipeline'] = run.report()
+    return analysis
+
+def resolve_keyword_mode(requested_mode: str, previous: dict) -> str:
+    """Keyword engine of an analysis, the previous analysis' one for a re-score"""
+    if previous:
+        return previous['keyword_mode']
+    return keyword_extractor.resolve_mode(requested_mode)
+
+def extract_job_keywords(job_description: str, keyword_mode: str, previous: dict) -> dict:
+    """Keywords of the job description, reused from the previous analysis for a re-score"""
+    if previous:
+        return previous['job_keywords']
+    return keyword_extractor.extract_keywords(job_description, keyword_mode)
+
+def find_changed_sections(resume_data: dict, previous: dict):
+    """Names of resume sections that differ from the previous analysis, None without one"""
+    if not previous:
+        return None
+    return sorted(
+        name for name in set(resume_data['sections']) | set(previous['resume_data']['sections'])
+        if resume_data['sections'].get(name, '') != previous['resume_data']['sections'].get(name, '')
+    )
+
+def find_missing_keywords(resume_data: dict, job_keywords: dict, previous: dict) -> dict:
+    """Job keywords missing from the resume, reused when the resume text is unchanged"""
+    if previous and previous['resume_data']['raw_text'] == resume_data['raw_text']:
+        return previous['missing_keywords']
+    return keyword_extractor.find_missing_keywords(resume_data['raw_text'], job_keywords)
+
+def calculate_keyword_density(resume_data: dict, job_keywords: dict, previous: dict) -> float:
+    """Share of job keywords found in the resume, reused when the resume text is unchanged"""
+    if previous and previous['resume_data']['raw_text'] == resume_data['raw_text']:
+        return previous['keyword_density']
+    return keyword_extractor.calculate_keyword_density(resume_data['raw_text'], job_keywords['all_keywords'])
+
+def build_analysis_pipeline() -> Pipeline:
+    """Stages of an analysis as a dependency graph
+    
+    Resume parsing and job keyword extraction don't depend on each other;
+    category scores and semantic similarity only need both and run side by
+    side, as do rule-based and LLM suggestions at the end. Keyword matching
+    and density are quick string scans and run inline meanwhile.
+    """
+    pipeline = Pipeline('analysis', ANALYSIS_INPUTS)
+    pipeline.stage('keyword_mode', resolve_keyword_mode, ('requested_mode', 'previous'), 'inline')
+    pipeline.stage('job_keywords', extract_job_keywords, ('job_description', 'keyword_mode', 'previous'))
+    pipeline.stage('resume', resume_parser.parse_resume, ('resume_path',), 'process', cancellable=True)
+    pipeline.stage('changed_sections', find_changed_sections, ('resume', 'previous'), 'inline')
+    pipeline.stage(
+        'category_components',
+        lambda resume, job_description, job_keywords, previous: ats_scorer.calculate_components(
+            resume, job_description, job_keywords, previous, ('skills', 'experience', 'education', 'keywords')
+        ),
+        ('resume', 'job_description', 'job_keywords', 'previous')
+    )
+    pipeline.stage(
+        'semantic_component',
+        lambda resume, job_description, job_keywords, previous: ats_scorer.calculate_components(
+            resume, job_description, job_keywords, previous, ('semantic',)
+        ),
+        ('resume', 'job_description', 'job_keywords', 'previous')
+    )
+    pipeline.stage('missing_keywords', find_missing_keywords, ('resume', 'job_keywords', 'previous'), 'inline')
+    pipeline.stage('keyword_density', calculate_keyword_density, ('resume', 'job_keywords', 'previous'), 'inline')
+    pipeline.stage(
+        'components',
+        lambda category, semantic: {**category, **semantic},
+        ('category_components', 'semantic_component'), 'inline'
+    )
+    pipeline.stage('score_data', ats_scorer.score_from_components, ('components',), 'inline')
+    pipeline.stage(
+        'suggestions',
+        lambda missing_keywords, score_data, resume: suggestions_generator.generate_suggestions(
+            missing_keywords, score_data, resume['sections']
+        ),
+        ('missing_keywords', 'score_data', 'resume')
+    )
+    pipeline.stage(
+        'llm_cache',
+        lambda previous: dict(previous['llm_cache']) if previous else {},
+        ('previous',), 'inline'
+    )
+    # Inline, so it waits for Ollama in the request thread while the rule
+    # suggestions run in the pool
+    pipeline.stage(
+        'llm_suggestions',
+        lambda missing_keywords, score_data, llm_cache, resume, job_description, debug_info, cancel_token:
+        generate_llm_suggestions(
+            {'missing_keywords': missing_keywords, 'score_data': score_data, 'llm_cache': llm_cache},
+            resume, job_description, debug_info, cancel_token
+        ),
+        ('missing_keywords', 'score_data', 'llm_cache', 'resume', 'job_description', 'debug_info'), 'inline',
+        cancellable=True
+    )
+    return pipeline
+
+# Values passed to the analysis pipeline, with defaults
+ANALYSIS_INPUTS = {
+    'resume_path': None,
+    'job_description': '',
+    'requested_mode': None,
+    'previous': None,
+    'debug_info': None
+}
+# Pipeline values making up a stored analysis
+ANALYSIS_VALUES = ('job_keywords', 'keyword_mode', 'changed_sections', 'missing_keywords', 'keyword_density',
+                   'components', 'score_data', 'suggestions', 'llm_cache')
+analysis_pipeline = build_analysis_pipeline()
+
+def generate_llm_suggestions(analysis: dict, resume_data: dict, job_description: str,
+                             debug_info: dict = None, cancel_token: CancellationToken = None) -> dict:
+    """LLM-powered suggestions for a scored analysis, within the LLM admission limits
+    
+    When ``debug_info`` is given, the wait for an LLM slot and the
+    telemetry of each LLM call are added to it. A cancelled
+    ``cancel_token`` aborts the running generation and raises ``Cancelled``.
+    """
+    llm_suggestions = {}
+    trace = start_trace(debug_info)
+    try:
+        if Config.OLLAMA_ENABLED:
+            # Bound concurrent generations so a burst can't swamp the model
+            # server; fallback suggestions don't need a slot
+            gate = llm_gate.admit() if llm_generator.is_available() else nullcontext()
+            started = time.perf_counter()
+            with gate:
+                record_admission_wait(debug_info, started)
+                llm_suggestions = llm_generator.generate_suggestions(
+                    job_description,
+                    analysis['missing_keywords'],
+                    resume_data['sections'],
+                    analysis['score_data']['overall_score'],
+                    analysis['llm_cache'],
+                    trace,
+                    cancel_token
+                )
+    except AdmissionRejected as e:
+        llm_suggestions = llm_overloaded_suggestions(analysis['missing_keywords'], e)
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"LLM generation error: {e}")
+        llm_suggestions = llm_error_suggestions()
+    return llm_suggestions
+
+def start_trace(debug_info: dict = None) -> list:
+    """List collecting the LLM call telemetry of a debug request, None otherwise"""
+    if debug_info is None:
+        return None
+    debug_info['llm_admission_wait_ms'] = None
+    debug_info['llm_calls'] = []
+    return debug_info['llm_calls']
+
+def record_admission_wait(debug_info: dict, started: float):
+    """Note how long a debug request waited for an LLM slot"""
+    if debug_info is not None:
+        debug_info['llm_admission_wait_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+def debug_requested(value: str) -> bool:
+    """Whether a form field asks for the debug block"""
+    return (value or '').strip().lower() in ('1', 'true', 'yes')
+
+def llm_overloaded_suggestions(missing_keywords: dict, error: AdmissionRejected) -> dict:
+    """Fallback suggestions for a request that got no LLM slot, or re-raise under 'reject'"""
+    if Config.LLM_OVERLOAD_POLICY == 'reject':
+        raise error
+    return llm_generator.fallback_suggestions(
+        missing_keywords,
+        'AI suggestions skipped because the server is busy. Please try again shortly.'
+    )
+
+def llm_error_suggestions() -> dict:
+    """LLM section of the response when generation failed"""
+    return {
+        'llm_unavailable': True,
+        'message': 'AI suggestions temporarily unavailable'
+    }
+
+def finish_analysis(analysis: dict, resume_data: dict, job_description: str, llm_suggestions: dict,
+                    debug_info: dict = None) -> dict:
+    """Store an analysis for re-scoring and build its API response"""
+    analysis_id = analysis_store.save({
+        'job_description': job_description,
+        'job_keywords': analysis['job_keywords'],
+        'keyword_mode': analysis['keyword_mode'],
+        'resume_data': resume_data,
+        'components': analysis['components'],
+        'missing_keywords': analysis['missing_keywords'],
+        'keyword_density': analysis['keyword_density'],
+        'llm_cache': analysis['llm_cache']
+    })
+    
+    # Prepare response
+    response = {
+        'success': True,
+        'analysis_id': analysis_id,
+        'keyword_mode': analysis['keyword_mode'],
+        'score': analysis['score_data'],
+        'keywords': {
+            'found': analysis['job_keywords'],
+            'missing': analysis['missing_keywords'],
+            'density': round(analysis['keyword_density'], 2)
+        },
+        'suggestions': analysis['suggestions'],
+        'llm_suggestions': llm_suggestions,
+        'resume_sections': resume_sections(resume_data),
+        'contact_info': resume_data['contact_info']
+    }
+    
+    if analysis['changed_sections'] is not None:
+        response['changed_sections'] = analysis['changed_sections']
+    
+    if debug_info is not None:
+        debug_info['pipeline'] = analysis['pipeline']
+        response['debug'] = debug_info
+    
+    return response
+
+def resume_sections(resume_data: dict) -> dict:
+    """Which resume sections were found, for API responses"""
+    return {
+        'has_summary': bool(resume_data['sections'].get('summary')),
+        'has_experience': bool(resume_data['sections'].get('experience')),
+        'has_education': bool(resume_data['sections'].get('education')),
+        'has_skills': bool(resume_data['sections'].get('skills')),
+        'word_count': resume_data['total_words']
+    }
+
+def save_upload(filename: str, data: bytes) -> str:
+    """Write an uploaded file under a unique name and return its path"""
+    filepath = os.path.join(Config.UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+    with open(filepath, 'wb') as f:
+        f.write(data)
+    return filepath
+
+def request_token() -> CancellationToken:
+    """Cancellation token for the current request: its deadline and, under gunicorn, a client disconnect"""
+    return CancellationToken.for_request(disconnected=wsgi_disconnect_probe(request.environ))
+
+def cancelled_response(error: Cancelled):
+    """504 for a request that ran past its deadline, 499 (nobody is listening) for a disconnect"""
+    if error.reason == CancellationToken.DEADLINE:
+        return jsonify({
+            'success': False,
+            'error': 'Analysis took too long and was stopped. Please try again.'
+        }), 504
+    return jsonify({'success': False, 'error': 'Client disconnected'}), 499
+
+def busy_response(error: AdmissionRejected):
+    """429 response telling the client when to retry"""
+    response = jsonify({
+        'success': False,
+        'error': 'Server is busy. Please try again shortly.',
+        'retry_after': error.retry_after
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def warm_up():
+    """Load models and run one dummy analysis so the first request is fast"""
+    warmup_state['status'] = 'warming'
+    started = time.perf_counter()
+    
+    try:
+        # Deterministic stages only, the LLM is not needed to be ready
+        job_description = 'Python developer with Flask, SQL and Docker experience. Strong communication skills. Bachelor degree.'
+        resume_data = {
+            'raw_text': 'Experience Python developer building Flask APIs with SQL. Education Bachelor of Science. Skills Python, Docker',
+            'sections': {
+                'experience': 'Python developer building Flask APIs with SQL',
+                'education': 'Bachelor of Science',
+                'skills': 'Python, Docker'
+            },
+            'contact_info': {},
+            'total_words': 17
+        }
+        
+        # Through the pipeline, which also starts its thread pool
+        score_analysis(resume_data, job_description)
+        
+        # Import the document parsers used on the first upload
+        import PyPDF2, docx  # noqa: F401
+        
+        warmup_state['status'] = 'ready'
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        warmup_state['status'] = 'failed'
+        warmup_state['error'] = str(e)
+    
+    finished = time.perf_counter()
+    warmup_state['warmup_seconds'] = round(finished - started, 3)
+    warmup_state['cold_start_seconds'] = round(finished - _import_started, 3)
+    print(f"Warm-up {warmup_state['status']}: import {warmup_state['import_seconds']}s, "
+          f"warm-up {warmup_state['warmup_seconds']}s, cold start {warmup_state['cold_start_seconds']}s")
+
+def start_warm_up():
+    """Run warm-up in the background so the server starts accepting requests at once"""
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+def parse_jobs(raw_jobs: str) -> list:
+    """Parse the JSON list of jobs sent to the multi-job endpoint"""
+    if not raw_jobs:
+        raise ValueError('No jobs provided')
+    
+    try:
+        items = json.loads(raw_jobs)
+    except json.JSONDecodeError:
+        raise ValueError('Jobs must be a JSON list')
+    
+    if not isinstance(items, list) or not items:
+        raise ValueError('Jobs must be a non-empty JSON list')
+    
+    if len(items) > Config.MULTI_JD_MAX_JOBS:
+        raise ValueError(f'Too many jobs. Maximum is {Config.MULTI_JD_MAX_JOBS}')
+    
+    jobs = []
+    for index, item in enumerate(items):
+        # Accept plain job description strings as well as job objects
+        if isinstance(item, str):
+            item = {'description': item}
+        if not isinstance(item, dict) or not str(item.get('description', '')).strip():
+            raise ValueError(f'Job {index} has no job description')
+        jobs.append({
+            'id': item.get('id', index),
+            'title': item.get('title') or item.get('position', ''),
+            'company': item.get('company', ''),
+            'description': str(item['description'])
+        })
+    
+    return jobs
+
 @app.errorhandler(413)
 def file_too_large(e):
     """Handle file too large error"""
@@ -157,6 +1077,10 @@ def internal_error(e):
     }), 500
 
 if __name__ == '__main__':
+    # With the reloader on, only warm up the child process that serves requests
+    if Config.WARMUP_ON_START and (not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_warm_up()
+    
     app.run(
         host=Config.API_HOST,
         port=Config.API_PORT,
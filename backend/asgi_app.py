@@ -0,0 +1,548 @@
+"""ASGI variant of the API
+
+Serves the same routes and response shapes as app.py on Starlette. LLM
+calls go through the async Ollama client, so a request waiting on a slow
+model holds a coroutine instead of an OS thread, and one process can keep
+hundreds of such requests open. Parsing and scoring are CPU-bound and run
+in a small thread pool (``ASGI_CPU_WORKERS``); the pipeline components are
+shared with app.py and are thread-safe.
+
+Usage:
+    python asgi_app.py
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.utils import secure_filename
+import app as api
+import cancellation
+import process_stats
+from config import Config
+from cancellation import Cancelled, CancellationToken
+from admission import AsyncAdmissionGate, AdmissionRejected
+from single_flight import AsyncSingleFlight, request_key
+from resume_archive import ArchiveLimitError, open_archive
+from job_store import FILE_FIELDS
+
+# Parsing and scoring run here so they don't block the event loop
+cpu_pool = ThreadPoolExecutor(max_workers=Config.ASGI_CPU_WORKERS, thread_name_prefix='cpu')
+llm_gate = AsyncAdmissionGate(
+    Config.ASGI_LLM_MAX_CONCURRENCY,
+    Config.ASGI_LLM_MAX_QUEUE,
+    Config.ASGI_LLM_QUEUE_TIMEOUT
+)
+single_flight = AsyncSingleFlight()
+
+
+async def run_cpu(func, *args):
+    """Run a blocking pipeline stage in the CPU thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, partial(func, *args))
+
+
+def error_response(message: str, status: int) -> JSONResponse:
+    return JSONResponse({'error': message}, status_code=status)
+
+
+def busy_response(error: AdmissionRejected) -> JSONResponse:
+    """429 response telling the client when to retry"""
+    return JSONResponse(
+        {
+            'success': False,
+            'error': 'Server is busy. Please try again shortly.',
+            'retry_after': error.retry_after
+        },
+        status_code=429,
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+
+async def read_upload(form):
+    """Validated resume upload from a form as ``(filename, data)``, or an error response"""
+    file = form.get('resume')
+    if file is None or isinstance(file, str):
+        return error_response('No resume file provided', 400)
+    if not file.filename:
+        return error_response('No file selected', 400)
+    if not api.allowed_file(file.filename):
+        return error_response('Invalid file format. Only PDF and DOCX allowed', 400)
+
+    data = await file.read()
+    if len(data) > Config.MAX_FILE_SIZE:
+        return error_response('File too large. Maximum size is 5MB', 413)
+    return secure_filename(file.filename), data
+
+
+@asynccontextmanager
+async def request_token(request: Request):
+    """Cancellation token for a request, cancelled when its deadline passes or the client disconnects
+
+    ``is_disconnected`` only works on the event loop, so a watcher task
+    polls it and cancels the token the thread pool stages check.
+    """
+    token = CancellationToken.for_request()
+
+    async def watch():
+        while not token.cancelled:
+            if await request.is_disconnected():
+                token.cancel(CancellationToken.CLIENT_DISCONNECT)
+                return
+            await asyncio.sleep(Config.CANCELLATION_POLL_INTERVAL)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield token
+    finally:
+        watcher.cancel()
+
+
+def cancelled_response(error: Cancelled) -> JSONResponse:
+    """504 for a request that ran past its deadline, 499 (nobody is listening) for a disconnect"""
+    if error.reason == CancellationToken.DEADLINE:
+        return JSONResponse(
+            {'success': False, 'error': 'Analysis took too long and was stopped. Please try again.'},
+            status_code=504
+        )
+    return JSONResponse({'success': False, 'error': 'Client disconnected'}, status_code=499)
+
+
+def parse_upload(filename: str, data: bytes, cancel_token: CancellationToken = None) -> dict:
+    """Parse an uploaded resume via a temporary file"""
+    filepath = api.save_upload(filename, data)
+    try:
+        return api.resume_parser.parse_resume(filepath, cancel_token)
+    finally:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+
+async def generate_llm_suggestions(analysis: dict, resume_data: dict, job_description: str,
+                                   debug_info: dict = None, cancel_token: CancellationToken = None) -> dict:
+    """Async ``api.generate_llm_suggestions``: the wait for a slot and for Ollama holds no thread"""
+    trace = api.start_trace(debug_info)
+
+    async def generate():
+        return await api.llm_generator.agenerate_suggestions(
+            job_description,
+            analysis['missing_keywords'],
+            resume_data['sections'],
+            analysis['score_data']['overall_score'],
+            analysis['llm_cache'],
+            trace,
+            cancel_token
+        )
+
+    llm_suggestions = {}
+    try:
+        if Config.OLLAMA_ENABLED:
+            # Fallback suggestions don't need a slot
+            if api.llm_generator.is_available():
+                started = time.perf_counter()
+                async with llm_gate.admit():
+                    api.record_admission_wait(debug_info, started)
+                    llm_suggestions = await generate()
+            else:
+                llm_suggestions = await generate()
+    except AdmissionRejected as e:
+        llm_suggestions = api.llm_overloaded_suggestions(analysis['missing_keywords'], e)
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"LLM generation error: {e}")
+        llm_suggestions = api.llm_error_suggestions()
+    return llm_suggestions
+
+
+async def run_analysis(resume_data: dict, job_description: str, previous: dict = None,
+                       keyword_mode: str = None, debug: bool = False,
+                       cancel_token: CancellationToken = None) -> dict:
+    """Async ``api.run_analysis``"""
+    analysis = await run_cpu(api.score_analysis, resume_data, job_description, previous, keyword_mode,
+                             cancel_token)
+    debug_info = {} if debug else None
+    llm_suggestions = await generate_llm_suggestions(analysis, resume_data, job_description, debug_info,
+                                                     cancel_token)
+    return api.finish_analysis(analysis, resume_data, job_description, llm_suggestions, debug_info)
+
+
+async def health_check(request: Request):
+    """Health check endpoint"""
+    return JSONResponse({
+        'status': 'healthy',
+        'message': 'ATS Resume Checker API is running'
+    })
+
+
+async def readiness_check(request: Request):
+    """Readiness endpoint, reports warm-up state"""
+    ready = api.warmup_state['status'] == 'ready'
+    return JSONResponse({
+        'ready': ready,
+        'warmup': api.warmup_state,
+        'ollama_available': api.llm_generator.ollama_available,
+        'ollama_probe_finished': api.llm_generator.probe_finished.is_set()
+    }, status_code=200 if ready else 503)
+
+
+async def metrics(request: Request):
+    """Runtime metrics for monitoring"""
+    return JSONResponse({
+        'process': process_stats.process_info(),
+        'llm': api.llm_generator.status(),
+        'llm_admission': llm_gate.stats(),
+        'single_flight': single_flight.stats(),
+        'pipeline': api.analysis_pipeline.stats(),
+        'cancellations': cancellation.stats(),
+        'job_store': api.job_store.stats(),
+        'keyword_matching': api.keyword_extractor.skill_index.stats(),
+        'event_loop': {
+            'tasks': len(asyncio.all_tasks()),
+            'threads': threading.active_count(),
+            'cpu_workers': Config.ASGI_CPU_WORKERS
+        }
+    })
+
+
+async def analyze_resume(request: Request):
+    """Main analysis endpoint"""
+    try:
+        form = await request.form()
+        upload = await read_upload(form)
+        if isinstance(upload, JSONResponse):
+            return upload
+        filename, file_data = upload
+
+        job_description = form.get('job_description', '')
+        if not job_description:
+            return error_response('No job description provided', 400)
+
+        try:
+            keyword_mode = api.keyword_extractor.check_mode(form.get('keyword_mode'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        debug = api.debug_requested(form.get('debug'))
+
+        async def analyze():
+            async with request_token(request) as token:
+                resume_data = await run_cpu(parse_upload, filename, file_data, token)
+                return await run_analysis(resume_data, job_description, keyword_mode=keyword_mode, debug=debug,
+                                          cancel_token=token)
+
+        # Identical concurrent requests (double clicks, retries) share one run
+        key = request_key('analyze', file_data, os.path.splitext(filename)[1], job_description, keyword_mode, debug)
+        try:
+            response, _ = await single_flight.do(key, analyze)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Cancelled as e:
+            return cancelled_response(e)
+
+        return JSONResponse(response)
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def rescore_resume(request: Request):
+    """Re-score an edited resume against the job of a previous analysis"""
+    try:
+        analysis_id = request.path_params['analysis_id']
+        previous = api.analysis_store.get(analysis_id)
+        if previous is None:
+            return error_response('Analysis not found or expired', 404)
+
+        form = await request.form()
+        upload = await read_upload(form)
+        if isinstance(upload, JSONResponse):
+            return upload
+
+        try:
+            async with request_token(request) as token:
+                resume_data = await run_cpu(parse_upload, *upload, token)
+                response = await run_analysis(resume_data, previous['job_description'], previous,
+                                              debug=api.debug_requested(form.get('debug')), cancel_token=token)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Cancelled as e:
+            return cancelled_response(e)
+        response['previous_analysis_id'] = analysis_id
+
+        return JSONResponse(response)
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def analyze_resume_multi(request: Request):
+    """Score one resume against many job descriptions"""
+    try:
+        form = await request.form()
+        upload = await read_upload(form)
+        if isinstance(upload, JSONResponse):
+            return upload
+        filename, file_data = upload
+
+        try:
+            jobs = api.parse_jobs(form.get('jobs', ''))
+            keyword_mode = api.keyword_extractor.check_mode(form.get('keyword_mode'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        try:
+            top_n = int(form.get('top_n', Config.MULTI_JD_SUGGESTIONS_TOP_N))
+        except ValueError:
+            top_n = Config.MULTI_JD_SUGGESTIONS_TOP_N
+
+        async def analyze_multi():
+            async with request_token(request) as token:
+                resume_data = await run_cpu(parse_upload, filename, file_data, token)
+                return await run_cpu(api.run_multi_analysis, resume_data, jobs, top_n, keyword_mode, token)
+
+        # Identical concurrent requests (double clicks, retries) share one run
+        key = request_key('analyze_multi', file_data, os.path.splitext(filename)[1], jobs, top_n, keyword_mode)
+        try:
+            response, _ = await single_flight.do(key, analyze_multi)
+        except Cancelled as e:
+            return cancelled_response(e)
+
+        return JSONResponse(response)
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def analyze_archive(request: Request):
+    """Score every resume in a ZIP archive against one job, streaming NDJSON results"""
+    form = await request.form()
+    file = form.get('archive')
+    if file is None or isinstance(file, str):
+        return error_response('No archive file provided', 400)
+    if not file.filename:
+        return error_response('No file selected', 400)
+
+    job_description = form.get('job_description', '')
+    if not job_description:
+        return error_response('No job description provided', 400)
+
+    try:
+        keyword_mode = api.keyword_extractor.resolve_mode(form.get('keyword_mode'))
+        archive = await run_cpu(open_archive, file.file)
+    except ArchiveLimitError as e:
+        return error_response(str(e), 413)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    async def stream():
+        # Each entry is read, parsed and scored in the CPU pool
+        lines = api.ndjson_lines(api.analyze_archive_entries(archive, job_description, keyword_mode))
+        try:
+            while True:
+                line = await run_cpu(next, lines, None)
+                if line is None:
+                    break
+                yield line
+        finally:
+            try:
+                lines.close()
+            except ValueError:
+                # Still running in the pool after a disconnect, closed when collected
+                pass
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+
+async def rerank_features(request: Request):
+    """Re-rank stored analyses under a new weight profile without re-parsing"""
+    try:
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        return JSONResponse(await run_cpu(api.rerank_stored_features, body))
+    except FileNotFoundError as e:
+        return error_response(str(e), 404)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def list_jobs(request: Request):
+    """One page of tracked jobs, filtered by status, country and application date"""
+    try:
+        return JSONResponse(await run_cpu(api.list_stored_jobs, request.query_params))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+
+async def save_job(request: Request):
+    """Create or replace a tracked job, as JSON or as multipart with a ``job`` field and files"""
+    try:
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            form = await request.form()
+            job = json.loads(form.get('job') or '{}')
+            files = {
+                field: (value.filename, await value.read())
+                for field, value in form.multi_items() if not isinstance(value, str) and value.filename
+            }
+        else:
+            try:
+                job = await request.json()
+            except ValueError:
+                job = None
+            files = {}
+        return JSONResponse(await run_cpu(api.store_job, job, files, request.path_params.get('job_id')))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+
+async def get_job(request: Request):
+    """A tracked job with its description and file metadata"""
+    job = await run_cpu(api.job_store.get_job, request.path_params['job_id'])
+    if job is None:
+        return error_response('Job not found', 404)
+    return JSONResponse(job)
+
+
+async def delete_job(request: Request):
+    """Delete a tracked job with its analyses and unshared files"""
+    if not await run_cpu(api.job_store.delete_job, request.path_params['job_id']):
+        return error_response('Job not found', 404)
+    return JSONResponse({'success': True})
+
+
+async def download_job_file(request: Request):
+    """Download a job's ``cvFile`` or ``coverLetterFile``"""
+    field = request.path_params['field']
+    if field not in FILE_FIELDS:
+        return error_response(f"Unknown file '{field}'", 404)
+    stored = await run_cpu(api.job_store.get_file, request.path_params['job_id'], field)
+    if stored is None:
+        return error_response('File not found', 404)
+    name, data = stored
+    return Response(data, media_type='application/octet-stream',
+                    headers={'Content-Disposition': f'attachment; filename="{name}"'})
+
+
+async def analyze_job(request: Request):
+    """Analyze a tracked job's resume against its description and save the result with the job"""
+    try:
+        job = await run_cpu(api.job_store.get_job, request.path_params['job_id'])
+        if job is None:
+            return error_response('Job not found', 404)
+
+        form = await request.form()
+        try:
+            keyword_mode = await run_cpu(api.keyword_extractor.resolve_mode, form.get('keyword_mode'))
+            values, job_description = await run_cpu(
+                api.stored_job_inputs, job, form.get('job_description'), keyword_mode
+            )
+        except ValueError as e:
+            return error_response(str(e), 400)
+        debug_info = {} if api.debug_requested(form.get('debug')) else None
+
+        try:
+            async with request_token(request) as token:
+                try:
+                    run = await run_cpu(api.run_analysis_pipeline, values, job_description, None, keyword_mode,
+                                        debug_info, token, False)
+                finally:
+                    await run_cpu(api.remove_stored_job_upload, values)
+                await run_cpu(api.cache_stored_job_results, job, values, run.results, job_description, keyword_mode)
+                analysis = api.collect_analysis(run)
+                llm_suggestions = await generate_llm_suggestions(analysis, run.results['resume'], job_description,
+                                                                 debug_info, token)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        except Cancelled as e:
+            return cancelled_response(e)
+
+        response = api.finish_analysis(analysis, run.results['resume'], job_description, llm_suggestions, debug_info)
+        return JSONResponse(await run_cpu(api.save_stored_job_analysis, job, job_description, keyword_mode, response))
+
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def list_job_analyses(request: Request):
+    """Saved analyses of a tracked job, newest first"""
+    job_id = request.path_params['job_id']
+    if await run_cpu(api.job_store.get_job, job_id) is None:
+        return error_response('Job not found', 404)
+    return JSONResponse({'analyses': await run_cpu(api.job_store.list_analyses, job_id)})
+
+
+async def get_job_analysis(request: Request):
+    """Full response of a saved analysis"""
+    analysis = await run_cpu(api.job_store.get_analysis, request.path_params['job_id'],
+                             request.path_params['analysis_id'])
+    if analysis is None:
+        return error_response('Analysis not found', 404)
+    return JSONResponse(analysis)
+
+
+class RequestCounter:
+    """ASGI middleware counting HTTP requests for /api/metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            process_stats.record_request()
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm up in the background at startup, stop the CPU pool at shutdown"""
+    if Config.WARMUP_ON_START:
+        asyncio.get_running_loop().run_in_executor(cpu_pool, api.warm_up)
+    yield
+    cpu_pool.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/ready', readiness_check, methods=['GET']),
+        Route('/api/metrics', metrics, methods=['GET']),
+        Route('/api/analyze', analyze_resume, methods=['POST']),
+        Route('/api/analyze/{analysis_id}/rescore', rescore_resume, methods=['POST']),
+        Route('/api/analyze/multi', analyze_resume_multi, methods=['POST']),
+        Route('/api/analyze/archive', analyze_archive, methods=['POST']),
+        Route('/api/features/rerank', rerank_features, methods=['POST']),
+        Route('/api/jobs', list_jobs, methods=['GET']),
+        Route('/api/jobs', save_job, methods=['POST']),
+        Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+        Route('/api/jobs/{job_id}', save_job, methods=['PUT']),
+        Route('/api/jobs/{job_id}', delete_job, methods=['DELETE']),
+        Route('/api/jobs/{job_id}/files/{field}', download_job_file, methods=['GET']),
+        Route('/api/jobs/{job_id}/analyze', analyze_job, methods=['POST']),
+        Route('/api/jobs/{job_id}/analyses', list_job_analyses, methods=['GET']),
+        Route('/api/jobs/{job_id}/analyses/{analysis_id}', get_job_analysis, methods=['GET'])
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['http://localhost:5173', 'http://127.0.0.1:5173'],
+                   allow_methods=['*'], allow_headers=['*']),
+        Middleware(RequestCounter)
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=Config.API_HOST, port=Config.API_PORT)
@@ -1,64 +1,175 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import Dict, List
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 from config import Config
+from nlp_pipelines import load_pipeline, pipe_texts
+from keyword_index import KeywordIndex
 
 class ATSScorer:
-    def __init__(self):
-        self.nlp = None
-        try:
-            import spacy
-            self.nlp = spacy.load(Config.SPACY_MODEL)
-            print(f"Loaded spaCy model for ATS scoring: {Config.SPACY_MODEL}")
-        except (OSError, ImportError) as e:
-            print(f"Warning: spaCy model not available for ATS scoring ({e}). Using TF-IDF fallback.")
+    """Scores a parsed resume against a job description
+    
+    Thread-safe: one instance can be shared by all request threads. The only
+    shared state is the spaCy pipeline, loaded once under a lock and only
+    read afterwards, and the read-only keyword index; TF-IDF models are
+    fitted per call on local objects, and every method works on its
+    arguments and local variables.
+    
+    With a ``keyword_index`` (``KeywordExtractor.skill_index``) skills and
+    keywords match the way ``find_missing_keywords`` does, variants and
+    typos included; without one they must appear verbatim.
+    """
+    
+    # Resume input each score component depends on, used for incremental re-scoring
+    COMPONENT_INPUTS = {
+        'skills': 'skills',
+        'experience': 'experience',
+        'education': 'education',
+        'keywords': 'raw_text',
+        'semantic': 'raw_text'
+    }
+    
+    def __init__(self, keyword_index: Optional[KeywordIndex] = None):
+        self.keyword_index = keyword_index
+        
+        # spaCy pipeline is loaded on first use, see the nlp property
+        self._nlp = None
+        self._nlp_loaded = False
+        self._load_lock = threading.Lock()
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline for semantic similarity, or None if unavailable"""
+        if not self._nlp_loaded:
+            with self._load_lock:
+                if not self._nlp_loaded:
+                    try:
+                        # Only token vectors are needed for similarity
+                        self._nlp = load_pipeline('similarity')
+                    except (OSError, ImportError) as e:
+                        print(f"Warning: spaCy model not available for ATS scoring ({e}). Using TF-IDF fallback.")
+                    self._nlp_loaded = True
+        return self._nlp
+    
+    def _tfidf_similarity(self, text_a: str, text_b: str) -> float:
+        """Cosine similarity of two texts under a TF-IDF model fitted on just them
         
+        The vectorizer is created per call: fitting mutates it, so a shared
+        instance would let concurrent requests overwrite each other's
+        vocabulary between fit and transform.
+        """
+        # sklearn is imported here to keep it out of startup
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
         
-        self.vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+        vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+        tfidf_matrix = vectorizer.fit_transform([text_a, text_b])
+        return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
     
     def calculate_score(self, resume_data: Dict, job_description: str, job_keywords: Dict) -> Dict:
         """Calculate comprehensive ATS score"""
+        components = self.calculate_components(resume_data, job_description, job_keywords)
+        return self.score_from_components(components)
+    
+    def calculate_components(self, resume_data: Dict, job_description: str, job_keywords: Dict,
+                             previous: Optional[Dict] = None,
+                             names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Calculate unweighted score components
+        
+        When ``previous`` holds the ``resume_data`` and ``components`` of an
+        earlier version of the resume scored against the same job, components
+        whose inputs did not change are reused instead of recomputed.
+        ``names`` limits the calculation to some components, so independent
+        ones can run as separate pipeline stages.
+        """
         resume_text = resume_data['raw_text']
         sections = resume_data['sections']
         
-        # Calculate individual scores
-        skills_score = self._score_skills(sections.get('skills', ''), job_keywords)
-        experience_score = self._score_experience(sections.get('experience', ''), job_description)
-        education_score = self._score_education(sections.get('education', ''), job_keywords)
-        keyword_score = self._score_keywords(resume_text, job_keywords)
+        calculators = {
+            'skills': lambda: self._score_skills(sections.get('skills', ''), job_keywords),
+            'experience': lambda: self._score_experience(sections.get('experience', ''), job_description),
+            'education': lambda: self._score_education(sections.get('education', ''), job_keywords),
+            'keywords': lambda: self._score_keywords(resume_text, job_keywords),
+            'semantic': lambda: self._calculate_semantic_similarity(resume_text, job_description)
+        }
+        
+        components = {}
+        for name, calculate in calculators.items():
+            if names is not None and name not in names:
+                continue
+            if previous and self._component_input(previous['resume_data'], name) == \
+                    self._component_input(resume_data, name):
+                components[name] = previous['components'][name]
+            else:
+                components[name] = calculate()
+        
+        return components
+    
+    @staticmethod
+    def resolve_profile(weights: Optional[Dict[str, float]] = None,
+                        semantic_blend: Optional[float] = None) -> Tuple[Dict[str, float], float]:
+        """Weights and semantic blend of a weight profile, defaulting to ``Config``
+        
+        ``weights`` may override only some of ``Config.WEIGHTS``. Raises
+        ``ValueError`` for unknown components, negative weights and a blend
+        outside [0, 1].
+        """
+        unknown = set(weights or {}) - set(Config.WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown weight(s): {', '.join(sorted(unknown))}")
+        resolved = {name: float(value) for name, value in {**Config.WEIGHTS, **(weights or {})}.items()}
+        if any(value < 0 for value in resolved.values()):
+            raise ValueError('Weights must not be negative')
+        
+        blend = float(Config.SEMANTIC_BLEND if semantic_blend is None else semantic_blend)
+        if not 0 <= blend <= 1:
+            raise ValueError('semantic_blend must be between 0 and 1')
+        return resolved, blend
+    
+    def score_from_components(self, components: Dict[str, float], weights: Optional[Dict[str, float]] = None,
+                              semantic_blend: Optional[float] = None) -> Dict:
+        """Combine score components into the final weighted score
+        
+        ``weights`` and ``semantic_blend`` give a weight profile other than
+        ``Config.WEIGHTS`` and ``Config.SEMANTIC_BLEND``; ``FeatureStore.scores``
+        applies the same formula to stored components.
+        """
+        weights, semantic_blend = self.resolve_profile(weights, semantic_blend)
         
         # Calculate weighted overall score
         overall_score = (
-            skills_score * Config.WEIGHTS['skills'] +
-            experience_score * Config.WEIGHTS['experience'] +
-            education_score * Config.WEIGHTS['education'] +
-            keyword_score * Config.WEIGHTS['keywords']
+            components['skills'] * weights['skills'] +
+            components['experience'] * weights['experience'] +
+            components['education'] * weights['education'] +
+            components['keywords'] * weights['keywords']
         )
         
-        # Calculate semantic similarity
-        semantic_score = self._calculate_semantic_similarity(resume_text, job_description)
-        
         # Adjust overall score with semantic similarity
-        final_score = (overall_score * 0.7) + (semantic_score * 0.3)
+        semantic_score = components['semantic']
+        final_score = (overall_score * (1 - semantic_blend)) + (semantic_score * semantic_blend)
         
         return {
             'overall_score': round(final_score, 2),
             'category_scores': {
-                'skills_match': round(skills_score, 2),
-                'experience_match': round(experience_score, 2),
-                'education_match': round(education_score, 2),
-                'keyword_density': round(keyword_score, 2)
+                'skills_match': round(components['skills'], 2),
+                'experience_match': round(components['experience'], 2),
+                'education_match': round(components['education'], 2),
+                'keyword_density': round(components['keywords'], 2)
             },
             'semantic_similarity': round(semantic_score, 2),
             'rating': self._get_rating(final_score)
         }
     
+    def _component_input(self, resume_data: Dict, component: str) -> str:
+        """Get the resume text a score component is computed from"""
+        source = self.COMPONENT_INPUTS[component]
+        if source == 'raw_text':
+            return resume_data['raw_text']
+        return resume_data['sections'].get(source, '')
+    
     def _score_skills(self, skills_section: str, job_keywords: Dict) -> float:
         """Score skills match"""
         if not skills_section:
             return 0.0
         
-        skills_lower = skills_section.lower()
         tech_skills = job_keywords.get('technical_skills', [])
         soft_skills = job_keywords.get('soft_skills', [])
         
@@ -67,8 +178,8 @@ class ATSScorer:
             return 50.0
         
         # Count matched skills (weighted: technical 70%, soft 30%)
-        tech_matches = sum(1 for skill in tech_skills if skill.lower() in skills_lower)
-        soft_matches = sum(1 for skill in soft_skills if skill.lower() in skills_lower)
+        tech_matches = self._count_matches(skills_section, tech_skills)
+        soft_matches = self._count_matches(skills_section, soft_skills)
         
         tech_score = (tech_matches / len(tech_skills) * 100) if tech_skills else 0
         soft_score = (soft_matches / len(soft_skills) * 100) if soft_skills else 0
@@ -82,8 +193,7 @@ class ATSScorer:
         
         # Use TF-IDF to compare experience section with job description
         try:
-            tfidf_matrix = self.vectorizer.fit_transform([experience_section, job_description])
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+            similarity = self._tfidf_similarity(experience_section, job_description)
             return similarity * 100
         except:
             return 50.0
@@ -119,30 +229,35 @@ class ATSScorer:
     
     def _score_keywords(self, resume_text: str, job_keywords: Dict) -> float:
         """Score keyword density"""
-        resume_lower = resume_text.lower()
         all_keywords = job_keywords.get('all_keywords', [])
         
         if not all_keywords:
             return 50.0
         
         # Count keyword matches
-        matches = sum(1 for kw in all_keywords if kw.lower() in resume_lower)
+        matches = self._count_matches(resume_text, all_keywords)
         
         # Calculate density
         density = (matches / len(all_keywords)) * 100
         
         return min(100, density)
     
+    def _count_matches(self, text: str, keywords: List[str]) -> int:
+        """Number of ``keywords`` found in ``text``"""
+        if self.keyword_index is not None:
+            return len(keywords) - len(self.keyword_index.missing(text, keywords))
+        text_lower = text.lower()
+        return sum(1 for keyword in keywords if keyword.lower() in text_lower)
+    
     def _calculate_semantic_similarity(self, resume_text: str, job_description: str) -> float:
         """Calculate semantic similarity using spaCy or TF-IDF fallback"""
         if self.nlp:
             try:
-                # Process texts with spaCy
-                resume_doc = self.nlp(resume_text[:1000000])  # Limit to 1M chars for spaCy
-                job_doc = self.nlp(job_description[:1000000])
+                # Process both texts in one batch, long texts in chunks
+                resume_docs, job_docs = pipe_texts(self.nlp, [resume_text, job_description])
                 
                 # Calculate similarity
-                similarity = resume_doc.similarity(job_doc)
+                similarity = self._cosine(self._docs_vector(resume_docs), self._docs_vector(job_docs))
                 
                 return similarity * 100
             except:
@@ -150,12 +265,32 @@ class ATSScorer:
         
         # Fallback to TF-IDF similarity
         try:
-            tfidf_matrix = self.vectorizer.fit_transform([resume_text, job_description])
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+            similarity = self._tfidf_similarity(resume_text, job_description)
             return similarity * 100
         except:
             return 50.0
     
+    def _docs_vector(self, docs: List):
+        """Average vector over the chunk docs of one text, weighted by chunk length"""
+        import numpy as np
+        
+        vectors = [doc.vector * len(doc) for doc in docs if len(doc) and doc.has_vector]
+        total_tokens = sum(len(doc) for doc in docs if len(doc) and doc.has_vector)
+        if not total_tokens:
+            return None
+        return np.sum(vectors, axis=0) / total_tokens
+    
+    def _cosine(self, vector_a, vector_b) -> float:
+        """Cosine similarity of two vectors, matching spaCy's Doc.similarity"""
+        import numpy as np
+        
+        if vector_a is None or vector_b is None:
+            return 0.0
+        norm = np.linalg.norm(vector_a) * np.linalg.norm(vector_b)
+        if not norm:
+            return 0.0
+        return float(np.dot(vector_a, vector_b) / norm)
+    
     def _get_rating(self, score: float) -> str:
         """Get rating based on score"""
         if score >= Config.EXCELLENT_SCORE:
@@ -0,0 +1,479 @@
+"""Offline batch scoring of many resumes against one or many job descriptions
+
+Runs the full deterministic pipeline (ResumeParser -> KeywordExtractor ->
+ATSScorer -> SuggestionsGenerator) in a process pool and streams one JSON
+line per (resume, job) pair as soon as each resume is done. Finished
+resumes are recorded in a checkpoint file so an interrupted run can be
+restarted without redoing them.
+
+With ``--dedupe`` every parsed resume is fingerprinted with MinHash and
+near-duplicates (resubmissions with small edits, template clones) are
+reported against the first resume of their cluster. ``--reuse-duplicate-scores``
+copies that representative's scores instead of scoring the copy again, and
+``--dedupe-index`` keeps the index on disk so later batches are checked against
+earlier ones.
+
+``--features`` keeps the unweighted score components of every pair in a
+columnar feature store, so feature_store.py can re-rank them under new
+weights without re-parsing.
+
+batch_queue.py runs the same pipeline as shards of a durable work queue, for
+batches spread over several machines.
+
+Usage:
+    python batch.py --resumes resumes/ --jd jobs/ --output results.jsonl
+    python batch.py --manifest resumes.jsonl --jd backend.txt --jd frontend.txt \\
+        --output results.jsonl --parquet results.parquet --workers 8
+    python batch.py --resumes resumes/ --jd jobs/ --output results.jsonl \\
+        --dedupe --reuse-duplicate-scores --dedupe-index resumes.minhash.npz
+    python batch.py --resumes resumes/ --jd jobs/ --output results.jsonl --features features.npz
+
+Resumes come from a directory of .pdf/.docx files or from a manifest with one
+path per line (or JSON lines with ``id`` and ``path``). Job descriptions are
+.txt files, directories of .txt files, or .jsonl files with ``id``, ``title``
+and ``description``.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional, Set
+from config import Config
+
+# Pipeline components of a worker process, set up by init_worker
+_worker = {}
+
+
+def load_resume_items(resumes_dir: str = None, manifest: str = None) -> Iterator[Dict]:
+    """Yield resumes to score as dicts with ``id`` and ``path``"""
+    if resumes_dir:
+        for root, _, names in os.walk(resumes_dir):
+            for name in sorted(names):
+                if name.lower().endswith(('.pdf', '.docx')):
+                    path = os.path.join(root, name)
+                    yield {'id': os.path.relpath(path, resumes_dir), 'path': path}
+
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                item = json.loads(line) if line.startswith('{') else {'path': line}
+                path = item['path'] if os.path.isabs(item['path']) else os.path.join(base_dir, item['path'])
+                yield {'id': str(item.get('id', item['path'])), 'path': path}
+
+
+def load_jobs(paths: List[str]) -> List[Dict]:
+    """Load job descriptions from .txt files, directories and .jsonl files"""
+    jobs = []
+
+    def add_text_file(path: str):
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            description = f.read().strip()
+        if description:
+            job_id = os.path.splitext(os.path.basename(path))[0]
+            jobs.append({'id': job_id, 'title': job_id, 'description': description})
+
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.txt'):
+                    add_text_file(os.path.join(path, name))
+        elif path.endswith('.jsonl'):
+            with open(path, encoding='utf-8') as f:
+                for index, line in enumerate(f):
+                    if line.strip():
+                        item = json.loads(line)
+                        jobs.append({
+                            'id': str(item.get('id', index)),
+                            'title': item.get('title', ''),
+                            'description': item['description']
+                        })
+        else:
+            add_text_file(path)
+
+    return jobs
+
+
+def init_worker(jobs: List[Dict], dedupe: bool = False, keyword_mode: str = None):
+    """Build pipeline components and job keywords once per worker process"""
+    from resume_parser import ResumeParser
+    from keyword_extractor import KeywordExtractor
+    from ats_scorer import ATSScorer
+    from suggestions_generator import SuggestionsGenerator
+
+    keyword_extractor = KeywordExtractor()
+    _worker.update({
+        'jobs': jobs,
+        'resume_parser': ResumeParser(),
+        'keyword_extractor': keyword_extractor,
+        'ats_scorer': ATSScorer(keyword_extractor.skill_index),
+        'suggestions_generator': SuggestionsGenerator(),
+        'job_keywords': keyword_extractor.extract_keywords_batch(
+            [job['description'] for job in jobs],
+            keyword_mode or Config.BATCH_KEYWORD_EXTRACTION_MODE
+        )
+    })
+    if dedupe:
+        from near_duplicates import MinHasher
+        _worker['minhasher'] = MinHasher()
+
+
+def score_resume(item: Dict) -> List[Dict]:
+    """Score one resume against every job, returning one record per job"""
+    started = time.perf_counter()
+    try:
+        resume_data = _worker['resume_parser'].parse_resume(item['path'])
+    except Exception as e:
+        return [{'resume_id': item['id'], 'job_id': job['id'], 'error': str(e)} for job in _worker['jobs']]
+    return score_parsed(item, resume_data, started)
+
+
+def fingerprint_resume(item: Dict) -> Dict:
+    """Parse one resume and compute its MinHash signature for deduplication"""
+    started = time.perf_counter()
+    try:
+        resume_data = _worker['resume_parser'].parse_resume(item['path'])
+    except Exception as e:
+        return {'error': str(e)}
+    return {
+        'resume_data': resume_data,
+        'signature': _worker['minhasher'].signature(resume_data['raw_text']),
+        'parse_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def score_parsed(item: Dict, resume_data: Dict, started: float = None) -> List[Dict]:
+    """Score an already parsed resume against every job"""
+    started = started or time.perf_counter()
+    records = []
+    for job, job_keywords in zip(_worker['jobs'], _worker['job_keywords']):
+        try:
+            records.append(score_pair(item, resume_data, job, job_keywords))
+        except Exception as e:
+            records.append({'resume_id': item['id'], 'job_id': job['id'], 'error': str(e)})
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    for record in records:
+        record['resume_ms'] = elapsed_ms
+    return records
+
+
+def score_pair(item: Dict, resume_data: Dict, job: Dict, job_keywords: Dict) -> Dict:
+    """Run keyword matching, scoring and suggestions for one resume and job"""
+    keyword_extractor = _worker['keyword_extractor']
+
+    missing_keywords = keyword_extractor.find_missing_keywords(resume_data['raw_text'], job_keywords)
+    components = _worker['ats_scorer'].calculate_components(resume_data, job['description'], job_keywords)
+    score_data = _worker['ats_scorer'].score_from_components(components)
+    keyword_density = keyword_extractor.calculate_keyword_density(
+        resume_data['raw_text'],
+        job_keywords['all_keywords']
+    )
+    suggestions = _worker['suggestions_generator'].generate_suggestions(
+        missing_keywords,
+        score_data,
+        resume_data['sections']
+    )
+
+    return {
+        'resume_id': item['id'],
+        'resume_path': item['path'],
+        'job_id': job['id'],
+        'job_title': job['title'],
+        'score': score_data,
+        'features': components,
+        'missing_keywords': missing_keywords,
+        'keyword_density': round(keyword_density, 2),
+        'suggestions': suggestions,
+        'contact_info': resume_data['contact_info'],
+        'word_count': resume_data['total_words']
+    }
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    """Resume ids already finished by an earlier run"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+class ParquetSink:
+    """Writes flattened result records to Parquet in row groups"""
+
+    COLUMNS = ['resume_id', 'job_id', 'job_title', 'overall_score', 'rating', 'skills_match',
+               'experience_match', 'education_match', 'keyword_density', 'semantic_similarity',
+               'missing_keywords', 'error']
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("Parquet output needs pyarrow: pip install pyarrow")
+
+        if os.path.exists(path):
+            # Parquet files can't be appended to, so a resumed run writes a new part
+            stem, ext = os.path.splitext(path)
+            path = f"{stem}.{int(time.time())}{ext}"
+            print(f"Parquet output exists, writing this run to {path}")
+
+        self.path = path
+        self.row_group_size = row_group_size
+        self._rows = []
+        self._writer = None
+
+    def write(self, record: Dict):
+        score = record.get('score', {})
+        categories = score.get('category_scores', {})
+        self._rows.append({
+            'resume_id': record['resume_id'],
+            'job_id': record['job_id'],
+            'job_title': record.get('job_title'),
+            'overall_score': score.get('overall_score'),
+            'rating': score.get('rating'),
+            'skills_match': categories.get('skills_match'),
+            'experience_match': categories.get('experience_match'),
+            'education_match': categories.get('education_match'),
+            'keyword_density': record.get('keyword_density'),
+            'semantic_similarity': score.get('semantic_similarity'),
+            'missing_keywords': json.dumps(record.get('missing_keywords', {})),
+            'error': record.get('error')
+        })
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(self._rows, schema=self._schema())
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    def _schema(self):
+        import pyarrow as pa
+
+        types = {'overall_score': pa.float64(), 'skills_match': pa.float64(),
+                 'experience_match': pa.float64(), 'education_match': pa.float64(),
+                 'keyword_density': pa.float64(), 'semantic_similarity': pa.float64()}
+        return pa.schema([(name, types.get(name, pa.string())) for name in self.COLUMNS])
+
+
+def reuse_records(item: Dict, resume_data: Dict, representative_records: List[Dict],
+                  elapsed_ms: float) -> List[Dict]:
+    """Copy a cluster representative's results for a near-duplicate resume"""
+    records = []
+    for record in representative_records:
+        record = dict(record)
+        record.update({
+            'resume_id': item['id'],
+            'resume_path': item['path'],
+            'contact_info': resume_data['contact_info'],
+            'word_count': resume_data['total_words'],
+            'resume_ms': elapsed_ms,
+            'scores_reused': True
+        })
+        records.append(record)
+    return records
+
+
+def run_batch(items: Iterator[Dict], jobs: List[Dict], output: str, checkpoint: str,
+              workers: int, parquet: str = None, dedupe: bool = False,
+              reuse_scores: bool = False, dedupe_index: Optional[str] = None,
+              keyword_mode: str = None, features: Optional[str] = None) -> Dict:
+    """Score resumes in a process pool, streaming results as they finish
+
+    With ``features`` the raw score components of every pair are added to
+    the feature store at that path, for re-weighting with feature_store.py.
+    """
+    done = read_checkpoint(checkpoint)
+    stats = {'resumes': 0, 'records': 0, 'errors': 0, 'skipped': 0}
+    parquet_sink = ParquetSink(parquet) if parquet else None
+    feature_store = None
+    if features:
+        from feature_store import FeatureStore
+        feature_store = FeatureStore.load(features) if os.path.exists(features) else FeatureStore()
+    index = None
+    if dedupe:
+        from near_duplicates import NearDuplicateIndex
+        if dedupe_index and os.path.exists(dedupe_index):
+            index = NearDuplicateIndex.load(dedupe_index)
+        else:
+            index = NearDuplicateIndex()
+        stats.update({'duplicates': 0, 'scores_reused': 0})
+    started = time.perf_counter()
+
+    try:
+        with open(output, 'a', encoding='utf-8') as out, \
+                open(checkpoint, 'a', encoding='utf-8') as checkpoint_file, \
+                ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                    initargs=(jobs, dedupe, keyword_mode)) as pool:
+
+            # Future -> (task, resume item, annotations for its records)
+            pending = {}
+            # Representatives being scored, their finished records, and the
+            # duplicates waiting to reuse them
+            scoring = set()
+            representative_records = {}
+            waiting = {}
+
+            def finish(item: Dict, records: List[Dict], annotations: Dict):
+                for record in records:
+                    record.update(annotations)
+                    out.write(json.dumps(record) + '\n')
+                    if parquet_sink:
+                        parquet_sink.write(record)
+                    if feature_store is not None and 'features' in record:
+                        feature_store.add(record['resume_id'], record['job_id'], record['features'])
+                    stats['records'] += 1
+                    stats['errors'] += 'error' in record
+                out.flush()
+                # Only mark a resume done once all of its records are written
+                checkpoint_file.write(item['id'] + '\n')
+                checkpoint_file.flush()
+                stats['resumes'] += 1
+
+                if reuse_scores and item['id'] in scoring:
+                    scoring.discard(item['id'])
+                    representative_records[item['id']] = records
+                    for duplicate, resume_data, elapsed_ms, duplicate_annotations in waiting.pop(item['id'], []):
+                        stats['scores_reused'] += 1
+                        finish(duplicate, reuse_records(duplicate, resume_data, records, elapsed_ms),
+                               duplicate_annotations)
+
+            def deduplicate(item: Dict, result: Dict):
+                if 'error' in result:
+                    finish(item, [{'resume_id': item['id'], 'job_id': job['id'], 'error': result['error']}
+                                  for job in jobs], {})
+                    return
+
+                resume_data = result['resume_data']
+                representative, similarity = index.add(item['id'], result['signature'])
+                annotations = {}
+                if representative is None:
+                    scoring.add(item['id'])
+                else:
+                    stats['duplicates'] += 1
+                    annotations = {'duplicate_of': representative,
+                                   'duplicate_similarity': round(similarity, 3)}
+                    if reuse_scores and representative in representative_records:
+                        stats['scores_reused'] += 1
+                        finish(item, reuse_records(item, resume_data, representative_records[representative],
+                                                   result['parse_ms']), annotations)
+                        return
+                    if reuse_scores and representative in scoring:
+                        waiting.setdefault(representative, []).append(
+                            (item, resume_data, result['parse_ms'], annotations))
+                        return
+                    # Representative from an earlier run, or reuse disabled
+                pending[pool.submit(score_parsed, item, resume_data)] = ('score', item, annotations)
+
+            def collect(futures):
+                for future in futures:
+                    task, item, annotations = pending.pop(future)
+                    if task == 'fingerprint':
+                        deduplicate(item, future.result())
+                    else:
+                        finish(item, future.result(), annotations)
+
+            for item in items:
+                if item['id'] in done:
+                    stats['skipped'] += 1
+                    continue
+                # Keep a bounded number of resumes in flight
+                while len(pending) >= workers * 4:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                if index is None:
+                    pending[pool.submit(score_resume, item)] = ('score', item, {})
+                else:
+                    pending[pool.submit(fingerprint_resume, item)] = ('fingerprint', item, {})
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+    finally:
+        if parquet_sink:
+            parquet_sink.close()
+        if index is not None and dedupe_index:
+            index.save(dedupe_index)
+        if feature_store is not None:
+            feature_store.save(features)
+            stats['stored_features'] = len(feature_store)
+
+    if index is not None:
+        groups = index.clusters()
+        with open(f"{output}.duplicates.json", 'w', encoding='utf-8') as f:
+            json.dump(groups, f, indent=2)
+        stats['indexed_resumes'] = len(index)
+        stats['duplicate_groups'] = len(groups)
+
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 2)
+    stats['resumes_per_second'] = round(stats['resumes'] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch-score resumes against job descriptions')
+    parser.add_argument('--resumes', help='Directory of .pdf/.docx resumes')
+    parser.add_argument('--manifest', help='File listing resume paths, or JSON lines with id and path')
+    parser.add_argument('--jd', action='append', required=True,
+                        help='Job description .txt file, directory or .jsonl file (repeatable)')
+    parser.add_argument('--output', required=True, help='JSONL output file, appended to')
+    parser.add_argument('--parquet', help='Also write flattened results to this Parquet file')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--workers', type=int, default=Config.BATCH_WORKERS or os.cpu_count(),
+                        help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Detect near-duplicate resumes and report duplicate groups')
+    parser.add_argument('--reuse-duplicate-scores', action='store_true',
+                        help="Copy the cluster representative's scores to near-duplicates (implies --dedupe)")
+    parser.add_argument('--dedupe-index',
+                        help='MinHash index file to load and save, to detect duplicates across batches')
+    parser.add_argument('--keyword-mode', choices=Config.KEYWORD_EXTRACTION_MODES,
+                        default=Config.BATCH_KEYWORD_EXTRACTION_MODE,
+                        help='Keyword extraction engine for job descriptions (default: %(default)s)')
+    parser.add_argument('--features',
+                        help='Feature store (.npz or .parquet) to add raw score components to, for re-weighting')
+    args = parser.parse_args()
+
+    if not args.resumes and not args.manifest:
+        parser.error('one of --resumes or --manifest is required')
+
+    jobs = load_jobs(args.jd)
+    if not jobs:
+        parser.error('no job descriptions found')
+
+    stats = run_batch(
+        load_resume_items(args.resumes, args.manifest),
+        jobs,
+        args.output,
+        args.checkpoint or f"{args.output}.checkpoint",
+        args.workers,
+        args.parquet,
+        dedupe=args.dedupe or args.reuse_duplicate_scores or bool(args.dedupe_index),
+        reuse_scores=args.reuse_duplicate_scores,
+        dedupe_index=args.dedupe_index,
+        keyword_mode=args.keyword_mode,
+        features=args.features
+    )
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,571 @@
+"""Sharded batch scoring across machines through a durable work queue
+
+A coordinator splits the (resume, job) work of a batch into shards of
+``--shard-size`` resumes, each scored against every job, in a SQLite queue
+file. Workers on any number of nodes lease one shard at a time, score it
+with the same pipeline as batch.py (ResumeParser -> KeywordExtractor ->
+ATSScorer -> SuggestionsGenerator) and write its records back. A worker
+renews its lease after every resume. If it dies or hangs, the lease runs
+out after ``BATCH_LEASE_SECONDS`` and another worker takes the shard over.
+After ``BATCH_MAX_ATTEMPTS`` leases the shard's resumes get error records.
+Records are keyed by resume and job, so a shard finished twice (by a slow
+worker and its replacement) is stored once.
+
+Workers on the coordinator's machine can open the queue file directly.
+Other nodes reach it through ``serve``, a small HTTP front for the same
+queue; don't share the SQLite file over a network file system. Resume paths
+must resolve on every worker node, e.g. on a shared mount.
+Near-duplicate detection (batch.py --dedupe) needs one index over the whole
+batch and isn't available here.
+
+Usage:
+    # Coordinator: queue the batch and serve it to other nodes
+    python batch_queue.py submit --queue batch.db --manifest resumes.jsonl --jd jobs/ --shard-size 20
+    python batch_queue.py serve --queue batch.db --host 0.0.0.0 --port 8765
+
+    # Workers, any number per node and any number of nodes
+    python batch_queue.py worker --queue http://coordinator:8765 --processes 8
+    python batch_queue.py worker --queue batch.db --processes 4
+
+    # Progress, then the results in batch.py's output formats
+    python batch_queue.py status --queue batch.db
+    python batch_queue.py export --queue batch.db --output results.jsonl --parquet results.parquet \\
+        --features features.npz
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Optional
+from config import Config
+from batch import ParquetSink, init_worker, load_jobs, load_resume_items, score_resume
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    items TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    first_leased_at REAL,
+    finished_at REAL,
+    completed_by TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS shards_by_status ON shards(status, id);
+CREATE TABLE IF NOT EXISTS results (
+    resume_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    shard_id INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (resume_id, job_id)
+);
+"""
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class WorkQueue:
+    """Shards of a batch with leases, and their result records, in one SQLite file
+
+    Safe to share between threads and processes: each thread uses its own
+    connection, and every state change is one ``BEGIN IMMEDIATE``
+    transaction, so two workers can't lease the same shard.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Drop the parent's connections, SQLite connections can't cross a fork"""
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Transactions are begun explicitly, see _transaction
+            db = sqlite3.connect(self.path, timeout=Config.BATCH_QUEUE_BUSY_TIMEOUT, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction holding the database's write lock from the start"""
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def submit(self, items: Iterable[Dict], jobs: List[Dict], keyword_mode: str,
+               shard_size: int = None) -> int:
+        """Queue a batch and return its number of shards; raises ``ValueError`` if one is queued already"""
+        shard_size = shard_size or Config.BATCH_SHARD_SIZE
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM batch WHERE key = 'jobs'").fetchone():
+                raise ValueError(f'{self.path} already holds a batch, use a new queue file')
+            db.executemany('INSERT INTO batch (key, value) VALUES (?, ?)', [
+                ('jobs', json.dumps(jobs)),
+                ('keyword_mode', json.dumps(keyword_mode)),
+                ('submitted_at', json.dumps(time.time()))
+            ])
+            shards = 0
+            shard = []
+            for item in items:
+                shard.append(item)
+                if len(shard) == shard_size:
+                    db.execute('INSERT INTO shards (items, size) VALUES (?, ?)', (json.dumps(shard), len(shard)))
+                    shards, shard = shards + 1, []
+            if shard:
+                db.execute('INSERT INTO shards (items, size) VALUES (?, ?)', (json.dumps(shard), len(shard)))
+                shards += 1
+        return shards
+
+    def batch(self) -> Optional[Dict]:
+        """Jobs and keyword mode of the queued batch, None before ``submit``"""
+        rows = dict(self._connect().execute('SELECT key, value FROM batch').fetchall())
+        if 'jobs' not in rows:
+            return None
+        return {'jobs': json.loads(rows['jobs']), 'keyword_mode': json.loads(rows['keyword_mode'])}
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        """Lease the next pending shard, or one whose lease expired, to ``worker``
+
+        Returns the shard's id, lease token, attempt and items, or None when
+        no shard is available right now. An expired shard that has used up
+        its attempts is failed instead.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    'SELECT id, items, attempts FROM shards WHERE status = ? ORDER BY id LIMIT 1', (PENDING,)
+                ).fetchone() or db.execute(
+                    'SELECT id, items, attempts FROM shards WHERE status = ? AND lease_expires < ? '
+                    'ORDER BY lease_expires LIMIT 1', (LEASED, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= Config.BATCH_MAX_ATTEMPTS:
+                    self._give_up(db, row['id'], f"Lease expired {row['attempts']} times")
+                    continue
+                token = uuid.uuid4().hex
+                db.execute(
+                    'UPDATE shards SET status = ?, attempts = attempts + 1, lease_token = ?, lease_owner = ?, '
+                    'lease_expires = ?, first_leased_at = COALESCE(first_leased_at, ?) WHERE id = ?',
+                    (LEASED, token, worker, now + Config.BATCH_LEASE_SECONDS, now, row['id'])
+                )
+                return {'shard_id': row['id'], 'token': token, 'attempt': row['attempts'] + 1,
+                        'items': json.loads(row['items'])}
+
+    def renew(self, shard_id: int, token: str) -> bool:
+        """Extend a lease, False once it was lost to another worker"""
+        with self._transaction() as db:
+            updated = db.execute(
+                'UPDATE shards SET lease_expires = ? WHERE id = ? AND status = ? AND lease_token = ?',
+                (time.time() + Config.BATCH_LEASE_SECONDS, shard_id, LEASED, token)
+            ).rowcount
+        return bool(updated)
+
+    def complete(self, shard_id: int, token: str, worker: str, records: List[Dict]) -> bool:
+        """Store a shard's records and mark it done, returning False if it already was
+
+        Records replace any stored for the same resume and job, so this is
+        idempotent. Late results are accepted even after the lease was lost
+        or the shard failed, since they are as valid as a retry's.
+        """
+        with self._transaction() as db:
+            row = db.execute('SELECT status FROM shards WHERE id = ?', (shard_id,)).fetchone()
+            if row is None:
+                raise ValueError(f'No shard {shard_id}')
+            db.executemany(
+                'INSERT OR REPLACE INTO results (resume_id, job_id, shard_id, record) VALUES (?, ?, ?, ?)',
+                [(record['resume_id'], record['job_id'], shard_id, json.dumps(record)) for record in records]
+            )
+            if row['status'] == DONE:
+                return False
+            db.execute(
+                'UPDATE shards SET status = ?, lease_token = NULL, lease_expires = NULL, finished_at = ?, '
+                'completed_by = ? WHERE id = ?',
+                (DONE, time.time(), worker, shard_id)
+            )
+        return True
+
+    def release(self, shard_id: int, token: str, error: str) -> bool:
+        """Give a leased shard back after a worker error, failing it once it used up its attempts"""
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT attempts FROM shards WHERE id = ? AND status = ? AND lease_token = ?',
+                (shard_id, LEASED, token)
+            ).fetchone()
+            if row is None:
+                return False
+            if row['attempts'] >= Config.BATCH_MAX_ATTEMPTS:
+                self._give_up(db, shard_id, error)
+            else:
+                db.execute(
+                    'UPDATE shards SET status = ?, lease_token = NULL, lease_expires = NULL, last_error = ? '
+                    'WHERE id = ?', (PENDING, error, shard_id)
+                )
+        return True
+
+    def remaining(self) -> int:
+        """Shards not finished yet, pending or leased"""
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM shards WHERE status IN (?, ?)', (PENDING, LEASED)
+        ).fetchone()[0]
+
+    def status(self) -> Dict:
+        """Shard and resume counts by state, throughput and shards finished per worker"""
+        db = self._connect()
+        shards = {status: 0 for status in (PENDING, LEASED, DONE, FAILED)}
+        resumes = dict(shards)
+        for row in db.execute('SELECT status, COUNT(*) AS shards, SUM(size) AS resumes FROM shards GROUP BY status'):
+            shards[row['status']] = row['shards']
+            resumes[row['status']] = row['resumes']
+        summary = db.execute(
+            'SELECT MIN(first_leased_at) AS started, MAX(finished_at) AS finished, '
+            'SUM(attempts > 1) AS retried FROM shards'
+        ).fetchone()
+        workers = {row['completed_by']: row['shards'] for row in db.execute(
+            'SELECT completed_by, COUNT(*) AS shards FROM shards WHERE status = ? GROUP BY completed_by', (DONE,)
+        )}
+        errors = db.execute("SELECT COUNT(*) FROM results WHERE json_extract(record, '$.error') IS NOT NULL")
+
+        elapsed = (summary['finished'] - summary['started']) if summary['finished'] and summary['started'] else 0.0
+        return {
+            'shards': shards,
+            'resumes': resumes,
+            'records': db.execute('SELECT COUNT(*) FROM results').fetchone()[0],
+            'errors': errors.fetchone()[0],
+            'retried_shards': summary['retried'] or 0,
+            'finished': shards[PENDING] == 0 and shards[LEASED] == 0,
+            'seconds': round(elapsed, 2),
+            'resumes_per_second': round(resumes[DONE] / elapsed, 2) if elapsed else 0.0,
+            'workers': workers
+        }
+
+    def records(self) -> Iterator[Dict]:
+        """Stored records ordered by resume and job"""
+        for row in self._connect().execute('SELECT record FROM results ORDER BY resume_id, job_id'):
+            yield json.loads(row['record'])
+
+    def _give_up(self, db: sqlite3.Connection, shard_id: int, error: str):
+        """Fail a shard, with an error record per resume and job like batch.py writes for unreadable resumes"""
+        items = json.loads(db.execute('SELECT items FROM shards WHERE id = ?', (shard_id,)).fetchone()['items'])
+        jobs = json.loads(db.execute("SELECT value FROM batch WHERE key = 'jobs'").fetchone()['value'])
+        db.executemany(
+            'INSERT OR IGNORE INTO results (resume_id, job_id, shard_id, record) VALUES (?, ?, ?, ?)',
+            [(item['id'], job['id'], shard_id,
+              json.dumps({'resume_id': item['id'], 'job_id': job['id'], 'error': error}))
+             for item in items for job in jobs]
+        )
+        db.execute(
+            'UPDATE shards SET status = ?, lease_token = NULL, lease_expires = NULL, finished_at = ?, '
+            'last_error = ? WHERE id = ?', (FAILED, time.time(), error, shard_id)
+        )
+
+
+class HttpQueue:
+    """Client for a queue behind ``serve``, with the worker-facing methods of ``WorkQueue``
+
+    Calls are retried on connection errors. Retrying is safe: a repeated
+    lease only costs an extra lease that expires, and ``complete`` is
+    idempotent.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+
+    def batch(self) -> Optional[Dict]:
+        return self._call('GET', '/batch')['batch']
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        return self._call('POST', '/lease', {'worker': worker})['shard']
+
+    def renew(self, shard_id: int, token: str) -> bool:
+        return self._call('POST', '/renew', {'shard_id': shard_id, 'token': token})['ok']
+
+    def complete(self, shard_id: int, token: str, worker: str, records: List[Dict]) -> bool:
+        body = {'shard_id': shard_id, 'token': token, 'worker': worker, 'records': records}
+        return self._call('POST', '/complete', body)['ok']
+
+    def release(self, shard_id: int, token: str, error: str) -> bool:
+        return self._call('POST', '/release', {'shard_id': shard_id, 'token': token, 'error': error})['ok']
+
+    def remaining(self) -> int:
+        return self._call('GET', '/remaining')['remaining']
+
+    def status(self) -> Dict:
+        return self._call('GET', '/status')
+
+    def _call(self, method: str, path: str, body: Dict = None) -> Dict:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        for attempt in range(1, Config.BATCH_QUEUE_HTTP_RETRIES + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=Config.BATCH_QUEUE_HTTP_TIMEOUT) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                raise RuntimeError(f"Coordinator answered {e.code}: {e.read().decode('utf-8', 'replace')}")
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                if attempt == Config.BATCH_QUEUE_HTTP_RETRIES:
+                    raise
+                time.sleep(attempt)
+
+
+def open_queue(spec: str):
+    """``HttpQueue`` for an http(s) URL, otherwise the ``WorkQueue`` file at that path"""
+    if spec.startswith(('http://', 'https://')):
+        return HttpQueue(spec)
+    return WorkQueue(spec)
+
+
+def make_handler(queue: WorkQueue):
+    """Request handler class serving ``queue`` to ``HttpQueue`` clients"""
+
+    class QueueHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/batch':
+                self._send_json({'batch': queue.batch()})
+            elif self.path == '/remaining':
+                self._send_json({'remaining': queue.remaining()})
+            elif self.path == '/status':
+                self._send_json(queue.status())
+            else:
+                self._send_json({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path == '/lease':
+                    self._send_json({'shard': queue.lease(body['worker'])})
+                elif self.path == '/renew':
+                    self._send_json({'ok': queue.renew(body['shard_id'], body['token'])})
+                elif self.path == '/complete':
+                    ok = queue.complete(body['shard_id'], body['token'], body['worker'], body['records'])
+                    self._send_json({'ok': ok})
+                elif self.path == '/release':
+                    self._send_json({'ok': queue.release(body['shard_id'], body['token'], body['error'])})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+            except (KeyError, ValueError) as e:
+                self._send_json({'error': f'Bad request: {e}'}, 400)
+
+        def _send_json(self, payload: Dict, status: int = 200):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return QueueHandler
+
+
+class QueueServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_queue_server(queue: WorkQueue, host: str = '127.0.0.1', port: int = 0) -> QueueServer:
+    """Serve ``queue`` from a daemon thread; ``port=0`` picks a free port"""
+    server = QueueServer((host, port), make_handler(queue))
+    threading.Thread(target=server.serve_forever, name='batch-queue', daemon=True).start()
+    return server
+
+
+def run_worker(queue_spec: str, worker: str = None) -> Dict:
+    """Lease and score shards until none are left pending or leased by other workers
+
+    Waits for leased shards rather than exiting while another worker may
+    still die, so the last worker standing finishes its shards.
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    queue = open_queue(queue_spec)
+    batch = queue.batch()
+    if batch is None:
+        raise ValueError(f'No batch queued in {queue_spec}')
+    init_worker(batch['jobs'], keyword_mode=batch['keyword_mode'])
+    stats = {'worker': worker, 'shards': 0, 'resumes': 0, 'records': 0, 'lost_leases': 0}
+
+    while True:
+        shard = queue.lease(worker)
+        if shard is None:
+            if not queue.remaining():
+                return stats
+            time.sleep(Config.BATCH_QUEUE_POLL_INTERVAL)
+            continue
+
+        records = []
+        lost = False
+        try:
+            for item in shard['items']:
+                records.extend(score_resume(item))
+                # Once another worker has taken the shard over after the lease ran
+                # out, finish it anyway: complete() keeps late results, and only a
+                # whole shard may mark it done
+                if not lost and not queue.renew(shard['shard_id'], shard['token']):
+                    lost = True
+        except BaseException as e:
+            # Hand the shard back at once instead of leaving it to expire
+            queue.release(shard['shard_id'], shard['token'], f'{type(e).__name__}: {e}')
+            raise
+        if lost:
+            stats['lost_leases'] += 1
+
+        if queue.complete(shard['shard_id'], shard['token'], worker, records):
+            stats['shards'] += 1
+        stats['resumes'] += len(shard['items'])
+        stats['records'] += len(records)
+
+
+def run_workers(queue_spec: str, processes: int) -> List[Dict]:
+    """Run ``processes`` workers on this node and return their stats"""
+    if processes == 1:
+        return [run_worker(queue_spec)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(run_worker, queue_spec) for _ in range(processes)]
+        return [future.result() for future in futures]
+
+
+def export_results(queue: WorkQueue, output: str, parquet: str = None, features: str = None) -> Dict:
+    """Write the stored records as JSON lines, and optionally Parquet and a feature store"""
+    parquet_sink = ParquetSink(parquet) if parquet else None
+    feature_store = None
+    if features:
+        from feature_store import FeatureStore
+        feature_store = FeatureStore.load(features) if os.path.exists(features) else FeatureStore()
+
+    stats = {'records': 0, 'errors': 0}
+    try:
+        with open(output, 'w', encoding='utf-8') as out:
+            for record in queue.records():
+                out.write(json.dumps(record) + '\n')
+                if parquet_sink:
+                    parquet_sink.write(record)
+                if feature_store is not None and 'features' in record:
+                    feature_store.add(record['resume_id'], record['job_id'], record['features'])
+                stats['records'] += 1
+                stats['errors'] += 'error' in record
+    finally:
+        if parquet_sink:
+            parquet_sink.close()
+        if feature_store is not None:
+            feature_store.save(features)
+            stats['stored_features'] = len(feature_store)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded batch scoring through a durable work queue')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='Queue a batch of resumes and job descriptions')
+    submit.add_argument('--queue', required=True, help='Queue file to create')
+    submit.add_argument('--resumes', help='Directory of .pdf/.docx resumes')
+    submit.add_argument('--manifest', help='File listing resume paths, or JSON lines with id and path')
+    submit.add_argument('--jd', action='append', required=True,
+                        help='Job description .txt file, directory or .jsonl file (repeatable)')
+    submit.add_argument('--shard-size', type=int, default=Config.BATCH_SHARD_SIZE,
+                        help='Resumes per shard (default: %(default)s)')
+    submit.add_argument('--keyword-mode', choices=Config.KEYWORD_EXTRACTION_MODES,
+                        default=Config.BATCH_KEYWORD_EXTRACTION_MODE,
+                        help='Keyword extraction engine for job descriptions (default: %(default)s)')
+
+    serve = commands.add_parser('serve', help='Serve a queue file to workers on other nodes over HTTP')
+    serve.add_argument('--queue', required=True, help='Queue file')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+
+    worker = commands.add_parser('worker', help='Score shards until the batch is finished')
+    worker.add_argument('--queue', required=True, help='Queue file, or URL of a queue served with serve')
+    worker.add_argument('--processes', type=int, default=Config.BATCH_WORKERS or os.cpu_count(),
+                        help='Worker processes on this node (default: number of CPUs)')
+
+    status = commands.add_parser('status', help='Show the progress of a batch')
+    status.add_argument('--queue', required=True, help='Queue file, or URL of a queue served with serve')
+
+    export = commands.add_parser('export', help='Write the results of a batch')
+    export.add_argument('--queue', required=True, help='Queue file')
+    export.add_argument('--output', required=True, help='JSONL output file, overwritten')
+    export.add_argument('--parquet', help='Also write flattened results to this Parquet file')
+    export.add_argument('--features',
+                        help='Feature store (.npz or .parquet) to add raw score components to, for re-weighting')
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        if not args.resumes and not args.manifest:
+            parser.error('one of --resumes or --manifest is required')
+        jobs = load_jobs(args.jd)
+        if not jobs:
+            parser.error('no job descriptions found')
+        # Workers on other nodes need paths that don't depend on this directory
+        items = ({'id': item['id'], 'path': os.path.abspath(item['path'])}
+                 for item in load_resume_items(args.resumes, args.manifest))
+        try:
+            shards = WorkQueue(args.queue).submit(items, jobs, args.keyword_mode, args.shard_size)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(json.dumps({'shards': shards, 'jobs': len(jobs)}), file=sys.stderr)
+    elif args.command == 'serve':
+        server = QueueServer((args.host, args.port), make_handler(WorkQueue(args.queue)))
+        print(f"Serving {args.queue} on http://{args.host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'worker':
+        print(json.dumps(run_workers(args.queue, args.processes)), file=sys.stderr)
+    elif args.command == 'status':
+        print(json.dumps(open_queue(args.queue).status(), indent=2))
+    else:
+        queue = WorkQueue(args.queue)
+        stats = export_results(queue, args.output, args.parquet, args.features)
+        stats['finished'] = queue.status()['finished']
+        print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+"""Benchmarks for the analysis pipeline
+
+The benchmark corpus is a directory with two subdirectories:
+
+    corpus/
+        resumes/   resumes as .pdf, .docx or .txt
+        jds/       job descriptions as .txt
+
+Usage:
+    python benchmark.py spacy --corpus corpus/
+    python benchmark.py startup
+    python benchmark.py workers --url http://localhost:5000
+    python benchmark.py docx --corpus corpus/
+    python benchmark.py concurrency --corpus corpus/ --threads 16
+    python benchmark.py ttft --corpus corpus/ --mock
+    python benchmark.py pipeline --corpus corpus/
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Callable, Dict, List
+from config import Config
+
+
+def load_corpus(corpus_dir: str) -> Dict[str, List[str]]:
+    """Load resume and job description texts from the benchmark corpus"""
+    from resume_parser import ResumeParser
+
+    parser = ResumeParser()
+    corpus = {'resumes': [], 'jds': []}
+
+    for kind in corpus:
+        folder = os.path.join(corpus_dir, kind)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if name.endswith('.txt'):
+                with open(path, encoding='utf-8', errors='ignore') as f:
+                    corpus[kind].append(f.read())
+            elif kind == 'resumes' and name.endswith(('.pdf', '.docx')):
+                corpus[kind].append(parser.parse_resume(path)['raw_text'])
+
+    if not corpus['resumes'] or not corpus['jds']:
+        sys.exit(f"Benchmark corpus needs resumes/ and jds/ under {corpus_dir}")
+
+    return corpus
+
+
+def time_it(func: Callable, repeat: int) -> float:
+    """Best wall time of ``repeat`` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def bench_spacy(args):
+    """Compare the full spaCy pipeline with the trimmed per-consumer profiles"""
+    import spacy
+    from nlp_pipelines import load_pipeline, pipe_texts
+
+    corpus = load_corpus(args.corpus)
+    jds = [jd.lower() for jd in corpus['jds']]
+    pairs = [(resume, jd) for resume in corpus['resumes'] for jd in corpus['jds']]
+
+    full = spacy.load(Config.SPACY_MODEL)
+    keywords_nlp = load_pipeline('keywords')
+    similarity_nlp = load_pipeline('similarity')
+
+    def full_keywords():
+        for jd in jds:
+            doc = full(jd)
+            list(doc.noun_chunks), list(doc.ents)
+
+    def trimmed_keywords():
+        for docs in pipe_texts(keywords_nlp, jds):
+            for doc in docs:
+                list(doc.noun_chunks), list(doc.ents)
+
+    def full_similarity():
+        for resume, jd in pairs:
+            full(resume[:1000000]).similarity(full(jd[:1000000]))
+
+    def trimmed_similarity():
+        texts = [text for pair in pairs for text in pair]
+        pipe_texts(similarity_nlp, texts)
+
+    print(f"Corpus: {len(corpus['resumes'])} resumes, {len(corpus['jds'])} job descriptions")
+    print(f"Full pipeline components: {', '.join(full.pipe_names)}")
+    for name, before, after in [
+        ('keyword extraction', full_keywords, trimmed_keywords),
+        ('semantic similarity', full_similarity, trimmed_similarity),
+    ]:
+        before_ms = time_it(before, args.repeat)
+        after_ms = time_it(after, args.repeat)
+        print(f"{name:<22} full: {before_ms:9.1f} ms  trimmed: {after_ms:9.1f} ms  "
+              f"speedup: {before_ms / after_ms if after_ms else 0:.2f}x")
+
+
+def bench_startup(args):
+    """Measure cold start of the API in fresh interpreter processes"""
+    script = (
+        "import json, time; started = time.perf_counter(); import app; "
+        "imported = time.perf_counter(); app.warm_up(); "
+        "print(json.dumps({'import': imported - started, 'warm_up': app.warmup_state['warmup_seconds'], "
+        "'total': time.perf_counter() - started, 'status': app.warmup_state['status']}))"
+    )
+
+    runs = []
+    for _ in range(args.repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    for key in ('import', 'warm_up', 'total'):
+        values = sorted(run[key] for run in runs)
+        print(f"{key:<8} min: {values[0] * 1000:8.1f} ms  median: {values[len(values) // 2] * 1000:8.1f} ms")
+    print(f"warm-up status: {runs[-1]['status']}")
+
+
+def bench_workers(args):
+    """Collect per-worker memory and boot time from a running server's /api/metrics"""
+    from urllib.request import urlopen
+
+    workers = {}
+    for _ in range(args.samples):
+        with urlopen(f"{args.url.rstrip('/')}/api/metrics", timeout=10) as response:
+            process = json.loads(response.read())['process']
+        workers[process['pid']] = process
+
+    print(f"{'pid':>8} {'boot s':>8} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10} {'private MB':>11} {'requests':>9}")
+    for pid, process in sorted(workers.items()):
+        print(f"{pid:>8} {str(process.get('boot_seconds')):>8} {process.get('rss_mb', 0):>8} "
+              f"{process.get('pss_mb', '-'):>8} {process.get('shared_mb', '-'):>10} "
+              f"{process.get('private_mb', '-'):>11} {process.get('requests_served'):>9}")
+
+
+def bench_docx(args):
+    """Compare the streaming DOCX extractor with python-docx for speed and recall"""
+    import re
+    from docx import Document
+    from docx_extractor import extract_docx_text
+
+    folder = os.path.join(args.corpus, 'resumes')
+    paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith('.docx')]
+    if not paths:
+        sys.exit(f"No .docx resumes under {folder}")
+
+    def python_docx(path):
+        return '\n'.join(paragraph.text for paragraph in Document(path).paragraphs)
+
+    def words(text):
+        return set(re.findall(r'\w+', text.lower()))
+
+    streaming_ms = time_it(lambda: [extract_docx_text(path) for path in paths], args.repeat)
+    python_docx_ms = time_it(lambda: [python_docx(path) for path in paths], args.repeat)
+
+    # Recall of each extractor against the union of words both found
+    streaming_words = python_docx_words = union_words = 0
+    for path in paths:
+        streaming, baseline = words(extract_docx_text(path)), words(python_docx(path))
+        streaming_words += len(streaming)
+        python_docx_words += len(baseline)
+        union_words += len(streaming | baseline)
+
+    print(f"{len(paths)} DOCX resumes")
+    print(f"python-docx  {python_docx_ms:9.1f} ms  recall: {python_docx_words / union_words:.1%}")
+    print(f"streaming    {streaming_ms:9.1f} ms  recall: {streaming_words / union_words:.1%}  "
+          f"speedup: {python_docx_ms / streaming_ms if streaming_ms else 0:.2f}x")
+
+
+def bench_concurrency(args):
+    """Stress the shared pipeline components from many threads
+
+    Every (resume, job) pair is analyzed once sequentially, then again many
+    times in shuffled order from a thread pool sharing one ResumeParser,
+    KeywordExtractor and ATSScorer. Any result that differs from the
+    sequential one means shared state leaked between requests.
+    """
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+    from resume_parser import ResumeParser
+    from keyword_extractor import KeywordExtractor
+    from ats_scorer import ATSScorer
+
+    folder = os.path.join(args.corpus, 'resumes')
+    paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+             if name.endswith(('.pdf', '.docx'))]
+    jds = load_corpus(args.corpus)['jds']
+    if not paths:
+        sys.exit(f"No .pdf or .docx resumes under {folder}")
+
+    resume_parser = ResumeParser()
+    keyword_extractor = KeywordExtractor()
+    ats_scorer = ATSScorer(keyword_extractor.skill_index)
+
+    def analyze(pair):
+        path, job_description = pair
+        resume_data = resume_parser.parse_resume(path)
+        job_keywords = keyword_extractor.extract_keywords(job_description, args.keyword_mode)
+        missing_keywords = keyword_extractor.find_missing_keywords(resume_data['raw_text'], job_keywords)
+        score_data = ats_scorer.calculate_score(resume_data, job_description, job_keywords)
+        return json.dumps([score_data, missing_keywords, job_keywords], sort_keys=True)
+
+    pairs = [(path, job_description) for path in paths for job_description in jds]
+    started = time.perf_counter()
+    expected = {pair: analyze(pair) for pair in pairs}
+    sequential_s = time.perf_counter() - started
+
+    work = pairs * args.rounds
+    random.Random(0).shuffle(work)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(analyze, work))
+    threaded_s = time.perf_counter() - started
+
+    mismatches = sum(result != expected[pair] for pair, result in zip(work, results))
+    print(f"{len(pairs)} pairs, {len(work)} analyses on {args.threads} threads")
+    print(f"sequential  {len(pairs) / sequential_s:8.1f} analyses/s")
+    print(f"threaded    {len(work) / threaded_s:8.1f} analyses/s")
+    print(f"mismatches  {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+def bench_ttft(args):
+    """Time to first token of the LLM suggestion calls
+
+    Runs ``generate_suggestions`` for resume and job pairs against Ollama,
+    or with ``--mock`` against the mock server, which like Ollama keeps the
+    last prompt cached and the model loaded for ``keep_alive``. Reports the
+    time to first token and the prompt tokens Ollama evaluated per call;
+    the shared prompt prefix should leave only the first call of each
+    request with a long prompt evaluation. Mean token counts, tokens per
+    second and cold loads per task and model follow.
+    """
+    from keyword_extractor import KeywordExtractor
+
+    corpus = load_corpus(args.corpus)
+    if args.mock:
+        from mock_ollama import MockSettings, start_mock_server
+        server = start_mock_server(MockSettings(
+            first_token_ms=0, token_ms=args.mock_token_ms, max_tokens=args.mock_max_tokens,
+            prompt_token_ms=args.mock_prompt_token_ms, load_ms=args.mock_load_ms
+        ))
+        Config.OLLAMA_BASE_URL = f'http://127.0.0.1:{server.server_port}'
+
+    from llm_suggestion_generator import LLMSuggestionGenerator
+    generator = LLMSuggestionGenerator()
+    generator.probe_finished.wait(Config.OLLAMA_TIMEOUT)
+    if not generator.is_available():
+        sys.exit(f"Ollama is not reachable at {Config.OLLAMA_BASE_URL}")
+
+    keyword_extractor = KeywordExtractor()
+    pairs = [(resume, jd) for resume in corpus['resumes'] for jd in corpus['jds']][:args.pairs]
+    request_s = []
+    for resume_text, job_description in pairs:
+        job_keywords = keyword_extractor.extract_keywords(job_description, 'statistical')
+        missing_keywords = keyword_extractor.find_missing_keywords(resume_text, job_keywords)
+        started = time.perf_counter()
+        generator.generate_suggestions(job_description, missing_keywords, {'other': resume_text}, 0.0)
+        request_s.append(time.perf_counter() - started)
+
+    telemetry = generator.telemetry.summary()
+    ttft = telemetry['time_to_first_token']
+    per_model = [(task, model, stats) for task, models in telemetry['tasks'].items()
+                 for model, stats in models.items()]
+    calls = sum(stats['calls'] for _, _, stats in per_model)
+    prompt_tokens = sum(stats['prompt_tokens'] for _, _, stats in per_model)
+    print(f"{len(pairs)} requests, {calls} LLM calls, keep_alive {generator.keep_alive}")
+    print(f"time to first token  mean {ttft['mean_ms']:8.1f} ms  p50 {ttft['p50_ms']:8.1f} ms  "
+          f"p95 {ttft['p95_ms']:8.1f} ms  max {ttft['max_ms']:8.1f} ms")
+    print(f"prompt tokens evaluated per call  {prompt_tokens / max(calls, 1):8.1f}")
+    print(f"request time  mean {sum(request_s) / len(request_s) * 1000:8.1f} ms")
+    print(f"{'task':<22} {'model':<14} {'calls':>5} {'prompt':>7} {'completion':>10} {'tok/s':>7} {'cold':>5}")
+    for task, model, stats in per_model:
+        tokens_per_second = stats['tokens_per_second'] or 0.0
+        print(f"{task:<22} {model:<14} {stats['calls']:>5} {stats['mean_prompt_tokens']:>7.1f} "
+              f"{stats['mean_completion_tokens']:>10.1f} {tokens_per_second:>7.1f} {stats['cold_loads']:>5}")
+
+
+def bench_pipeline(args):
+    """Wall time of the analysis pipeline against the sum of its stages
+
+    Runs the deterministic stages of an analysis (parsing through rule-based
+    suggestions, no LLM) for every resume file and job pair. The sum of the
+    stage durations is what running them one after another would take; the
+    critical path is the lower bound with unlimited workers.
+    """
+    Config.OLLAMA_ENABLED = False
+    if args.process_workers is not None:
+        Config.PIPELINE_PROCESS_WORKERS = args.process_workers
+    import app as api
+
+    folder = os.path.join(args.corpus, 'resumes')
+    paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+             if name.endswith(('.pdf', '.docx'))]
+    jds = load_corpus(args.corpus)['jds']
+    if not paths:
+        sys.exit(f"No .pdf or .docx resumes under {folder}")
+
+    api.warm_up()
+    pipeline = api.analysis_pipeline
+    runs = []
+    for _ in range(args.repeat):
+        for path in paths:
+            for job_description in jds:
+                runs.append(pipeline.run(
+                    dict(api.ANALYSIS_INPUTS, resume_path=path, job_description=job_description),
+                    api.ANALYSIS_VALUES
+                ))
+
+    def mean(values):
+        return sum(values) / len(values)
+
+    wall = mean([run.wall_ms for run in runs])
+    stage_total = mean([run.stage_total_ms for run in runs])
+    print(f"{len(runs)} runs, {pipeline.thread_workers} threads, {pipeline.process_workers} processes")
+    print(f"sum of stages  {stage_total:8.1f} ms")
+    print(f"critical path  {mean([run.critical_path_ms for run in runs]):8.1f} ms")
+    print(f"wall time      {wall:8.1f} ms  ({stage_total / wall:.2f}x)")
+    for name in pipeline.stages:
+        durations = [run.stages[name]['duration_ms'] for run in runs if name in run.stages]
+        if durations:
+            print(f"  {name:<20} {mean(durations):8.1f} ms  {pipeline.stages[name].kind}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ATS Resume Checker benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    spacy_parser = subparsers.add_parser('spacy', help='Full vs trimmed spaCy pipelines')
+    spacy_parser.add_argument('--corpus', required=True, help='Benchmark corpus directory')
+    spacy_parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement')
+    spacy_parser.set_defaults(func=bench_spacy)
+
+    startup_parser = subparsers.add_parser('startup', help='API import and warm-up time')
+    startup_parser.add_argument('--repeat', type=int, default=5, help='Number of fresh processes')
+    startup_parser.set_defaults(func=bench_startup)
+
+    workers_parser = subparsers.add_parser('workers', help='Per-worker RSS and boot time of a running server')
+    workers_parser.add_argument('--url', default=f'http://localhost:{Config.API_PORT}', help='Server base URL')
+    workers_parser.add_argument('--samples', type=int, default=50, help='Metrics requests to spread over workers')
+    workers_parser.set_defaults(func=bench_workers)
+
+    docx_parser = subparsers.add_parser('docx', help='Streaming DOCX extraction vs python-docx')
+    docx_parser.add_argument('--corpus', required=True, help='Benchmark corpus directory')
+    docx_parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement')
+    docx_parser.set_defaults(func=bench_docx)
+
+    concurrency_parser = subparsers.add_parser('concurrency', help='Thread-safety stress test of the scoring path')
+    concurrency_parser.add_argument('--corpus', required=True, help='Benchmark corpus directory')
+    concurrency_parser.add_argument('--threads', type=int, default=16, help='Concurrent threads')
+    concurrency_parser.add_argument('--rounds', type=int, default=20, help='Times each pair is analyzed')
+    concurrency_parser.add_argument('--keyword-mode', choices=Config.KEYWORD_EXTRACTION_MODES,
+                                    help='Keyword extraction engine (default: Config.KEYWORD_EXTRACTION_MODE)')
+    concurrency_parser.set_defaults(func=bench_concurrency)
+
+    ttft_parser = subparsers.add_parser('ttft', help='Time to first token of the LLM suggestion calls')
+    ttft_parser.add_argument('--corpus', required=True, help='Benchmark corpus directory')
+    ttft_parser.add_argument('--pairs', type=int, default=20, help='Resume and job pairs to run')
+    ttft_parser.add_argument('--mock', action='store_true', help='Run against an in-process mock Ollama')
+    ttft_parser.add_argument('--mock-prompt-token-ms', type=float, default=2.0,
+                             help='Mock latency per evaluated prompt word')
+    ttft_parser.add_argument('--mock-load-ms', type=float, default=2000.0, help='Mock model load latency')
+    ttft_parser.add_argument('--mock-token-ms', type=float, default=1.0, help='Mock latency per generated token')
+    ttft_parser.add_argument('--mock-max-tokens', type=int, default=50, help='Mock cap on tokens per response')
+    ttft_parser.set_defaults(func=bench_ttft)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help='Analysis stage timings and critical path')
+    pipeline_parser.add_argument('--corpus', required=True, help='Benchmark corpus directory')
+    pipeline_parser.add_argument('--repeat', type=int, default=3, help='Runs per resume and job pair')
+    pipeline_parser.add_argument('--process-workers', type=int,
+                                 help='Processes for parsing (default: Config.PIPELINE_PROCESS_WORKERS)')
+    pipeline_parser.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
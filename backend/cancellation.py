@@ -0,0 +1,129 @@
+import time
+import socket
+import threading
+from typing import Callable, Dict, Optional
+from config import Config
+from metrics import Counters
+
+# Cancelled requests by reason, and the stage each one stopped in
+_counters = Counters()
+
+
+class Cancelled(Exception):
+    """Raised by ``CancellationToken.check`` once a request's result is no longer wanted"""
+
+    def __init__(self, reason: str):
+        super().__init__(f'Request cancelled ({reason})')
+        self.reason = reason
+
+
+class CancellationToken:
+    """Cooperative cancellation of the work done for one request
+
+    The token is cancelled explicitly with ``cancel``, when ``deadline`` (a
+    ``time.monotonic()`` value) has passed, or when ``disconnected`` reports
+    that the client went away; that probe runs at most once per
+    ``Config.CANCELLATION_POLL_INTERVAL``. Nothing is interrupted: stages
+    call ``check`` between units of work (stages, PDF pages, LLM tasks and
+    stream chunks) and stop by raising ``Cancelled``.
+    """
+
+    DEADLINE = 'deadline'
+    CLIENT_DISCONNECT = 'client_disconnect'
+
+    def __init__(self, deadline: float = None, disconnected: Callable[[], bool] = None):
+        self.deadline = deadline
+        self.reason = None
+        self._disconnected = disconnected
+        self._next_probe = 0.0
+        self._stopped = False
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_request(cls, timeout: float = None, disconnected: Callable[[], bool] = None) -> 'CancellationToken':
+        """Token for a request starting now, with ``Config.REQUEST_DEADLINE`` unless ``timeout`` is given"""
+        timeout = timeout or Config.REQUEST_DEADLINE
+        return cls(time.monotonic() + timeout if timeout else None, disconnected)
+
+    def cancel(self, reason: str) -> bool:
+        """Cancel the token, returning False if it already was"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+        _counters.increment(reason)
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the work should stop, checking the deadline and the client connection"""
+        if self._event.is_set():
+            return True
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.cancel(self.DEADLINE)
+        elif self._disconnected is not None and now >= self._next_probe:
+            self._next_probe = now + Config.CANCELLATION_POLL_INTERVAL
+            if self._disconnected():
+                self.cancel(self.CLIENT_DISCONNECT)
+        return self._event.is_set()
+
+    def check(self, stage: str = None):
+        """Raise ``Cancelled`` if the token is cancelled, counting the first stage that noticed"""
+        if not self.cancelled:
+            return
+        with self._lock:
+            first, self._stopped = not self._stopped, True
+        if first and stage:
+            _counters.increment(f'stopped_in.{stage}')
+        raise Cancelled(self.reason)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+
+def check(token: Optional[CancellationToken], stage: str = None):
+    """``token.check`` for code that may run without a token"""
+    if token is not None:
+        token.check(stage)
+
+
+def socket_disconnected(sock: socket.socket) -> bool:
+    """Whether the peer closed a connection whose request body was fully read
+
+    Peeks without blocking: an orderly close reads as empty, a reset raises.
+    Pipelined bytes or no data at all mean the client is still there.
+    """
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+
+def wsgi_disconnect_probe(environ: Dict) -> Optional[Callable[[], bool]]:
+    """Disconnect probe for a WSGI request, None when the server doesn't expose its socket
+
+    gunicorn (serve.py) passes the client socket as ``gunicorn.socket``;
+    under the development server only the deadline applies.
+    """
+    sock = environ.get('gunicorn.socket')
+    if sock is None or not hasattr(socket, 'MSG_DONTWAIT'):
+        return None
+    return lambda: socket_disconnected(sock)
+
+
+def stats() -> Dict:
+    """Cancellation counts for monitoring"""
+    return _counters.snapshot()
+
+
+def count(name: str, amount: int = 1):
+    """Add to a cancellation counter, for work aborted outside ``check``"""
+    _counters.increment(name, amount)
@@ -0,0 +1,96 @@
+import time
+import threading
+from typing import Dict
+
+
+class CircuitBreaker:
+    """Circuit breaker that fails fast after repeated failures of a dependency
+
+    The breaker is ``closed`` while calls succeed. After ``failure_threshold``
+    consecutive failures it opens and rejects calls for ``reset_timeout``
+    seconds, then turns ``half_open`` and lets a single trial call through. A
+    successful trial closes the breaker again, a failed one re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the timeout has passed"""
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go through, reserving the trial call when half-open"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker when the threshold is reached"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Record a call abandoned by its caller, which says nothing about the dependency
+
+        Only frees the half-open trial, so the next call can make it.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict:
+        """Breaker state for monitoring"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in_seconds': retry_in,
+                'times_opened': self._times_opened,
+                'rejected_calls': self._rejected
+            }
+
+    def _current_state(self) -> str:
+        """Resolve the state, caller must hold the lock"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
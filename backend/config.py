@@ -13,6 +13,9 @@ class Config:
         'education': 0.15,
         'keywords': 0.15
     }
+    # Share of the final score taken by semantic similarity, the weighted
+    # components above make up the rest
+    SEMANTIC_BLEND = 0.3
     
     # Thresholds
     EXCELLENT_SCORE = 80
@@ -23,17 +26,145 @@ class Config:
     SPACY_MODEL = 'en_core_web_sm'
     MIN_KEYWORD_LENGTH = 2
     MAX_KEYWORDS = 50
+    SPACY_BATCH_SIZE = 16
+    SPACY_N_PROCESS = 1
+    SPACY_MAX_CHUNK_CHARS = 100000
+    
+    # spaCy components each consumer doesn't need, excluded when loading.
+    # Noun chunks need the parser plus POS tags from tagger/attribute_ruler;
+    # similarity only needs the tok2vec tensor.
+    SPACY_PROFILES = {
+        'keywords': {'exclude': ['lemmatizer', 'senter']},
+        'similarity': {'exclude': ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter']}
+    }
+    JD_CACHE_SIZE = 256
+    # 'spacy' parses each JD for noun chunks and entities, 'statistical'
+    # ranks phrases RAKE-style without a model; selectable per request
+    KEYWORD_EXTRACTION_MODES = ('spacy', 'statistical')
+    KEYWORD_EXTRACTION_MODE = 'spacy'
+    # Fuzzy keyword matching (keyword_index.py): edits a resume term may be
+    # from a skill of at least the given normalized length, and limits for
+    # skills whose close variants are other words ('creating', 'readership',
+    # 'analytics', 'collaboration', 'organizer', 'expresses')
+    FUZZY_MATCH_EDITS_BY_LENGTH = ((7, 1), (12, 2))
+    FUZZY_MATCH_MAX_EDITS = {
+        'creative': 0, 'leadership': 0, 'presentation': 1,
+        'analytical': 0, 'collaborative': 0, 'organized': 0, 'express': 0
+    }
+    FUZZY_MATCH_CACHE_SIZE = 64  # resume texts whose matches are kept
+    
+    # Multi-job analysis settings
+    MULTI_JD_MAX_JOBS = 50
+    MULTI_JD_SUGGESTIONS_TOP_N = 3
+    
+    # ZIP archive uploads (resume_archive.py), entries are read one at a time
+    ARCHIVE_MAX_ENTRIES = 1000
+    ARCHIVE_MAX_ENTRY_SIZE = MAX_FILE_SIZE  # decompressed bytes per resume
+    ARCHIVE_MAX_TOTAL_SIZE = 500 * 1024 * 1024  # decompressed bytes per archive
+    ARCHIVE_READ_CHUNK = 64 * 1024
+    
+    # Stored score components for re-weighting (feature_store.py), .npz or .parquet
+    FEATURE_STORE_PATH = os.environ.get('FEATURE_STORE_PATH')
+    FEATURE_RERANK_TOP_N = 100
+    
+    # Job tracker store (job_store.py), one SQLite file shared by worker processes
+    JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', os.path.join('data', 'jobs.db'))
+    JOB_STORE_BUSY_TIMEOUT = 10.0  # seconds a write waits for another writer
+    JOB_LIST_PAGE_SIZE = 50
+    JOB_LIST_MAX_PAGE_SIZE = 500
+    
+    # Coalescing of identical in-flight requests, shared by worker processes
+    SINGLE_FLIGHT_DIR = os.path.join(UPLOAD_FOLDER, '.inflight')
+    SINGLE_FLIGHT_RESULT_TTL = 30  # seconds a finished result is reused for retries
+    SINGLE_FLIGHT_WAIT_TIMEOUT = 300  # seconds to wait on another worker's run
+    
+    # Batch scoring settings (batch.py)
+    BATCH_WORKERS = 0  # worker processes, 0 uses one per CPU
+    BATCH_KEYWORD_EXTRACTION_MODE = 'statistical'  # skips a dependency parse per JD
+    
+    # Sharded batch scoring across machines (batch_queue.py)
+    BATCH_SHARD_SIZE = 20  # resumes per shard, the unit a worker leases
+    BATCH_LEASE_SECONDS = 300  # a shard whose worker stops renewing its lease is retried after this
+    BATCH_MAX_ATTEMPTS = 3  # leases of a shard before its resumes are reported as failed
+    BATCH_QUEUE_POLL_INTERVAL = 2.0  # seconds an idle worker waits for leased shards to finish or expire
+    BATCH_QUEUE_BUSY_TIMEOUT = 30.0  # seconds a queue write waits for another writer
+    BATCH_QUEUE_HTTP_TIMEOUT = 60.0
+    BATCH_QUEUE_HTTP_RETRIES = 3  # attempts of a call to the coordinator before a worker gives up
+    
+    # Near-duplicate detection (near_duplicates.py)
+    DEDUPE_NUM_PERM = 128  # MinHash permutations, 4 bytes each per resume
+    DEDUPE_BANDS = 32  # LSH bands of 4 rows, candidates from ~0.4 Jaccard up
+    DEDUPE_THRESHOLD = 0.85  # estimated Jaccard similarity to count as a duplicate
+    DEDUPE_SHINGLE_SIZE = 5  # words per shingle
+    
+    # ASGI variant settings (asgi_app.py), one process per event loop
+    ASGI_CPU_WORKERS = int(os.environ.get('ASGI_CPU_WORKERS', 4))  # threads for parsing and scoring
+    ASGI_LLM_MAX_CONCURRENCY = 4
+    ASGI_LLM_MAX_QUEUE = 256  # waiting costs a coroutine, not a thread
+    ASGI_LLM_QUEUE_TIMEOUT = 60.0
+    
+    # Analysis stage executor (pipeline.py), pools shared by a process's requests
+    PIPELINE_THREAD_WORKERS = int(os.environ.get('PIPELINE_THREAD_WORKERS', 8))
+    # Processes for pure-Python stages (resume parsing); 0 runs them on the
+    # thread pool, which suits pre-forked workers that already use every core
+    PIPELINE_PROCESS_WORKERS = int(os.environ.get('PIPELINE_PROCESS_WORKERS', 0))
+    
+    # Incremental re-scoring settings
+    ANALYSIS_STORE_SIZE = 200
+    ANALYSIS_STORE_TTL = 3600  # seconds
+    # SQLite file shared by worker processes, so any of them can re-score an analysis
+    ANALYSIS_STORE_PATH = os.environ.get('ANALYSIS_STORE_PATH', JOB_STORE_PATH)
     
     # API settings
     API_HOST = '0.0.0.0'
-    API_PORT = 5000
+    API_PORT = int(os.environ.get('API_PORT', 5000))
     DEBUG = True
+    WARMUP_ON_START = True
+    
+    # Production server settings (serve.py)
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 2))
+    # Parser, extractor and scorer are thread-safe, so workers can run many threads
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+    SERVER_MAX_REQUESTS = 1000  # recycle a worker after this many requests, 0 disables
+    SERVER_MAX_REQUESTS_JITTER = 100
+    SERVER_MAX_WORKER_MEMORY_MB = 512  # recycle a worker above this private memory, 0 disables
+    SERVER_TIMEOUT = 240  # seconds, must cover the LLM stage
+    # Work for an analysis stops once the client disconnects or this deadline
+    # passes; keep it below SERVER_TIMEOUT so the worker answers first
+    REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', 180))
+    CANCELLATION_POLL_INTERVAL = 0.5  # seconds between client connection checks
+    SERVER_GRACEFUL_TIMEOUT = 60  # seconds to drain in-flight requests on shutdown
 
     # LLM Configuration
     OLLAMA_ENABLED = True
-    OLLAMA_BASE_URL = 'http://localhost:11434'
+    OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
     OLLAMA_MODEL = 'llama3.1'  # Using llama3.1 (already installed)
-    OLLAMA_TIMEOUT = 30
+    OLLAMA_TIMEOUT = float(os.environ.get('OLLAMA_TIMEOUT', 30))
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')  # how long Ollama keeps the model loaded after a call
+    OLLAMA_PRELOAD = True  # load the model as soon as Ollama is reachable
+    LLM_PROMPT_JD_CHARS = 600  # job description excerpt in the shared prompt prefix
+    LLM_COLD_LOAD_MS = 500  # model load time above which a call counts as a cold load
+    # Model, output length and latency budget (seconds) per LLM task. List-style
+    # tasks run on a small model, prose on OLLAMA_MODEL. A task that misses its
+    # budget is cut off and retried once on its fallback model, then gets
+    # rule-based output. Tasks not listed use OLLAMA_MODEL and OLLAMA_TIMEOUT.
+    LLM_TASK_ROUTES = {
+        'skills_to_add': {'model': 'llama3.2:1b', 'num_predict': 150, 'budget': 8.0},
+        'skills_integration': {'model': 'llama3.2', 'num_predict': 200, 'budget': 10.0, 'fallback': 'llama3.2:1b'},
+        'project_ideas': {'model': 'llama3.2', 'num_predict': 300, 'budget': 12.0, 'fallback': 'llama3.2:1b'},
+        'professional_summary': {'model': OLLAMA_MODEL, 'num_predict': 200, 'budget': 20.0, 'fallback': 'llama3.2'},
+        'summary_enhancement': {'model': OLLAMA_MODEL, 'num_predict': 150, 'budget': 20.0, 'fallback': 'llama3.2'},
+        'experience_bullets': {'model': OLLAMA_MODEL, 'num_predict': 400, 'budget': 25.0, 'fallback': 'llama3.2'}
+    }
+    OLLAMA_PROBE_INTERVAL = 30  # seconds between background health checks
+    OLLAMA_BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures before failing fast
+    OLLAMA_BREAKER_RESET_TIMEOUT = 30  # seconds before retrying after the breaker opens
+    
+    # LLM admission control, per worker process
+    LLM_MAX_CONCURRENCY = 2  # requests generating suggestions at once
+    LLM_MAX_QUEUE = 4  # requests waiting for a slot
+    LLM_QUEUE_TIMEOUT = 2.0  # seconds a request waits for a slot
+    LLM_OVERLOAD_POLICY = 'degrade'  # 'degrade' skips AI suggestions, 'reject' returns 429
 
 # Create upload folder if it doesn't exist
 os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
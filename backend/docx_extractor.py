@@ -0,0 +1,87 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, List, Union
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+PARAGRAPH = W + 'p'
+TEXT = W + 't'
+TAB = W + 'tab'
+BREAKS = {W + 'br', W + 'cr'}
+NO_BREAK_HYPHEN = W + 'noBreakHyphen'
+# Deleted revisions, field codes and legacy fallbacks duplicate or hide text
+SKIPPED = {W + 'delText', W + 'instrText', MC + 'Fallback'}
+
+
+def extract_docx_text(source: Union[str, BinaryIO]) -> str:
+    """Extract text from a DOCX file without building a document model
+
+    Streams ``word/document.xml`` plus the header and footer parts from the
+    zip with an incremental XML parser. Paragraphs in tables and text boxes
+    are included, one line per paragraph, and explicit line breaks are kept
+    so section headers stay on their own lines.
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        headers = sorted(name for name in names if re.match(r'word/header\d*\.xml$', name))
+        footers = sorted(name for name in names if re.match(r'word/footer\d*\.xml$', name))
+
+        lines = []
+        seen = set()
+        for part in headers:
+            _add_unique(lines, seen, _part_paragraphs(archive, part))
+        lines.extend(_part_paragraphs(archive, 'word/document.xml'))
+        for part in footers:
+            _add_unique(lines, seen, _part_paragraphs(archive, part))
+
+    return '\n'.join(lines)
+
+
+def _add_unique(lines: List[str], seen: set, paragraphs: Iterator[str]):
+    """Add header/footer paragraphs, skipping repeats across first/odd/even variants"""
+    for paragraph in paragraphs:
+        if paragraph not in seen:
+            seen.add(paragraph)
+            lines.append(paragraph)
+
+
+def _part_paragraphs(archive: zipfile.ZipFile, part: str) -> Iterator[str]:
+    """Yield the non-empty paragraphs of one XML part in document order"""
+    # Text of each open paragraph; text boxes nest paragraphs inside paragraphs
+    open_paragraphs: List[List[str]] = []
+    skip_depth = 0
+
+    with archive.open(part) as stream:
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            tag = element.tag
+
+            if tag in SKIPPED:
+                skip_depth += 1 if event == 'start' else -1
+                continue
+            if skip_depth:
+                if event == 'end':
+                    element.clear()
+                continue
+
+            if event == 'start':
+                if tag == PARAGRAPH:
+                    open_paragraphs.append([])
+                continue
+
+            if tag == PARAGRAPH:
+                text = ''.join(open_paragraphs.pop()).strip() if open_paragraphs else ''
+                element.clear()
+                if text:
+                    yield text
+            elif open_paragraphs:
+                buffer = open_paragraphs[-1]
+                if tag == TEXT:
+                    buffer.append(element.text or '')
+                elif tag == TAB:
+                    buffer.append('\t')
+                elif tag in BREAKS:
+                    buffer.append('\n')
+                elif tag == NO_BREAK_HYPHEN:
+                    buffer.append('-')
@@ -0,0 +1,406 @@
+"""SQLite store of tracked job applications, their files and saved analyses
+
+Jobs are rows with indexes on status, country and application date, so
+listing, filtering and paging stay fast with thousands of applications and
+saving one job writes one row. Resume and cover letter files, and job
+descriptions, are stored once per content hash however many jobs use them.
+
+Analyses saved for a job link to the resume and job description they were
+run on. Parsed resumes are cached by resume hash and job keywords by job
+description hash and extraction mode, so re-analyzing a stored job skips
+parsing and keyword extraction. The database runs in WAL mode and every
+thread uses its own connection, so worker threads and processes can read
+while one of them writes.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from metrics import Counters
+
+# Bump when ResumeParser's output changes, so cached parses are redone
+PARSE_CACHE_VERSION = 1
+
+# Job fields with their own column, as named by the job tracker
+JOB_COLUMNS = {
+    'position': 'position',
+    'company': 'company',
+    'method': 'method',
+    'status': 'status',
+    'country': 'country',
+    'location': 'location',
+    'hrContact': 'hr_contact',
+    'jobUrl': 'job_url',
+    'remarks': 'remarks',
+    'interviewDate': 'interview_date',
+    'interviewTime': 'interview_time',
+    'interviewRound': 'interview_round'
+}
+# Attached files: field name in the job and in upload forms, and column prefix
+FILE_FIELDS = {'cvFile': 'cv', 'coverLetterFile': 'cover_letter'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    position TEXT, company TEXT, method TEXT, status TEXT, country TEXT, location TEXT,
+    hr_contact TEXT, job_url TEXT, remarks TEXT,
+    interview_date TEXT, interview_time TEXT, interview_round TEXT,
+    description_hash TEXT REFERENCES blobs(hash),
+    cv_hash TEXT REFERENCES blobs(hash), cv_name TEXT,
+    cover_letter_hash TEXT REFERENCES blobs(hash), cover_letter_name TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_date ON jobs(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS jobs_by_country ON jobs(country, created_at DESC, id DESC);
+CREATE TABLE IF NOT EXISTS analyses (
+    id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    resume_hash TEXT NOT NULL REFERENCES blobs(hash),
+    description_hash TEXT NOT NULL REFERENCES blobs(hash),
+    keyword_mode TEXT NOT NULL,
+    overall_score REAL,
+    result TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_by_job ON analyses(job_id, created_at DESC);
+CREATE TABLE IF NOT EXISTS parsed_resumes (
+    resume_hash TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (resume_hash, version)
+);
+CREATE TABLE IF NOT EXISTS job_keywords (
+    description_hash TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (description_hash, mode)
+);
+"""
+
+
+def content_hash(data: bytes) -> str:
+    """Key a blob is stored under"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class JobStore:
+    """Jobs, deduplicated file blobs, saved analyses and parse/keyword caches in one SQLite file"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.JOB_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._counters = Counters()
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Drop the parent's connections, SQLite connections can't cross a fork"""
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=Config.JOB_STORE_BUSY_TIMEOUT)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('PRAGMA foreign_keys=ON')
+            self._local.db = db
+        return db
+
+    # Jobs
+
+    def save_job(self, job: Dict, files: Dict[str, Tuple[str, bytes]] = None) -> Dict:
+        """Insert or update a job and return it as stored
+
+        ``job`` uses the job tracker's field names; fields without a column
+        are kept as they are. ``files`` maps 'cvFile' and 'coverLetterFile'
+        to ``(filename, data)``. Updating a job only changes what is given:
+        fields, files, ``description`` and ``createdAt`` left out keep their
+        stored values.
+        """
+        job = dict(job)
+        job_id = str(job.pop('id', None) or uuid.uuid4())
+        files = files or {}
+        description = job.pop('description', None)
+        created_at = parse_timestamp(job.pop('createdAt', None))
+        for field in FILE_FIELDS:
+            job.pop(field, None)
+        # Set by the store, not the client
+        job.pop('updatedAt', None)
+        job.pop('hasDescription', None)
+
+        with self._connect() as db:
+            current = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            # Columns left out of the row keep their value on update
+            row = {column: _text(job.pop(field)) for field, column in JOB_COLUMNS.items() if field in job}
+            extra = dict(json.loads(current['extra']), **job) if current is not None else job
+            if created_at is None:
+                created_at = current['created_at'] if current is not None else now_ms()
+            row.update(id=job_id, extra=json.dumps(extra), created_at=created_at, updated_at=now_ms())
+            if description is not None:
+                row['description_hash'] = self._put_blob(db, description.encode('utf-8')) if description else None
+            for field, prefix in FILE_FIELDS.items():
+                if field in files:
+                    name, data = files[field]
+                    row[f'{prefix}_hash'], row[f'{prefix}_name'] = self._put_blob(db, data), name
+
+            columns = ', '.join(row)
+            db.execute(
+                f'INSERT INTO jobs ({columns}) VALUES ({", ".join("?" * len(row))}) '
+                f'ON CONFLICT(id) DO UPDATE SET {", ".join(f"{name} = excluded.{name}" for name in row if name != "id")}',
+                list(row.values())
+            )
+            if current is not None:
+                self._drop_unused_blobs(db, _blob_hashes(current))
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """A job with its description and file metadata, None if unknown"""
+        row = self._connect().execute(
+            'SELECT jobs.*, blobs.data AS description FROM jobs '
+            'LEFT JOIN blobs ON blobs.hash = jobs.description_hash WHERE jobs.id = ?',
+            (job_id,)
+        ).fetchone()
+        return self._job_from_row(row, with_description=True) if row is not None else None
+
+    def delete_job(self, job_id: str) -> bool:
+        """Delete a job, its analyses and the blobs nothing else uses"""
+        with self._connect() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return False
+            analysed = [item['resume_hash'] for item in db.execute(
+                'SELECT DISTINCT resume_hash FROM analyses WHERE job_id = ?', (job_id,)
+            )]
+            db.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            self._drop_unused_blobs(db, _blob_hashes(row) + analysed)
+        return True
+
+    def list_jobs(self, status: str = None, country: str = None, since: int = None, until: int = None,
+                  limit: int = None, cursor: str = None) -> Dict:
+        """One page of jobs, newest application first, without descriptions or file contents
+
+        Filters combine; ``since`` and ``until`` bound ``createdAt`` (epoch
+        milliseconds, inclusive). Pages are keyset-paginated: pass the
+        returned ``next_cursor`` to get the next one, None on the last page.
+        """
+        limit = min(limit or Config.JOB_LIST_PAGE_SIZE, Config.JOB_LIST_MAX_PAGE_SIZE)
+        conditions, params = [], []
+        for column, value in (('status', status), ('country', country)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            conditions.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('created_at <= ?')
+            params.append(until)
+        filtered = ' AND '.join(conditions) or '1'
+
+        page_conditions, page_params = list(conditions), list(params)
+        if cursor:
+            created_at, job_id = _parse_cursor(cursor)
+            page_conditions.append('(created_at < ? OR (created_at = ? AND id < ?))')
+            page_params.extend([created_at, created_at, job_id])
+
+        db = self._connect()
+        rows = db.execute(
+            f'SELECT * FROM jobs WHERE {" AND ".join(page_conditions) or "1"} '
+            f'ORDER BY created_at DESC, id DESC LIMIT ?',
+            page_params + [limit + 1]
+        ).fetchall()
+        total = db.execute(f'SELECT COUNT(*) FROM jobs WHERE {filtered}', params).fetchone()[0]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['created_at']}:{rows[-1]['id']}"
+        return {
+            'jobs': [self._job_from_row(row) for row in rows],
+            'total': total,
+            'next_cursor': next_cursor
+        }
+
+    def get_file(self, job_id: str, field: str) -> Optional[Tuple[str, bytes]]:
+        """``(filename, data)`` of a job's 'cvFile' or 'coverLetterFile', None if it has none"""
+        prefix = FILE_FIELDS[field]
+        row = self._connect().execute(
+            f'SELECT jobs.{prefix}_name AS name, blobs.data AS data FROM jobs '
+            f'JOIN blobs ON blobs.hash = jobs.{prefix}_hash WHERE jobs.id = ?',
+            (job_id,)
+        ).fetchone()
+        return (row['name'], row['data']) if row is not None else None
+
+    # Analyses and caches
+
+    def save_analysis(self, job_id: str, resume_hash: str, description: str, keyword_mode: str,
+                      result: Dict) -> str:
+        """Save an analysis of a job's resume and return its id"""
+        analysis_id = uuid.uuid4().hex
+        with self._connect() as db:
+            description_hash = self._put_blob(db, description.encode('utf-8'))
+            db.execute(
+                'INSERT INTO analyses (id, job_id, resume_hash, description_hash, keyword_mode, overall_score, '
+                'result, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (analysis_id, job_id, resume_hash, description_hash, keyword_mode,
+                 result.get('score', {}).get('overall_score'), json.dumps(result), now_ms())
+            )
+        return analysis_id
+
+    def list_analyses(self, job_id: str, limit: int = None) -> List[Dict]:
+        """Saved analyses of a job, newest first, without their full results"""
+        rows = self._connect().execute(
+            'SELECT id, resume_hash, description_hash, keyword_mode, overall_score, created_at FROM analyses '
+            'WHERE job_id = ? ORDER BY created_at DESC LIMIT ?',
+            (job_id, limit or Config.JOB_LIST_PAGE_SIZE)
+        ).fetchall()
+        return [{
+            'id': row['id'],
+            'resume_hash': row['resume_hash'],
+            'description_hash': row['description_hash'],
+            'keyword_mode': row['keyword_mode'],
+            'overall_score': row['overall_score'],
+            'createdAt': row['created_at']
+        } for row in rows]
+
+    def get_analysis(self, job_id: str, analysis_id: str) -> Optional[Dict]:
+        """Full result of a saved analysis, None if the job has no such analysis"""
+        row = self._connect().execute(
+            'SELECT result FROM analyses WHERE id = ? AND job_id = ?', (analysis_id, job_id)
+        ).fetchone()
+        return json.loads(row['result']) if row is not None else None
+
+    def parsed_resume(self, resume_hash: str) -> Optional[Dict]:
+        """Cached parse of a stored resume"""
+        return self._cached(
+            'SELECT data FROM parsed_resumes WHERE resume_hash = ? AND version = ?',
+            (resume_hash, PARSE_CACHE_VERSION), 'parse'
+        )
+
+    def store_parsed_resume(self, resume_hash: str, resume_data: Dict):
+        with self._connect() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO parsed_resumes (resume_hash, version, data) VALUES (?, ?, ?)',
+                (resume_hash, PARSE_CACHE_VERSION, json.dumps(resume_data))
+            )
+
+    def job_keywords(self, description: str, mode: str) -> Optional[Dict]:
+        """Cached keywords of a job description for an extraction mode"""
+        return self._cached(
+            'SELECT data FROM job_keywords WHERE description_hash = ? AND mode = ?',
+            (content_hash(description.encode('utf-8')), mode), 'keywords'
+        )
+
+    def store_job_keywords(self, description: str, mode: str, keywords: Dict):
+        with self._connect() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO job_keywords (description_hash, mode, data) VALUES (?, ?, ?)',
+                (content_hash(description.encode('utf-8')), mode, json.dumps(keywords))
+            )
+
+    def stats(self) -> Dict:
+        """Row counts and cache hit counters for monitoring"""
+        db = self._connect()
+        stats = {
+            table: db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('jobs', 'blobs', 'analyses', 'parsed_resumes', 'job_keywords')
+        }
+        stats['blob_bytes'] = db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        stats.update(self._counters.snapshot())
+        return stats
+
+    # Internals
+
+    def _cached(self, query: str, params: tuple, name: str) -> Optional[Dict]:
+        row = self._connect().execute(query, params).fetchone()
+        self._counters.increment(f'{name}_cache_hits' if row is not None else f'{name}_cache_misses')
+        return json.loads(row['data']) if row is not None else None
+
+    def _put_blob(self, db: sqlite3.Connection, data: bytes) -> str:
+        """Store a blob unless one with the same content exists, returning its hash"""
+        digest = content_hash(data)
+        inserted = db.execute(
+            'INSERT OR IGNORE INTO blobs (hash, data, size) VALUES (?, ?, ?)', (digest, data, len(data))
+        ).rowcount
+        self._counters.increment('blobs_written' if inserted else 'blobs_deduplicated')
+        return digest
+
+    def _drop_unused_blobs(self, db: sqlite3.Connection, hashes: List[str]):
+        """Delete the given blobs, and their cached parses, if no job or analysis refers to them"""
+        for digest in set(filter(None, hashes)):
+            used = db.execute(
+                'SELECT 1 FROM jobs WHERE cv_hash = ?1 OR cover_letter_hash = ?1 OR description_hash = ?1 '
+                'UNION ALL SELECT 1 FROM analyses WHERE resume_hash = ?1 OR description_hash = ?1 LIMIT 1',
+                (digest,)
+            ).fetchone()
+            if used is None:
+                db.execute('DELETE FROM blobs WHERE hash = ?', (digest,))
+                db.execute('DELETE FROM parsed_resumes WHERE resume_hash = ?', (digest,))
+                db.execute('DELETE FROM job_keywords WHERE description_hash = ?', (digest,))
+
+    def _job_from_row(self, row: sqlite3.Row, with_description: bool = False) -> Dict:
+        """Job in the job tracker's shape"""
+        job = json.loads(row['extra'])
+        job.update({field: row[column] for field, column in JOB_COLUMNS.items()})
+        job.update(id=row['id'], createdAt=row['created_at'], updatedAt=row['updated_at'])
+        for field, prefix in FILE_FIELDS.items():
+            digest = row[f'{prefix}_hash']
+            job[field] = {'name': row[f'{prefix}_name'], 'hash': digest} if digest else None
+        if with_description:
+            job['description'] = row['description'].decode('utf-8') if row['description'] is not None else ''
+        else:
+            job['hasDescription'] = row['description_hash'] is not None
+        return job
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _blob_hashes(row: sqlite3.Row) -> List[str]:
+    return [row['description_hash'], row['cv_hash'], row['cover_letter_hash']]
+
+
+def parse_timestamp(value) -> Optional[int]:
+    """Epoch milliseconds from a number or a local YYYY-MM-DD date, None for empty values"""
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, str) and '-' in value:
+            return int(time.mktime(time.strptime(value, '%Y-%m-%d')) * 1000)
+        return int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date '{value}', expected epoch milliseconds or YYYY-MM-DD")
+
+
+def _parse_cursor(cursor: str) -> Tuple[int, str]:
+    created_at, _, job_id = cursor.partition(':')
+    try:
+        return int(created_at), job_id
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
@@ -1,19 +1,28 @@
 import re
-import spacy
-from typing import List, Dict, Set
-from collections import Counter
+import copy
+import hashlib
+import threading
+from typing import List, Dict, Set, Optional
+from collections import Counter, OrderedDict
 from config import Config
+from nlp_pipelines import load_pipeline, pipe_texts
+from statistical_keywords import rank_phrases
+from keyword_index import KeywordIndex
 
 class KeywordExtractor:
+    """Extracts job keywords and matches them against resume text
+    
+    Thread-safe: one instance can be shared by all request threads. The
+    spaCy pipeline is loaded once under a lock and only read afterwards, the
+    skill vocabularies and their fuzzy index are never modified, and the JD
+    cache is guarded by its own lock and hands out copies of its entries.
+    """
+    
     def __init__(self):
-        self.nlp = None
-        try:
-            import spacy
-            self.nlp = spacy.load(Config.SPACY_MODEL)
-            print(f"Loaded spaCy model: {Config.SPACY_MODEL}")
-        except (OSError, ImportError) as e:
-            print(f"Warning: spaCy model not available ({e}). Using fallback keyword extraction.")
-            print("To enable advanced NLP features, run: python -m spacy download en_core_web_sm")
+        # spaCy pipeline is loaded on first use, see the nlp property
+        self._nlp = None
+        self._nlp_loaded = False
+        self._load_lock = threading.Lock()
         
         
         # Common technical skills and tools
@@ -33,9 +42,118 @@ class KeywordExtractor:
             'creative', 'adaptable', 'organized', 'detail-oriented', 'collaborative',
             'time management', 'critical thinking', 'decision making', 'presentation'
         }
+        
+        # Other names of skills, matched like the skill itself
+        self.skill_aliases = {
+            'postgres': 'postgresql', 'mongo': 'mongodb', 'k8s': 'kubernetes', 'sklearn': 'scikit-learn',
+            'reactjs': 'react', 'vuejs': 'vue', 'angularjs': 'angular', 'expressjs': 'express',
+            'amazon web services': 'aws', 'google cloud': 'gcp', 'restful api': 'rest api',
+            'continuous integration': 'ci/cd'
+        }
+        
+        # Deletion index over the skills, so resume variants and typos of a
+        # skill ('NodeJS', 'scikit learn', 'Kubernets') still count as matches
+        self.skill_index = KeywordIndex(self.tech_skills | self.soft_skills, self.skill_aliases)
+        
+        # Cache of extracted keywords keyed by job description hash
+        self._jd_cache = OrderedDict()
+        self._jd_cache_lock = threading.Lock()
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline for keyword extraction, or None if unavailable"""
+        if not self._nlp_loaded:
+            with self._load_lock:
+                if not self._nlp_loaded:
+                    try:
+                        # Only the parser (noun chunks) and NER (entities) are used here
+                        self._nlp = load_pipeline('keywords')
+                    except (OSError, ImportError) as e:
+                        print(f"Warning: spaCy model not available ({e}). Using statistical keyword extraction.")
+                        print("To enable advanced NLP features, run: python -m spacy download en_core_web_sm")
+                    self._nlp_loaded = True
+        return self._nlp
     
-    def extract_keywords(self, job_description: str) -> Dict[str, List[str]]:
+    def extract_keywords(self, job_description: str, mode: str = None) -> Dict[str, List[str]]:
         """Extract keywords from job description"""
+        return self.extract_keywords_batch([job_description], mode)[0]
+    
+    def extract_keywords_batch(self, job_descriptions: List[str], mode: str = None) -> List[Dict[str, List[str]]]:
+        """Extract keywords for several job descriptions in one spaCy pass
+        
+        ``mode`` is 'spacy' (noun chunks and entities from a dependency
+        parse) or 'statistical' (RAKE-style phrase ranking, no model needed);
+        it defaults to ``Config.KEYWORD_EXTRACTION_MODE``, and 'spacy' falls
+        back to 'statistical' when the model isn't installed. Cached job
+        descriptions are served from the JD cache; the rest are deduplicated
+        and run through ``nlp.pipe`` together.
+        """
+        mode = self.resolve_mode(mode)
+        results: List[Optional[Dict[str, List[str]]]] = [None] * len(job_descriptions)
+        pending: Dict[str, List[int]] = OrderedDict()
+        
+        for index, job_description in enumerate(job_descriptions):
+            cache_key = self._cache_key(job_description, mode)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.setdefault(cache_key, []).append(index)
+        
+        if pending:
+            texts = [job_descriptions[indices[0]] for indices in pending.values()]
+            if mode == 'spacy':
+                docs = pipe_texts(self.nlp, [text.lower() for text in texts])
+            else:
+                docs = [None] * len(texts)
+            
+            for (cache_key, indices), text, chunk_docs in zip(pending.items(), texts, docs):
+                keywords = self._build_keywords(text, chunk_docs)
+                self._set_cached(cache_key, keywords)
+                for index in indices:
+                    results[index] = keywords
+        
+        # Hand out copies so callers can't mutate cached entries
+        return [copy.deepcopy(result) for result in results]
+    
+    @staticmethod
+    def check_mode(mode: str = None) -> str:
+        """Validate a requested extraction mode without loading any model"""
+        mode = mode or Config.KEYWORD_EXTRACTION_MODE
+        if mode not in Config.KEYWORD_EXTRACTION_MODES:
+            raise ValueError(f"Unknown keyword mode '{mode}', expected one of "
+                             f"{', '.join(Config.KEYWORD_EXTRACTION_MODES)}")
+        return mode
+    
+    def resolve_mode(self, mode: str = None) -> str:
+        """Extraction mode that will actually run for a requested mode"""
+        mode = self.check_mode(mode)
+        if mode == 'spacy' and not self.nlp:
+            return 'statistical'
+        return mode
+    
+    def _cache_key(self, job_description: str, mode: str) -> str:
+        """Build JD cache key from job description text and extraction mode"""
+        return hashlib.sha1(f"{mode}\0{job_description}".encode('utf-8')).hexdigest()
+    
+    def _get_cached(self, cache_key: str) -> Optional[Dict[str, List[str]]]:
+        """Look up keywords in the JD cache"""
+        with self._jd_cache_lock:
+            keywords = self._jd_cache.get(cache_key)
+            if keywords is not None:
+                self._jd_cache.move_to_end(cache_key)
+            return keywords
+    
+    def _set_cached(self, cache_key: str, keywords: Dict[str, List[str]]):
+        """Store keywords in the JD cache, evicting least recently used entries"""
+        with self._jd_cache_lock:
+            self._jd_cache[cache_key] = keywords
+            self._jd_cache.move_to_end(cache_key)
+            while len(self._jd_cache) > Config.JD_CACHE_SIZE:
+                self._jd_cache.popitem(last=False)
+    
+    def _build_keywords(self, job_description: str, docs: Optional[List]) -> Dict[str, List[str]]:
+        """Build keyword dictionary from job description and its parsed chunk docs"""
         keywords = {
             'technical_skills': [],
             'soft_skills': [],
@@ -55,28 +173,22 @@ class KeywordExtractor:
             if skill in job_description.lower():
                 keywords['soft_skills'].append(skill)
         
-        # Use spaCy if available, otherwise use basic extraction
-        if self.nlp:
-            doc = self.nlp(job_description.lower())
-            
+        # Candidate phrases with their occurrence counts (spaCy) or scores
+        if docs is not None:
             # Extract noun phrases as potential keywords
-            noun_phrases = [chunk.text for chunk in doc.noun_chunks 
+            noun_phrases = [chunk.text for doc in docs for chunk in doc.noun_chunks 
                            if len(chunk.text.split()) <= 3 and len(chunk.text) > Config.MIN_KEYWORD_LENGTH]
             
             # Extract entities (organizations, technologies, etc.)
-            entities = [ent.text for ent in doc.ents 
+            entities = [ent.text for doc in docs for ent in doc.ents 
                        if ent.label_ in ['ORG', 'PRODUCT', 'SKILL', 'GPE']]
-        else:
-            # Fallback: extract common noun phrases using simple regex
-            words = re.findall(r'\b[a-z]{3,}\b', job_description.lower())
-            noun_phrases = []
-            entities = []
             
-            # Extract multi-word phrases (simple approach)
-            for i in range(len(words) - 1):
-                phrase = f"{words[i]} {words[i+1]}"
-                if len(phrase) > Config.MIN_KEYWORD_LENGTH:
-                    noun_phrases.append(phrase)
+            phrase_weights = Counter(kw.strip() for kw in noun_phrases + entities)
+        else:
+            phrase_weights = Counter(dict(rank_phrases(
+                job_description,
+                min_length=Config.MIN_KEYWORD_LENGTH
+            )))
         
         # Extract education requirements
         education_keywords = ['bachelor', 'master', 'phd', 'degree', 'diploma', 'certification']
@@ -98,20 +210,21 @@ class KeywordExtractor:
         cert_matches = re.findall(cert_pattern, job_description)
         keywords['certifications'] = cert_matches
         
-        # Combine all keywords
-        all_keywords = (
-            keywords['technical_skills'] + 
-            keywords['soft_skills'] + 
-            noun_phrases + 
-            entities
-        )
+        # Curated skills first, most mentioned first, then the other phrases
+        # by weight; counting happens before deduplication so the ranking
+        # reflects how often the job description asks for something
+        skills = keywords['technical_skills'] + keywords['soft_skills']
+        description_lower = job_description.lower()
+        ranked = sorted(skills, key=lambda skill: (-description_lower.count(skill), skill))
+        ranked += [kw for kw, _ in phrase_weights.most_common()]
         
-        # Remove duplicates and filter
-        all_keywords = list(set([kw.strip() for kw in all_keywords if len(kw.strip()) > 2]))
-        
-        # Rank by frequency
-        keyword_freq = Counter([kw for kw in all_keywords])
-        keywords['all_keywords'] = [kw for kw, _ in keyword_freq.most_common(Config.MAX_KEYWORDS)]
+        # Remove duplicates and filter, keeping rank order
+        all_keywords = []
+        for kw in ranked:
+            kw = kw.strip()
+            if len(kw) > 2 and kw not in all_keywords:
+                all_keywords.append(kw)
+        keywords['all_keywords'] = all_keywords[:Config.MAX_KEYWORDS]
         
         return keywords
     
@@ -127,15 +240,9 @@ class KeywordExtractor:
             'other': []
         }
         
-        # Check technical skills
-        for skill in job_keywords['technical_skills']:
-            if skill.lower() not in resume_lower:
-                missing['technical_skills'].append(skill)
-        
-        # Check soft skills
-        for skill in job_keywords['soft_skills']:
-            if skill.lower() not in resume_lower:
-                missing['soft_skills'].append(skill)
+        # Skills also match variants and typos, other keywords ignore case and separators
+        missing['technical_skills'] = self.skill_index.missing(resume_text, job_keywords['technical_skills'])
+        missing['soft_skills'] = self.skill_index.missing(resume_text, job_keywords['soft_skills'])
         
         # Check education
         for edu in job_keywords['education']:
@@ -148,9 +255,8 @@ class KeywordExtractor:
                 missing['certifications'].append(cert)
         
         # Check other keywords
-        for keyword in job_keywords['all_keywords']:
-            if (keyword.lower() not in resume_lower and 
-                keyword not in missing['technical_skills'] and 
+        for keyword in self.skill_index.missing(resume_text, job_keywords['all_keywords']):
+            if (keyword not in missing['technical_skills'] and 
                 keyword not in missing['soft_skills']):
                 missing['other'].append(keyword)
         
@@ -158,12 +264,11 @@ class KeywordExtractor:
     
     def calculate_keyword_density(self, resume_text: str, keywords: List[str]) -> float:
         """Calculate keyword density in resume"""
-        resume_lower = resume_text.lower()
         total_keywords = len(keywords)
         
         if total_keywords == 0:
             return 0.0
         
-        found_keywords = sum(1 for kw in keywords if kw.lower() in resume_lower)
+        found_keywords = total_keywords - len(self.skill_index.missing(resume_text, keywords))
         
         return (found_keywords / total_keywords) * 100
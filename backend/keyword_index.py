@@ -0,0 +1,210 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import Config
+from metrics import Counters
+
+# Resume text is cut into segments at punctuation that separates list items,
+# so terms are never joined across them, and segments into word tokens
+_SEGMENT_SPLIT = re.compile(r'[,;:|()\[\]\n•*]+')
+_TOKEN = re.compile(r'[a-z0-9+#]+')
+
+# Only deletions within the first characters of a term are indexed, as in
+# SymSpell, so a lookup costs the same however long the term is
+PREFIX_LENGTH = 7
+
+
+def normalize(term: str) -> str:
+    """Lowercase ``term`` and drop separators, so 'Node.js', 'NodeJS' and 'node js' compare equal"""
+    return ''.join(_TOKEN.findall(term.lower()))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance of ``a`` and ``b`` counting adjacent transpositions as one edit
+
+    Gives up once the distance must exceed ``limit``, returning
+    ``limit + 1``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous, row = row, current
+    return row[-1]
+
+
+def _deletes(term: str, edits: int) -> Set[str]:
+    """``term`` and every string made by deleting up to ``edits`` characters from it"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(edits):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class KeywordIndex:
+    """Deletion index over a keyword vocabulary for typo- and variant-tolerant matching
+
+    Built once (SymSpell-style): after ``normalize``, every keyword's first
+    ``PREFIX_LENGTH`` characters are stored under themselves and every
+    string made by deleting up to the keyword's allowed number of edits. A
+    resume term then only needs the deletions of its own prefix looked up
+    to find every keyword within the edit limit, in time independent of the
+    vocabulary size and of the term's length, and the few candidates are
+    confirmed with ``edit_distance`` on the whole term. ``aliases`` map
+    other names ('postgres', 'k8s') to a keyword. Each keyword's limit comes
+    from ``Config.FUZZY_MATCH_EDITS_BY_LENGTH`` unless
+    ``Config.FUZZY_MATCH_MAX_EDITS`` sets one, so short keywords only match
+    exactly; an alias is held to its keyword's limit.
+
+    Thread-safe: the index is never modified after construction, and the
+    cache of matches per resume text has its own lock.
+    """
+
+    def __init__(self, keywords: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.keywords = set(keywords)
+        self._edits: Dict[str, int] = {}
+        self._index: Dict[str, Set[Tuple[str, str]]] = {}
+        self._max_tokens = 1
+
+        names = [(keyword, keyword) for keyword in self.keywords]
+        names += [(alias, keyword) for alias, keyword in (aliases or {}).items() if keyword in self.keywords]
+        for name, keyword in names:
+            term = normalize(name)
+            if not term:
+                continue
+            # An alias gets no more edits than its keyword: 'reactjs' mustn't let 'reacts' match 'react'
+            edits = min(self.max_edits(name), self.max_edits(keyword))
+            self._edits[term] = min(edits, self._edits.get(term, edits))
+            for variant in _deletes(term[:PREFIX_LENGTH], edits):
+                self._index.setdefault(variant, set()).add((term, keyword))
+            # One more token than the keyword has, for 'java script' and 'scikit learn'
+            self._max_tokens = max(self._max_tokens, len(_TOKEN.findall(name.lower())) + 1)
+        # Edits worth looking up for a term of each length, by the keywords it could be near
+        self._edits_by_length = {}
+        for term, edits in self._edits.items():
+            for length in range(max(1, len(term) - edits), len(term) + edits + 1):
+                self._edits_by_length[length] = max(edits, self._edits_by_length.get(length, 0))
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._counters = Counters()
+
+    @staticmethod
+    def max_edits(keyword: str) -> int:
+        """Edits a resume term may differ from ``keyword`` by and still match it"""
+        keyword = keyword.lower()
+        if keyword in Config.FUZZY_MATCH_MAX_EDITS:
+            return Config.FUZZY_MATCH_MAX_EDITS[keyword]
+        length = len(normalize(keyword))
+        return max((edits for min_length, edits in Config.FUZZY_MATCH_EDITS_BY_LENGTH if length >= min_length),
+                   default=0)
+
+    def matches(self, text: str) -> Dict[str, str]:
+        """Vocabulary keywords found in ``text``, each with the normalized term that matched it"""
+        return dict(self._lookup(text)[1])
+
+    def contains(self, text: str, keyword: str) -> bool:
+        """Whether ``keyword`` is in ``text``: as a substring, a vocabulary match or the same normalized term
+
+        Keywords outside the vocabulary still match across case and
+        separators ('CI CD' for 'ci/cd'), only without edits.
+        """
+        return not self.missing(text, [keyword])
+
+    def missing(self, text: str, keywords: Iterable[str]) -> List[str]:
+        """``keywords`` not contained in ``text``, in order"""
+        text_lower = text.lower()
+        terms, found = self._lookup(text)
+        missing = []
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            if keyword_lower in text_lower:
+                continue
+            if keyword_lower in self.keywords:
+                if keyword_lower not in found:
+                    missing.append(keyword)
+            elif normalize(keyword) not in terms:
+                missing.append(keyword)
+        return missing
+
+    def stats(self) -> Dict:
+        """Index size and match counts for monitoring"""
+        return {
+            'keywords': len(self.keywords),
+            'terms': len(self._edits),
+            'delete_entries': len(self._index),
+            **self._counters.snapshot()
+        }
+
+    def _lookup(self, text: str) -> Tuple[Set[str], Dict[str, str]]:
+        """Terms of ``text`` and the vocabulary keywords they match, cached per text
+
+        One analysis matches the same resume text several times, so the
+        last ``Config.FUZZY_MATCH_CACHE_SIZE`` texts are kept.
+        """
+        cache_key = hashlib.md5(text.encode('utf-8')).hexdigest()
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                self._cache.move_to_end(cache_key)
+        if entry is not None:
+            self._counters.increment('cache_hits')
+            return entry
+
+        terms = self._terms(text)
+        entry = (terms, self._find(terms))
+        with self._cache_lock:
+            self._cache[cache_key] = entry
+            while len(self._cache) > Config.FUZZY_MATCH_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        self._counters.increment('cache_misses')
+        return entry
+
+    def _terms(self, text: str) -> Set[str]:
+        """Normalized runs of up to ``_max_tokens`` consecutive tokens within each segment of ``text``"""
+        terms = set()
+        for segment in _SEGMENT_SPLIT.split(text.lower()):
+            tokens = _TOKEN.findall(segment)
+            for start in range(len(tokens)):
+                term = ''
+                for token in tokens[start:start + self._max_tokens]:
+                    term += token
+                    terms.add(term)
+        return terms
+
+    def _find(self, terms: Set[str]) -> Dict[str, str]:
+        """Look up every term in the deletion index, keeping the closest term per keyword"""
+        found = {}
+        # Joined terms share prefixes, so each prefix is looked up once
+        prefix_candidates = {}
+        for term in terms:
+            edits = self._edits_by_length.get(len(term))
+            if edits is None:
+                continue
+            prefix = (term[:PREFIX_LENGTH], edits)
+            candidates = prefix_candidates.get(prefix)
+            if candidates is None:
+                candidates = prefix_candidates[prefix] = set().union(*[
+                    self._index[variant] for variant in _deletes(*prefix) if variant in self._index
+                ])
+            for indexed, keyword in candidates:
+                limit = self._edits[indexed]
+                distance = 0 if term == indexed else edit_distance(term, indexed, limit)
+                if distance <= limit and (distance, term) < found.get(keyword, (limit + 1, '')):
+                    found[keyword] = (distance, term)
+        if found:
+            self._counters.increment('keywords_matched', len(found))
+        return {keyword: term for keyword, (_, term) in found.items()}
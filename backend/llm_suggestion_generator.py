@@ -1,7 +1,134 @@
-import ollama
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import os
 import json
+import time
+import queue
+import asyncio
+import hashlib
+import threading
 from config import Config
+from circuit_breaker import CircuitBreaker
+from metrics import Counters
+from llm_telemetry import LLMTelemetry, call_record
+from cancellation import Cancelled, CancellationToken, check, count as count_cancellation
+from suggestions_generator import SuggestionsGenerator
+
+
+class LLMUnavailableError(Exception):
+    """Raised when an LLM call is rejected because the circuit breaker is open"""
+
+
+class LLMBudgetExceeded(Exception):
+    """Raised when an LLM call is cut off for running past its latency budget"""
+
+
+class LLMModelNotFound(Exception):
+    """Raised when Ollama doesn't have the model a task was routed to"""
+
+
+def _model_name(name: str) -> str:
+    """Ollama's full name for a model, 'llama3.1' is 'llama3.1:latest'"""
+    return name if ':' in name else f'{name}:latest'
+
+
+# Marks the end of a stream read by ``_read_until``'s reader thread
+_STREAM_END = object()
+
+
+def _stream_error(error: Exception) -> Exception:
+    """A timeout reading a stream is a budget miss, other errors stay as they are
+    
+    Connect and pool timeouts mean Ollama can't be reached, so they stay
+    errors that count against the circuit breaker.
+    """
+    import httpx
+    if isinstance(error, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return error
+    if isinstance(error, httpx.TimeoutException):
+        return LLMBudgetExceeded(f'no reply within the latency budget ({error})')
+    return error
+
+
+def _read_until(stream: Iterator[Dict], deadline: Optional[float]) -> Iterator[Dict]:
+    """Parts of a streamed reply, raising ``LLMBudgetExceeded`` once ``deadline`` passes
+    
+    A stalled read can't be interrupted, so the stream is read in a thread
+    and the caller stops waiting at ``deadline``; the thread closes the
+    stream (stopping Ollama) at the next part, or ends on the client
+    timeout if none comes.
+    """
+    parts = queue.Queue()
+    stopped = threading.Event()
+    
+    def read():
+        try:
+            for part in stream:
+                parts.put(part)
+                if stopped.is_set():
+                    break
+            parts.put(_STREAM_END)
+        except Exception as e:
+            parts.put(e)
+        finally:
+            stream.close()
+    
+    threading.Thread(target=read, name='ollama-stream', daemon=True).start()
+    try:
+        while True:
+            try:
+                part = parts.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise LLMBudgetExceeded('stream stalled past the latency budget')
+            if part is _STREAM_END:
+                return
+            if isinstance(part, Exception):
+                raise _stream_error(part)
+            yield part
+    finally:
+        stopped.set()
+
+
+async def _aread_until(stream: AsyncIterator[Dict], deadline: Optional[float]) -> AsyncIterator[Dict]:
+    """Async ``_read_until``: each read is cancelled at ``deadline``, which closes the stream"""
+    try:
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                part = await asyncio.wait_for(stream.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise LLMBudgetExceeded('stream stalled past the latency budget')
+            except Exception as e:
+                raise _stream_error(e)
+            yield part
+    finally:
+        await stream.aclose()
+
+
+class LLMTask:
+    """One LLM call of a suggestions run: its prompt, options and how to read the reply
+    
+    ``model``, ``budget`` and ``fallback_model`` are filled in from
+    ``Config.LLM_TASK_ROUTES``; ``default`` is the rule-based result used
+    when no model answers in time.
+    """
+    
+    def __init__(self, name: str, label: str, prompt: str, options: Dict,
+                 parse: Callable[[str], Any], default: Any):
+        self.name = name
+        self.label = label
+        self.prompt = prompt
+        self.options = options
+        self.parse = parse
+        self.default = default
+        self.model = None
+        self.budget = None
+        self.fallback_model = None
+    
+    def models(self) -> List[str]:
+        """Models to try in order"""
+        return [self.model] + ([self.fallback_model] if self.fallback_model else [])
 
 
 class LLMSuggestionGenerator:
@@ -12,7 +139,97 @@ class LLMSuggestionGenerator:
         self.base_url = Config.OLLAMA_BASE_URL
         self.model = Config.OLLAMA_MODEL
         self.timeout = Config.OLLAMA_TIMEOUT
-        self.ollama_available = self._check_ollama_availability()
+        self.keep_alive = Config.OLLAMA_KEEP_ALIVE
+        self.breaker = CircuitBreaker(
+            Config.OLLAMA_BREAKER_FAILURE_THRESHOLD,
+            Config.OLLAMA_BREAKER_RESET_TIMEOUT
+        )
+        # Rule-based output for tasks no model answers in time
+        self.rules = SuggestionsGenerator()
+        
+        # Availability is re-probed in the background so a down Ollama server
+        # can't block startup or requests; until the first probe finishes we
+        # use fallbacks
+        self.ollama_available = False
+        self.last_probe_at = None
+        self.probe_finished = threading.Event()
+        self.model_preloaded_at = None
+        # Routed models Ollama doesn't have, tasks skip them until a probe finds them
+        self.missing_models = set()
+        
+        # Tokens, generation speed, model loads and queueing per task and model
+        self.telemetry = LLMTelemetry()
+        # Budget misses and fallbacks per task
+        self.routing_counters = Counters()
+        
+        # Clients (one per timeout) and probe thread belong to the process
+        # that created them, forked workers start their own
+        self._clients = {}
+        self._async_clients = {}
+        self._probe_thread = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        self.start_health_probe()
+    
+    def _after_fork(self):
+        """Drop the clients, lock and probe thread inherited from the parent process"""
+        self._clients = {}
+        self._async_clients = {}
+        self._probe_thread = None
+        self._lock = threading.Lock()
+    
+    def start_health_probe(self):
+        """Start the periodic health probe for this process if it isn't running"""
+        with self._lock:
+            if self._probe_thread is not None and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_ollama, name='ollama-probe', daemon=True
+            )
+            self._probe_thread.start()
+    
+    def _get_client(self, timeout: float = None):
+        """Shared Ollama client for this process and timeout, keeping connections alive between calls"""
+        timeout = timeout or self.timeout
+        with self._lock:
+            if timeout not in self._clients:
+                import ollama
+                self._clients[timeout] = ollama.Client(host=self.base_url, timeout=timeout)
+            return self._clients[timeout]
+    
+    def _get_async_client(self, timeout: float = None):
+        """Shared async Ollama client for a timeout, for the event loop of the ASGI app"""
+        timeout = timeout or self.timeout
+        if timeout not in self._async_clients:
+            import ollama
+            self._async_clients[timeout] = ollama.AsyncClient(host=self.base_url, timeout=timeout)
+        return self._async_clients[timeout]
+    
+    def models(self) -> List[str]:
+        """Every model the routing table can send a task to"""
+        models = {self.model}
+        for route in Config.LLM_TASK_ROUTES.values():
+            models.update(model for model in (route.get('model'), route.get('fallback')) if model)
+        return sorted(models)
+    
+    def _probe_ollama(self):
+        """Background task that keeps track of whether Ollama is reachable"""
+        while True:
+            was_available = self.ollama_available
+            try:
+                self.ollama_available = self._check_ollama_availability()
+                self.last_probe_at = time.time()
+            finally:
+                self.probe_finished.set()
+            
+            # Load the model as soon as Ollama comes up so the first analysis doesn't wait for it
+            if self.ollama_available and not was_available and Config.OLLAMA_PRELOAD:
+                self.preload_model()
+            
+            if not self.enabled:
+                return
+            time.sleep(Config.OLLAMA_PROBE_INTERVAL)
     
     def _check_ollama_availability(self) -> bool:
         """Check if Ollama is running and accessible"""
@@ -20,18 +237,249 @@ class LLMSuggestionGenerator:
             return False
         
         try:
-            ollama.list()
-            return True
+            response = self._get_client().list()
         except Exception as e:
-            print(f"Ollama not available: {e}")
+            if self.ollama_available or not self.probe_finished.is_set():
+                print(f"Ollama not available: {e}")
             return False
+        
+        installed = {_model_name(model['model']) for model in response['models']}
+        missing = {model for model in self.models() if _model_name(model) not in installed}
+        if missing and missing != self.missing_models:
+            print(f"Ollama models not installed, tasks fall back: {', '.join(sorted(missing))}")
+        self.missing_models = missing
+        return True
+    
+    def preload_model(self) -> bool:
+        """Have Ollama load every routed model and keep them loaded for ``keep_alive``"""
+        loaded = True
+        for model in self.models():
+            if model in self.missing_models:
+                continue
+            started = time.perf_counter()
+            try:
+                # A generate call without a prompt only loads the model
+                self._get_client().generate(model=model, keep_alive=self.keep_alive)
+            except Exception as e:
+                print(f"Could not preload Ollama model {model}: {e}")
+                loaded = False
+                continue
+            print(f"Preloaded Ollama model {model} in {time.perf_counter() - started:.2f}s")
+        
+        if loaded:
+            self.model_preloaded_at = time.time()
+        return loaded
+    
+    def is_available(self) -> bool:
+        """Whether LLM calls would be attempted right now"""
+        self.start_health_probe()
+        return self.ollama_available and self.breaker.state != CircuitBreaker.OPEN
+    
+    def status(self) -> Dict:
+        """Availability and circuit breaker state for monitoring"""
+        return {
+            'enabled': self.enabled,
+            'base_url': self.base_url,
+            'model': self.model,
+            'models': self.models(),
+            'missing_models': sorted(self.missing_models),
+            'available': self.ollama_available,
+            'last_probe_at': self.last_probe_at,
+            'keep_alive': self.keep_alive,
+            'model_preloaded_at': self.model_preloaded_at,
+            'telemetry': self.telemetry.summary(),
+            'routing': self.routing_counters.snapshot(),
+            'circuit_breaker': self.breaker.snapshot()
+        }
+    
+    def _cache_key(self, model: str, prompt: str, options: Dict) -> str:
+        """Prompt cache key for a model, prompt and generation options"""
+        return hashlib.sha1(
+            json.dumps([model, prompt, options], sort_keys=True).encode('utf-8')
+        ).hexdigest()
+    
+    def _generate(
+        self,
+        task: LLMTask,
+        model: str,
+        cache: Optional[Dict[str, str]] = None,
+        trace: Optional[List[Dict]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> str:
+        """Run a task's prompt through ``model``, reusing cached responses for identical prompts
+        
+        The reply is streamed so a call running past the task's budget can be
+        cut off; closing the stream makes Ollama stop generating. Such a call
+        raises ``LLMBudgetExceeded``; it only counts against the circuit
+        breaker when nothing arrived before the deadline, since a model that
+        was answering is slow rather than down. The budget is a deadline for the
+        whole stream, so a stalled call is cut off on time too. A model Ollama doesn't have (HTTP 404) raises
+        ``LLMModelNotFound`` and doesn't count against the breaker either,
+        it is a routing miss rather than an outage. ``cancel_token`` is checked before the call and
+        after every streamed chunk; a cancelled call is cut off the same way
+        and raises ``Cancelled``. Every call is recorded in ``telemetry`` and
+        appended to ``trace`` if given.
+        """
+        cache_key = self._cache_key(model, task.prompt, task.options)
+        if cache is not None and cache_key in cache:
+            self._record_call(trace, call_record(task.name, model, 'cached', 0.0))
+            return cache[cache_key]
+        
+        check(cancel_token, f'llm.{task.name}')
+        if not self.breaker.allow_request():
+            raise LLMUnavailableError('Ollama circuit breaker is open')
+        
+        started = time.monotonic()
+        parts = []
+        final = None
+        outcome = 'error'
+        stream = None
+        deadline = started + task.budget if task.budget else None
+        try:
+            stream = _read_until(self._get_client(task.budget).generate(
+                model=model,
+                prompt=task.prompt,
+                options=task.options,
+                keep_alive=self.keep_alive,
+                stream=True
+            ), deadline)
+            for part in stream:
+                parts.append(part['response'])
+                if part.get('done'):
+                    final = part
+                elif task.budget and time.monotonic() - started > task.budget:
+                    raise LLMBudgetExceeded(f'{model} ran past its {task.budget}s budget')
+                else:
+                    check(cancel_token, f'llm.{task.name}')
+            outcome = 'ok'
+        except LLMBudgetExceeded:
+            if parts:
+                outcome = 'budget_exceeded'
+                self.breaker.release()
+            else:
+                # Nothing arrived: Ollama is hung, not merely slow
+                outcome = 'timeout'
+                self.breaker.record_failure()
+            raise
+        except Cancelled:
+            outcome = 'cancelled'
+            self.breaker.release()
+            count_cancellation('llm_calls_aborted')
+            raise
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 404:
+                outcome = 'model_not_found'
+                self.breaker.release()
+                self.missing_models.add(model)
+                raise LLMModelNotFound(f'{model} is not installed in Ollama') from e
+            self.breaker.record_failure()
+            raise
+        finally:
+            if stream is not None:
+                stream.close()
+            self._record_call(trace, call_record(
+                task.name, model, outcome, time.monotonic() - started, final, len(parts)
+            ))
+        self.breaker.record_success()
+        text = ''.join(parts)
+        
+        if cache is not None:
+            cache[cache_key] = text
+        
+        return text
+    
+    async def _agenerate(
+        self,
+        task: LLMTask,
+        model: str,
+        cache: Optional[Dict[str, str]] = None,
+        trace: Optional[List[Dict]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> str:
+        """Async ``_generate``: waits on Ollama without holding a thread"""
+        cache_key = self._cache_key(model, task.prompt, task.options)
+        if cache is not None and cache_key in cache:
+            self._record_call(trace, call_record(task.name, model, 'cached', 0.0))
+            return cache[cache_key]
+        
+        check(cancel_token, f'llm.{task.name}')
+        if not self.breaker.allow_request():
+            raise LLMUnavailableError('Ollama circuit breaker is open')
+        
+        started = time.monotonic()
+        parts = []
+        final = None
+        outcome = 'error'
+        stream = None
+        deadline = started + task.budget if task.budget else None
+        try:
+            stream = _aread_until(await self._get_async_client(task.budget).generate(
+                model=model,
+                prompt=task.prompt,
+                options=task.options,
+                keep_alive=self.keep_alive,
+                stream=True
+            ), deadline)
+            async for part in stream:
+                parts.append(part['response'])
+                if part.get('done'):
+                    final = part
+                elif task.budget and time.monotonic() - started > task.budget:
+                    raise LLMBudgetExceeded(f'{model} ran past its {task.budget}s budget')
+                else:
+                    check(cancel_token, f'llm.{task.name}')
+            outcome = 'ok'
+        except LLMBudgetExceeded:
+            if parts:
+                outcome = 'budget_exceeded'
+                self.breaker.release()
+            else:
+                # Nothing arrived: Ollama is hung, not merely slow
+                outcome = 'timeout'
+                self.breaker.record_failure()
+            raise
+        except Cancelled:
+            outcome = 'cancelled'
+            self.breaker.release()
+            count_cancellation('llm_calls_aborted')
+            raise
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 404:
+                outcome = 'model_not_found'
+                self.breaker.release()
+                self.missing_models.add(model)
+                raise LLMModelNotFound(f'{model} is not installed in Ollama') from e
+            self.breaker.record_failure()
+            raise
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            self._record_call(trace, call_record(
+                task.name, model, outcome, time.monotonic() - started, final, len(parts)
+            ))
+        self.breaker.record_success()
+        text = ''.join(parts)
+        
+        if cache is not None:
+            cache[cache_key] = text
+        
+        return text
+    
+    def _record_call(self, trace: Optional[List[Dict]], call: Dict):
+        """Add a call record to the process telemetry and the request's trace"""
+        self.telemetry.record(call)
+        if trace is not None:
+            trace.append(call)
     
     def generate_suggestions(
         self,
         job_description: str,
         missing_keywords: Dict[str, List[str]],
         resume_sections: Dict[str, str],
-        current_score: float
+        current_score: float,
+        cache: Optional[Dict[str, str]] = None,
+        trace: Optional[List[Dict]] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Dict[str, any]:
         """
         Generate specific text suggestions for resume improvement
@@ -41,47 +489,164 @@ class LLMSuggestionGenerator:
             missing_keywords: Dictionary of missing keywords by category
             resume_sections: Current resume sections
             current_score: Current ATS score
+            cache: Optional prompt cache from a previous analysis; responses for
+                unchanged prompts are reused and new responses are added to it
+            trace: Optional list the telemetry of each LLM call is appended to
+            cancel_token: Optional token; once cancelled, the running call is cut
+                off and ``Cancelled`` raised instead of falling back
             
         Returns:
             Dictionary containing specific text suggestions
         """
-        if not self.ollama_available:
+        if not self.is_available():
+            return self._get_fallback_suggestions(missing_keywords)
+        
+        try:
+            suggestions, tasks = self._plan_suggestions(job_description, missing_keywords, resume_sections)
+            for task in tasks:
+                models = self._task_models(task)
+                for model in models:
+                    try:
+                        text = self._generate(task, model, cache, trace, cancel_token)
+                        suggestions[task.name] = task.parse(text.strip())
+                        break
+                    except Cancelled:
+                        raise
+                    except Exception as e:
+                        self._record_miss(task, model, e, models)
+            
+            return suggestions
+            
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"LLM generation error: {e}")
+            return self._get_fallback_suggestions(missing_keywords)
+    
+    async def agenerate_suggestions(
+        self,
+        job_description: str,
+        missing_keywords: Dict[str, List[str]],
+        resume_sections: Dict[str, str],
+        current_score: float,
+        cache: Optional[Dict[str, str]] = None,
+        trace: Optional[List[Dict]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Dict[str, any]:
+        """Async ``generate_suggestions`` using the async Ollama client"""
+        if not self.is_available():
             return self._get_fallback_suggestions(missing_keywords)
         
         try:
-            suggestions = {
-                'missing_keywords_list': self._generate_missing_keywords_list(
-                    missing_keywords
-                ),
-                'skills_to_add': self._generate_skills_to_add(
-                    job_description, missing_keywords
-                ),
-                'professional_summary': self._generate_professional_summary(
-                    job_description, missing_keywords
-                ),
-                'experience_bullets': self._generate_experience_bullets(
-                    job_description, missing_keywords, resume_sections
-                ),
-                'skills_integration': self._generate_skills_text(
-                    job_description, missing_keywords
-                ),
-                'summary_enhancement': self._generate_summary_text(
-                    job_description, missing_keywords, resume_sections
-                ),
-                'project_ideas': self._generate_project_ideas(
-                    job_description, missing_keywords, resume_sections
-                ),
-                'section_specific': self._generate_section_specific(
-                    missing_keywords
-                )
-            }
+            suggestions, tasks = self._plan_suggestions(job_description, missing_keywords, resume_sections)
+            for task in tasks:
+                models = self._task_models(task)
+                for model in models:
+                    try:
+                        text = await self._agenerate(task, model, cache, trace, cancel_token)
+                        suggestions[task.name] = task.parse(text.strip())
+                        break
+                    except Cancelled:
+                        raise
+                    except Exception as e:
+                        self._record_miss(task, model, e, models)
             
             return suggestions
             
+        except Cancelled:
+            raise
         except Exception as e:
             print(f"LLM generation error: {e}")
             return self._get_fallback_suggestions(missing_keywords)
     
+    def _task_models(self, task: LLMTask) -> List[str]:
+        """Models to try for a task in order, skipping those Ollama doesn't have
+        
+        A task whose routed models are missing tries ``OLLAMA_MODEL`` before
+        falling back to the rules.
+        """
+        models = [model for model in task.models() if model not in self.missing_models]
+        if len(models) < len(task.models()):
+            self._add_default_model(models)
+        return models
+    
+    def _add_default_model(self, models: List[str]):
+        """Append ``OLLAMA_MODEL`` to ``models`` unless it is there or missing too"""
+        if self.model not in models and self.model not in self.missing_models:
+            models.append(self.model)
+    
+    def _record_miss(self, task: LLMTask, model: str, error: Exception, models: List[str]):
+        """Log a failed attempt at a task and count what it falls back to
+        
+        A model found missing mid-run extends ``models`` with
+        ``OLLAMA_MODEL``, the loop over it picks that up.
+        """
+        print(f"Error generating {task.label} with {model}: {error}")
+        if isinstance(error, LLMBudgetExceeded):
+            self.routing_counters.increment(f'{task.name}.budget_misses')
+        elif isinstance(error, LLMModelNotFound):
+            self.routing_counters.increment(f'{task.name}.model_not_found')
+            self._add_default_model(models)
+        if model != models[-1]:
+            self.routing_counters.increment(f'{task.name}.model_fallbacks')
+        else:
+            self.routing_counters.increment(f'{task.name}.rule_fallbacks')
+    
+    def _route(self, task: LLMTask) -> LLMTask:
+        """Apply the task's entry in ``Config.LLM_TASK_ROUTES``
+        
+        Tasks without an entry run on ``OLLAMA_MODEL`` with their own
+        ``num_predict`` and ``OLLAMA_TIMEOUT`` as budget.
+        """
+        route = Config.LLM_TASK_ROUTES.get(task.name, {})
+        task.model = route.get('model') or self.model
+        task.budget = route.get('budget') or self.timeout
+        task.fallback_model = route.get('fallback')
+        if route.get('num_predict'):
+            task.options = dict(task.options, num_predict=route['num_predict'])
+        return task
+    
+    def _plan_suggestions(
+        self,
+        job_description: str,
+        missing_keywords: Dict[str, List[str]],
+        resume_sections: Dict[str, str]
+    ) -> Tuple[Dict[str, any], List[LLMTask]]:
+        """Suggestions that need no LLM, plus the routed LLM tasks for the rest
+        
+        The suggestions dict already has a slot for every task, in response
+        order, holding the task's default until it runs. Tasks are ordered
+        by model so each model sees the shared prompt prefix on consecutive
+        calls and Ollama can reuse it.
+        """
+        prefix = self._shared_prefix(job_description, missing_keywords)
+        results = {
+            'missing_keywords_list': self._generate_missing_keywords_list(missing_keywords),
+            'skills_to_add': self._skills_to_add_task(prefix, missing_keywords),
+            'professional_summary': self._professional_summary_task(prefix, missing_keywords),
+            'experience_bullets': self._experience_bullets_task(prefix, missing_keywords, resume_sections),
+            'skills_integration': self._skills_integration_task(prefix, missing_keywords),
+            'summary_enhancement': self._summary_enhancement_task(prefix, missing_keywords, resume_sections),
+            'project_ideas': self._project_ideas_task(prefix, missing_keywords, resume_sections),
+            'section_specific': self._generate_section_specific(missing_keywords)
+        }
+        
+        suggestions = {}
+        tasks = []
+        for name, result in results.items():
+            if isinstance(result, LLMTask):
+                tasks.append(self._route(result))
+                suggestions[name] = result.default
+            else:
+                suggestions[name] = result
+        tasks.sort(key=lambda task: task.model)
+        return suggestions, tasks
+    
+    @staticmethod
+    def _dash_lines(text: str) -> List[str]:
+        """Lines of a reply that are dash bullets, without the dash"""
+        return [line.strip('- ').strip() for line in text.split('\n') if line.strip().startswith('-')]
+    
     def _generate_missing_keywords_list(
         self,
         missing_keywords: Dict[str, List[str]]
@@ -112,12 +677,36 @@ class LLMSuggestionGenerator:
         
         return result
     
-    def _generate_skills_to_add(
+    def _shared_prefix(
         self,
         job_description: str,
         missing_keywords: Dict[str, List[str]]
-    ) -> List[str]:
-        """Generate specific list of skills to add to resume"""
+    ) -> str:
+        """Opening of every prompt of a suggestions run, identical for all its tasks
+        
+        Ollama keeps the evaluated prompt of a loaded model and only evaluates
+        what follows the longest prefix shared with the previous prompt. With
+        the instructions, job description and missing skills first and the
+        task last, every task after the first skips most of prompt evaluation.
+        """
+        tech = missing_keywords.get('technical_skills', [])[:8]
+        soft = missing_keywords.get('soft_skills', [])[:4]
+        
+        return f"""You are an expert resume writer and career advisor. You help a candidate tailor their resume to the job description below so it gets through applicant tracking systems and impresses recruiters. Always use the EXACT terminology of the job description, write in active voice and keep the output ATS-friendly.
+
+Job Description: {job_description[:Config.LLM_PROMPT_JD_CHARS]}
+
+Missing Technical Skills: {', '.join(tech) or 'none'}
+Missing Soft Skills: {', '.join(soft) or 'none'}
+
+"""
+    
+    def _skills_to_add_task(
+        self,
+        prefix: str,
+        missing_keywords: Dict[str, List[str]]
+    ) -> Union[LLMTask, List[str]]:
+        """LLM task for the list of skills to add to the resume"""
         
         all_missing = []
         all_missing.extend(missing_keywords.get('technical_skills', [])[:8])
@@ -126,11 +715,7 @@ class LLMSuggestionGenerator:
         if not all_missing:
             return []
         
-        prompt = f"""You are a resume expert. Based on this job description, list the EXACT skills the candidate should add to their resume.
-
-Job Description: {job_description[:600]}
-
-Missing Skills: {', '.join(all_missing)}
+        prompt = prefix + """Task: List the EXACT skills the candidate should add to their resume.
 
 Instructions:
 - List each skill on a new line starting with a dash (-)
@@ -142,28 +727,18 @@ Instructions:
 
 Generate the skills list:"""
         
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.5, 'num_predict': 250}
-            )
-            
-            text = response['response'].strip()
-            skills = [line.strip('- ').strip() for line in text.split('\n') if line.strip().startswith('-')]
-            
-            return skills[:10] if skills else all_missing[:10]
-            
-        except Exception as e:
-            print(f"Error generating skills list: {e}")
-            return all_missing[:10]
+        return LLMTask(
+            'skills_to_add', 'skills list', prompt, {'temperature': 0.5, 'num_predict': 250},
+            parse=lambda text: self._dash_lines(text)[:10] or all_missing[:10],
+            default=all_missing[:10]
+        )
     
-    def _generate_professional_summary(
+    def _professional_summary_task(
         self,
-        job_description: str,
+        prefix: str,
         missing_keywords: Dict[str, List[str]]
-    ) -> str:
-        """Generate job-tailored professional summary"""
+    ) -> Union[LLMTask, str]:
+        """LLM task for a job-tailored professional summary"""
         
         tech_skills = missing_keywords.get('technical_skills', [])[:5]
         soft_skills = missing_keywords.get('soft_skills', [])[:2]
@@ -171,9 +746,7 @@ Generate the skills list:"""
         if not tech_skills:
             return ""
         
-        prompt = f"""You are a professional resume writer. Write a compelling professional summary tailored specifically for this job.
-
-Job Description: {job_description[:500]}
+        prompt = prefix + f"""Task: Write a compelling professional summary tailored specifically for this job.
 
 Key Skills to Include: {', '.join(tech_skills + soft_skills)}
 
@@ -188,35 +761,26 @@ Instructions:
 
 Write the professional summary:"""
         
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.7, 'num_predict': 200}
-            )
-            
-            return response['response'].strip()
-            
-        except Exception as e:
-            print(f"Error generating professional summary: {e}")
-            return ""
+        return LLMTask(
+            'professional_summary', 'professional summary', prompt, {'temperature': 0.7, 'num_predict': 200},
+            parse=lambda text: text,
+            default=""
+        )
     
-    def _generate_experience_bullets(
+    def _experience_bullets_task(
         self,
-        job_description: str,
+        prefix: str,
         missing_keywords: Dict[str, List[str]],
         resume_sections: Dict[str, str]
-    ) -> List[str]:
-        """Generate specific bullet points for Experience section"""
+    ) -> Union[LLMTask, List[str]]:
+        """LLM task for bullet points for the Experience section"""
         
         technical_skills = missing_keywords.get('technical_skills', [])[:5]
         
         if not technical_skills:
             return []
         
-        prompt = f"""You are a professional resume writer. Generate 4 specific, achievement-oriented bullet points that incorporate the missing skills.
-
-Job Description: {job_description[:500]}
+        prompt = prefix + f"""Task: Generate 4 specific, achievement-oriented bullet points for the Experience section that incorporate the missing skills.
 
 Missing Skills to Incorporate: {', '.join(technical_skills)}
 
@@ -228,32 +792,21 @@ Instructions:
 - Each bullet should be 1-2 lines maximum
 - Focus on ACHIEVEMENTS and IMPACT, not just tasks
 - Make them sound impressive and quantifiable
-- Ensure they're ATS-friendly
 
 Generate 4 bullet points, one per line, starting with a dash (-)."""
 
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.7, 'num_predict': 400}
-            )
-            
-            text = response['response'].strip()
-            bullets = [line.strip('- ').strip() for line in text.split('\n') if line.strip().startswith('-')]
-            
-            return bullets[:4] if bullets else []
-            
-        except Exception as e:
-            print(f"Error generating experience bullets: {e}")
-            return []
+        return LLMTask(
+            'experience_bullets', 'experience bullets', prompt, {'temperature': 0.7, 'num_predict': 400},
+            parse=lambda text: self._dash_lines(text)[:4],
+            default=[]
+        )
     
-    def _generate_skills_text(
+    def _skills_integration_task(
         self,
-        job_description: str,
+        prefix: str,
         missing_keywords: Dict[str, List[str]]
-    ) -> List[str]:
-        """Generate text to integrate missing skills"""
+    ) -> Union[LLMTask, List[str]]:
+        """LLM task for text that integrates missing skills"""
         
         all_missing = []
         all_missing.extend(missing_keywords.get('technical_skills', [])[:3])
@@ -262,9 +815,7 @@ Generate 4 bullet points, one per line, starting with a dash (-)."""
         if not all_missing:
             return []
         
-        prompt = f"""You are a professional resume writer. Write 2-3 sentences that showcase these skills for a Skills section.
-
-Job Requirements: {job_description[:400]}
+        prompt = prefix + f"""Task: Write 2-3 sentences that showcase these skills for a Skills section.
 
 Skills to Showcase: {', '.join(all_missing)}
 
@@ -278,38 +829,26 @@ Instructions:
 
 Generate 2-3 sentences, one per line."""
 
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.7, 'num_predict': 200}
-            )
-            
-            text = response['response'].strip()
-            sentences = [s.strip() for s in text.split('\n') if s.strip() and len(s.strip()) > 20]
-            
-            return sentences[:3] if sentences else []
-            
-        except Exception as e:
-            print(f"Error generating skills text: {e}")
-            return []
+        return LLMTask(
+            'skills_integration', 'skills text', prompt, {'temperature': 0.7, 'num_predict': 200},
+            parse=lambda text: [s.strip() for s in text.split('\n') if len(s.strip()) > 20][:3],
+            default=[]
+        )
     
-    def _generate_summary_text(
+    def _summary_enhancement_task(
         self,
-        job_description: str,
+        prefix: str,
         missing_keywords: Dict[str, List[str]],
         resume_sections: Dict[str, str]
-    ) -> str:
-        """Generate enhanced professional summary"""
+    ) -> Union[LLMTask, str]:
+        """LLM task for an enhanced professional summary"""
         
         key_skills = missing_keywords.get('technical_skills', [])[:4]
         
         if not key_skills:
             return ""
         
-        prompt = f"""You are a professional resume writer. Generate a compelling 2-3 sentence professional summary for a resume.
-
-Job Description: {job_description[:400]}
+        prompt = prefix + f"""Task: Generate a compelling 2-3 sentence professional summary for a resume.
 
 Key Skills to highlight: {', '.join(key_skills)}
 
@@ -323,26 +862,19 @@ Requirements:
 
 Generate the professional summary:"""
 
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.7, 'num_predict': 150}
-            )
-            
-            return response['response'].strip()
-            
-        except Exception as e:
-            print(f"Error generating summary: {e}")
-            return ""
+        return LLMTask(
+            'summary_enhancement', 'summary', prompt, {'temperature': 0.7, 'num_predict': 150},
+            parse=lambda text: text,
+            default=""
+        )
     
-    def _generate_project_ideas(
+    def _project_ideas_task(
         self,
-        job_description: str,
+        prefix: str,
         missing_keywords: Dict[str, List[str]],
         resume_sections: Dict[str, str]
-    ) -> List[str]:
-        """Generate specific project ideas to add to resume"""
+    ) -> Union[LLMTask, List[str]]:
+        """LLM task for project ideas to add to the resume"""
         
         technical_skills = missing_keywords.get('technical_skills', [])[:6]
         
@@ -353,9 +885,7 @@ Generate the professional summary:"""
         projects_section = resume_sections.get('other', '')
         has_projects = 'project' in projects_section.lower()
         
-        prompt = f"""You are a technical career advisor. Based on this job description, suggest 3-4 specific project ideas that would strengthen the candidate's resume.
-
-Job Description: {job_description[:500]}
+        prompt = prefix + f"""Task: Suggest 3-4 specific project ideas that would strengthen the candidate's resume for this job.
 
 Missing Technical Skills: {', '.join(technical_skills)}
 
@@ -373,21 +903,11 @@ Instructions:
 
 Generate 3-4 project ideas:"""
 
-        try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={'temperature': 0.7, 'num_predict': 400}
-            )
-            
-            text = response['response'].strip()
-            projects = [line.strip('- ').strip() for line in text.split('\n') if line.strip().startswith('-')]
-            
-            return projects[:4] if projects else []
-            
-        except Exception as e:
-            print(f"Error generating project ideas: {e}")
-            return []
+        return LLMTask(
+            'project_ideas', 'project ideas', prompt, {'temperature': 0.7, 'num_predict': 400},
+            parse=lambda text: self._dash_lines(text)[:4],
+            default=self.rules.project_ideas(technical_skills)
+        )
     
     def _generate_section_specific(
         self,
@@ -420,6 +940,16 @@ Generate 3-4 project ideas:"""
         
         return suggestions
     
+    def fallback_suggestions(
+        self,
+        missing_keywords: Dict[str, List[str]],
+        message: str
+    ) -> Dict[str, any]:
+        """Basic suggestions in the LLM-unavailable shape, with a custom message"""
+        suggestions = self._get_fallback_suggestions(missing_keywords)
+        suggestions['message'] = message
+        return suggestions
+    
     def _get_fallback_suggestions(
         self,
         missing_keywords: Dict[str, List[str]]
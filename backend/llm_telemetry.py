@@ -0,0 +1,118 @@
+import threading
+from typing import Dict, Optional
+from config import Config
+from metrics import LatencyWindow
+
+NS = 1e9
+
+
+def call_record(task: str, model: str, outcome: str, wall_seconds: float,
+                final: Optional[Dict] = None, streamed_tokens: int = 0) -> Dict:
+    """Telemetry of one LLM call, built from Ollama's closing stream message
+
+    ``final`` holds Ollama's timing fields (durations in nanoseconds); calls
+    cut off or failed before it arrived only have the wall time and the
+    number of streamed tokens. ``queue_ms`` is the wall time Ollama didn't
+    account for: waiting in its request queue plus the network.
+    """
+    record = {
+        'task': task,
+        'model': model,
+        'outcome': outcome,
+        'wall_ms': round(wall_seconds * 1000, 1),
+        'completion_tokens': streamed_tokens
+    }
+    if final is None:
+        return record
+
+    eval_ns = final.get('eval_duration') or 0
+    total_ns = final.get('total_duration') or 0
+    load_ns = final.get('load_duration') or 0
+    prompt_ns = final.get('prompt_eval_duration') or 0
+    completion_tokens = final.get('eval_count') or 0
+    record.update({
+        'prompt_tokens': final.get('prompt_eval_count') or 0,
+        'completion_tokens': completion_tokens,
+        'tokens_per_second': round(completion_tokens / (eval_ns / NS), 1) if eval_ns else None,
+        'load_ms': round(load_ns / 1e6, 1),
+        'prompt_eval_ms': round(prompt_ns / 1e6, 1),
+        'time_to_first_token_ms': round((load_ns + prompt_ns) / 1e6, 1),
+        'queue_ms': round(max(0.0, wall_seconds - total_ns / NS) * 1000, 1) if total_ns else None,
+        'cold_load': load_ns / 1e6 >= Config.LLM_COLD_LOAD_MS
+    })
+    return record
+
+
+class LLMTelemetry:
+    """Token counts, generation speed and timings of LLM calls per task and model
+
+    Calls are recorded with ``record`` as built by ``call_record``. Totals
+    are kept per (task, model) for the life of the process, with means
+    taken over the calls that weren't answered from the prompt cache; time
+    to first token and queueing time also go into rolling latency windows.
+    """
+
+    def __init__(self):
+        self.time_to_first_token = LatencyWindow()
+        self.queue_time = LatencyWindow()
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, call: Dict):
+        """Add one call record"""
+        if 'time_to_first_token_ms' in call:
+            self.time_to_first_token.observe(call['time_to_first_token_ms'] / 1000)
+        if call.get('queue_ms') is not None:
+            self.queue_time.observe(call['queue_ms'] / 1000)
+
+        with self._lock:
+            totals = self._totals.setdefault((call['task'], call['model']), {
+                'calls': 0, 'generated': 0, 'outcomes': {}, 'prompt_tokens': 0, 'completion_tokens': 0,
+                'eval_seconds': 0.0, 'timed_tokens': 0, 'load_seconds': 0.0, 'cold_loads': 0,
+                'max_load_ms': 0.0, 'wall_seconds': 0.0
+            })
+            totals['calls'] += 1
+            totals['outcomes'][call['outcome']] = totals['outcomes'].get(call['outcome'], 0) + 1
+            if call['outcome'] == 'cached':
+                return
+            totals['generated'] += 1
+            totals['wall_seconds'] += call['wall_ms'] / 1000
+            totals['prompt_tokens'] += call.get('prompt_tokens', 0)
+            totals['completion_tokens'] += call['completion_tokens']
+            if call.get('tokens_per_second'):
+                totals['timed_tokens'] += call['completion_tokens']
+                totals['eval_seconds'] += call['completion_tokens'] / call['tokens_per_second']
+            if 'load_ms' in call:
+                totals['load_seconds'] += call['load_ms'] / 1000
+                totals['cold_loads'] += call['cold_load']
+                totals['max_load_ms'] = max(totals['max_load_ms'], call['load_ms'])
+
+    def summary(self) -> Dict:
+        """Aggregates per task and model, plus time to first token and queueing percentiles"""
+        with self._lock:
+            items = [(key, dict(totals, outcomes=dict(totals['outcomes'])))
+                     for key, totals in sorted(self._totals.items())]
+
+        tasks = {}
+        for (task, model), totals in items:
+            generated = max(totals['generated'], 1)
+            tasks.setdefault(task, {})[model] = {
+                'calls': totals['calls'],
+                'outcomes': totals['outcomes'],
+                'prompt_tokens': totals['prompt_tokens'],
+                'completion_tokens': totals['completion_tokens'],
+                'mean_prompt_tokens': round(totals['prompt_tokens'] / generated, 1),
+                'mean_completion_tokens': round(totals['completion_tokens'] / generated, 1),
+                'tokens_per_second': round(totals['timed_tokens'] / totals['eval_seconds'], 1)
+                if totals['eval_seconds'] else None,
+                'mean_wall_ms': round(totals['wall_seconds'] / generated * 1000, 1),
+                'load_seconds': round(totals['load_seconds'], 3),
+                'cold_loads': totals['cold_loads'],
+                'max_load_ms': totals['max_load_ms']
+            }
+
+        return {
+            'time_to_first_token': self.time_to_first_token.summary(),
+            'queue_time': self.queue_time.summary(),
+            'tasks': tasks
+        }
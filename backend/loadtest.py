@@ -0,0 +1,429 @@
+"""Load test for the analysis API
+
+Replays a corpus of resumes and job descriptions against the API at a fixed
+concurrency (closed loop) or a Poisson arrival rate (open loop) and reports
+latency percentiles, throughput and error rates per endpoint. With
+``--start`` the tool launches the production server (serve.py) on a spare
+port, pointed at an in-process mock Ollama server whose token latency and
+failure rate are set from the command line.
+
+The corpus uses the benchmark layout: ``corpus/resumes`` (.pdf/.docx) and
+``corpus/jds`` (.txt). Each request gets a unique job description suffix so
+request coalescing and the keyword cache don't hide the real cost; pass
+``--cache-friendly`` to measure with them.
+
+Usage:
+    python loadtest.py --corpus corpus/ --start --concurrency 16 --duration 60
+    python loadtest.py --corpus corpus/ --start --rate 5 --duration 120 \\
+        --mix analyze=3,multi=1 --token-ms 30 --failure-rate 0.05 \\
+        --json report.json --html report.html
+    python loadtest.py --corpus corpus/ --url http://localhost:5000 --requests 500
+"""
+import os
+import sys
+import json
+import time
+import html
+import math
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import mock_ollama
+from config import Config
+
+
+def load_corpus(corpus_dir: str) -> Dict[str, List]:
+    """Resume files as (name, bytes) and job descriptions as text"""
+    corpus = {'resumes': [], 'jds': []}
+
+    resumes_dir = os.path.join(corpus_dir, 'resumes')
+    jds_dir = os.path.join(corpus_dir, 'jds')
+    for name in sorted(os.listdir(resumes_dir)) if os.path.isdir(resumes_dir) else []:
+        if name.lower().endswith(('.pdf', '.docx')):
+            with open(os.path.join(resumes_dir, name), 'rb') as f:
+                corpus['resumes'].append((name, f.read()))
+    for name in sorted(os.listdir(jds_dir)) if os.path.isdir(jds_dir) else []:
+        if name.endswith('.txt'):
+            with open(os.path.join(jds_dir, name), encoding='utf-8', errors='ignore') as f:
+                corpus['jds'].append(f.read().strip())
+
+    if not corpus['resumes'] or not corpus['jds']:
+        sys.exit(f"Load test corpus needs .pdf/.docx files in resumes/ and .txt files in jds/ under {corpus_dir}")
+    return corpus
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse an endpoint mix like ``analyze=3,multi=1`` into weights"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{name}', expected one of {', '.join(ENDPOINTS)}")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class LoadTest:
+    """Issues requests from a corpus and records one result per request"""
+
+    def __init__(self, base_url: str, corpus: Dict[str, List], mix: Dict[str, int], jobs_per_multi: int,
+                 cache_friendly: bool, timeout: float, seed: int):
+        import httpx
+
+        self.base_url = base_url.rstrip('/')
+        self.corpus = corpus
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.jobs_per_multi = jobs_per_multi
+        self.cache_friendly = cache_friendly
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.client = httpx.Client(timeout=timeout, limits=httpx.Limits(max_connections=1000))
+        self.results: List[Dict] = []
+        self.results_lock = threading.Lock()
+        self.sequence = 0
+
+    def pick(self):
+        """Endpoint, resume and job descriptions for the next request"""
+        with self.random_lock:
+            self.sequence += 1
+            endpoint = self.random.choices(self.endpoints, self.weights)[0]
+            resume = self.random.choice(self.corpus['resumes'])
+            count = self.jobs_per_multi if endpoint == 'multi' else 1
+            jds = [self.random.choice(self.corpus['jds']) for _ in range(count)]
+            sequence = self.sequence
+        if not self.cache_friendly:
+            jds = [f"{jd}\n\nReference: load test request {sequence}-{index}" for index, jd in enumerate(jds)]
+        return endpoint, resume, jds
+
+    def send(self, scheduled_at: float):
+        """Send one request; latency counts from when it was scheduled to go out"""
+        endpoint, (filename, data), jds = self.pick()
+        result = {'endpoint': endpoint, 'status': None, 'error': None, 'llm_degraded': False}
+        try:
+            response = ENDPOINTS[endpoint](self, filename, data, jds)
+            result['status'] = response.status_code
+            if response.status_code >= 400:
+                result['error'] = f"HTTP {response.status_code}"
+            elif response.headers.get('content-type', '').startswith('application/json'):
+                llm = response.json().get('llm_suggestions') or {}
+                result['llm_degraded'] = bool(llm.get('llm_unavailable'))
+        except Exception as e:
+            result['error'] = type(e).__name__
+        result['latency_ms'] = (time.perf_counter() - scheduled_at) * 1000
+        result['finished_at'] = time.perf_counter()
+        with self.results_lock:
+            self.results.append(result)
+
+    def post_analyze(self, filename: str, data: bytes, jds: List[str]):
+        return self.client.post(f"{self.base_url}/api/analyze",
+                                files={'resume': (filename, data)},
+                                data={'job_description': jds[0]})
+
+    def post_multi(self, filename: str, data: bytes, jds: List[str]):
+        jobs = [{'id': str(index), 'title': f'Job {index}', 'description': jd} for index, jd in enumerate(jds)]
+        return self.client.post(f"{self.base_url}/api/analyze/multi",
+                                files={'resume': (filename, data)},
+                                data={'jobs': json.dumps(jobs)})
+
+    def get_health(self, filename: str, data: bytes, jds: List[str]):
+        return self.client.get(f"{self.base_url}/api/health")
+
+    def run(self, concurrency: int, rate: Optional[float], duration: Optional[float],
+            requests: Optional[int]) -> float:
+        """Drive the load and return the wall time in seconds"""
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        def more(sent: int) -> bool:
+            if requests is not None and sent >= requests:
+                return False
+            return deadline is None or time.perf_counter() < deadline
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            if rate:
+                # Open loop: arrivals don't wait for responses; requests that find
+                # every slot busy queue here and the wait counts as latency
+                arrivals = random.Random(self.random.random())
+                sent = 0
+                next_at = started
+                while more(sent):
+                    next_at += arrivals.expovariate(rate)
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(self.send, next_at)
+                    sent += 1
+            else:
+                # Closed loop: each slot sends its next request when the last returns
+                counter = {'sent': 0}
+                counter_lock = threading.Lock()
+
+                def loop():
+                    while True:
+                        with counter_lock:
+                            if not more(counter['sent']):
+                                return
+                            counter['sent'] += 1
+                        self.send(time.perf_counter())
+
+                for _ in range(concurrency):
+                    pool.submit(loop)
+
+        return time.perf_counter() - started
+
+    def fetch(self, path: str) -> Optional[Dict]:
+        try:
+            return self.client.get(f"{self.base_url}{path}").json()
+        except Exception:
+            return None
+
+
+ENDPOINTS = {
+    'analyze': LoadTest.post_analyze,
+    'multi': LoadTest.post_multi,
+    'health': LoadTest.get_health
+}
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """Latency percentiles, throughput and error rates per endpoint and overall"""
+    groups: Dict[str, List[Dict]] = {}
+    for result in results:
+        groups.setdefault(result['endpoint'], []).append(result)
+    groups['all'] = results
+
+    summary = {}
+    for name, group in groups.items():
+        latencies = sorted(result['latency_ms'] for result in group)
+        errors: Dict[str, int] = {}
+        for result in group:
+            if result['error']:
+                errors[result['error']] = errors.get(result['error'], 0) + 1
+        error_count = sum(errors.values())
+        summary[name] = {
+            'requests': len(group),
+            'throughput_rps': round(len(group) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(error_count / len(group), 4) if group else 0.0,
+            'errors': errors,
+            'llm_degraded': sum(result['llm_degraded'] for result in group),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 1) if latencies else None,
+                'p50': _round(percentile(latencies, 0.50)),
+                'p95': _round(percentile(latencies, 0.95)),
+                'p99': _round(percentile(latencies, 0.99)),
+                'max': _round(latencies[-1] if latencies else None)
+            }
+        }
+    return summary
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def render_html(report: Dict) -> str:
+    """Self-contained HTML page with the summary table and run settings"""
+    rows = []
+    for name, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        rows.append(
+            '<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in (
+                name, stats['requests'], stats['throughput_rps'], f"{stats['error_rate']:.2%}",
+                latency['p50'], latency['p95'], latency['p99'], latency['max'], stats['llm_degraded'],
+                ', '.join(f'{error}: {count}' for error, count in stats['errors'].items()) or '-'
+            )) + '</tr>'
+        )
+    slo = report.get('slo')
+    slo_html = ''
+    if slo:
+        color = '#2e7d32' if slo['passed'] else '#c62828'
+        slo_html = (f'<p style="color:{color}"><strong>SLO {"passed" if slo["passed"] else "failed"}</strong>: '
+                    f'{html.escape("; ".join(slo["violations"]) or "all checks met")}</p>')
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Load test report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 10px; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+pre {{ background: #f5f5f5; padding: 1em; }}
+</style></head><body>
+<h1>Load test report</h1>
+<p>{html.escape(report['started_at'])}, {report['elapsed_seconds']} s against {html.escape(report['url'])}</p>
+{slo_html}
+<table>
+<tr><th>Endpoint</th><th>Requests</th><th>Req/s</th><th>Errors</th><th>p50 ms</th><th>p95 ms</th>
+<th>p99 ms</th><th>Max ms</th><th>LLM degraded</th><th>Error breakdown</th></tr>
+{''.join(rows)}
+</table>
+<h2>Settings</h2>
+<pre>{html.escape(json.dumps(report['settings'], indent=2))}</pre>
+<h2>Server metrics</h2>
+<pre>{html.escape(json.dumps(report.get('server_metrics'), indent=2))}</pre>
+</body></html>
+"""
+
+
+def check_slo(summary: Dict, p95_ms: Optional[float], p99_ms: Optional[float],
+              max_error_rate: Optional[float]) -> Dict:
+    """Compare the overall results with latency and error rate objectives"""
+    overall = summary['all']
+    violations = []
+    if p95_ms is not None and (overall['latency_ms']['p95'] or 0) > p95_ms:
+        violations.append(f"p95 {overall['latency_ms']['p95']} ms > {p95_ms} ms")
+    if p99_ms is not None and (overall['latency_ms']['p99'] or 0) > p99_ms:
+        violations.append(f"p99 {overall['latency_ms']['p99']} ms > {p99_ms} ms")
+    if max_error_rate is not None and overall['error_rate'] > max_error_rate:
+        violations.append(f"error rate {overall['error_rate']:.2%} > {max_error_rate:.2%}")
+    return {'passed': not violations, 'violations': violations}
+
+
+def start_server(port: int, ollama_url: str, workers: Optional[int], threads: Optional[int],
+                 log_path: str) -> subprocess.Popen:
+    """Launch serve.py on ``port`` pointed at ``ollama_url``"""
+    env = dict(os.environ, API_PORT=str(port), OLLAMA_BASE_URL=ollama_url)
+    if workers:
+        env['SERVER_WORKERS'] = str(workers)
+    if threads:
+        env['SERVER_THREADS'] = str(threads)
+    log = open(log_path, 'w')
+    return subprocess.Popen(
+        [sys.executable, 'serve.py'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float, server: Optional[subprocess.Popen] = None):
+    """Poll /api/ready until the server has warmed up"""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            sys.exit(f"Server exited with code {server.returncode} before becoming ready")
+        try:
+            if httpx.get(f"{base_url}/api/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"Server at {base_url} not ready after {timeout} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the analysis API')
+    parser.add_argument('--corpus', required=True, help='Corpus directory with resumes/ and jds/')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a running server')
+    target.add_argument('--start', action='store_true', help='Start serve.py with a mock Ollama server')
+    parser.add_argument('--ollama-url', help='With --start, use this Ollama server instead of the mock')
+    parser.add_argument('--workers', type=int, help='With --start, SERVER_WORKERS for the server')
+    parser.add_argument('--threads', type=int, help='With --start, SERVER_THREADS for the server')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at most')
+    parser.add_argument('--rate', type=float, help='Open-loop arrival rate in requests/s (default: closed loop)')
+    parser.add_argument('--duration', type=float, help='Seconds to run')
+    parser.add_argument('--requests', type=int, help='Number of requests to send')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('analyze'),
+                        help='Endpoint weights, e.g. analyze=3,multi=1 (endpoints: analyze, multi, health)')
+    parser.add_argument('--jobs-per-multi', type=int, default=5, help='Job descriptions per multi request')
+    parser.add_argument('--cache-friendly', action='store_true',
+                        help='Send job descriptions unchanged so coalescing and caches apply')
+    parser.add_argument('--timeout', type=float, default=Config.SERVER_TIMEOUT, help='Client timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for request selection')
+    parser.add_argument('--json', help='Write the report as JSON to this file')
+    parser.add_argument('--html', help='Write the report as HTML to this file')
+    parser.add_argument('--slo-p95-ms', type=float, help='Fail if overall p95 latency exceeds this')
+    parser.add_argument('--slo-p99-ms', type=float, help='Fail if overall p99 latency exceeds this')
+    parser.add_argument('--max-error-rate', type=float, help='Fail if the overall error rate exceeds this fraction')
+    mock_ollama.add_arguments(parser.add_argument_group('mock Ollama (with --start)'))
+    args = parser.parse_args()
+
+    if args.duration is None and args.requests is None:
+        parser.error('one of --duration or --requests is required')
+
+    corpus = load_corpus(args.corpus)
+    server = mock = mock_settings = None
+    base_url = args.url
+    settings = {key: value for key, value in vars(args).items() if key not in ('json', 'html')}
+
+    try:
+        if args.start:
+            ollama_url = args.ollama_url
+            if not ollama_url:
+                mock_settings = mock_ollama.settings_from_args(args)
+                mock = mock_ollama.start_mock_server(mock_settings)
+                ollama_url = f"http://127.0.0.1:{mock.server_port}"
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(port, ollama_url, args.workers, args.threads, 'loadtest-server.log')
+            print(f"Started server on {base_url} (log: loadtest-server.log), Ollama at {ollama_url}")
+        wait_until_ready(base_url, 300, server)
+
+        test = LoadTest(base_url, corpus, args.mix, args.jobs_per_multi, args.cache_friendly,
+                        args.timeout, args.seed)
+        started_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        elapsed = test.run(args.concurrency, args.rate, args.duration, args.requests)
+
+        report = {
+            'started_at': started_at,
+            'url': base_url,
+            'elapsed_seconds': round(elapsed, 2),
+            'settings': settings,
+            'endpoints': summarize(test.results, elapsed),
+            'server_metrics': test.fetch('/api/metrics')
+        }
+        if mock_settings is not None:
+            with mock_settings.lock:
+                report['mock_ollama'] = dict(mock_settings.counters)
+        report['slo'] = check_slo(report['endpoints'], args.slo_p95_ms, args.slo_p99_ms, args.max_error_rate)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=Config.SERVER_GRACEFUL_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if mock is not None:
+            mock.shutdown()
+
+    print(f"{'endpoint':<10} {'requests':>8} {'req/s':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"{name:<10} {stats['requests']:>8} {stats['throughput_rps']:>8} {stats['error_rate']:>7.2%} "
+              f"{latency['p50'] or 0:>9} {latency['p95'] or 0:>9} {latency['p99'] or 0:>9}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.html:
+        with open(args.html, 'w', encoding='utf-8') as f:
+            f.write(render_html(report))
+
+    if not report['slo']['passed']:
+        print(f"SLO failed: {'; '.join(report['slo']['violations'])}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import threading
+from collections import deque
+from typing import Dict
+
+
+class LatencyWindow:
+    """Rolling window of durations with summary statistics
+
+    Keeps the last ``size`` observations for percentiles and a running count
+    and total over the life of the process.
+    """
+
+    def __init__(self, size: int = 1000):
+        self._values = deque(maxlen=size)
+        self._count = 0
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Record one duration"""
+        with self._lock:
+            self._values.append(seconds)
+            self._count += 1
+            self._total += seconds
+
+    def mean(self) -> float:
+        """Mean of the recent window, 0 when empty"""
+        with self._lock:
+            return sum(self._values) / len(self._values) if self._values else 0.0
+
+    def summary(self) -> Dict:
+        """Count, mean and percentiles in milliseconds"""
+        with self._lock:
+            values = sorted(self._values)
+            count, total = self._count, self._total
+
+        def percentile(fraction: float) -> float:
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(fraction * len(values)))] * 1000, 1)
+
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 1) if count else 0.0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(values[-1] * 1000, 1) if values else 0.0
+        }
+
+
+class Counters:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1):
+        """Add to a counter"""
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of all counters"""
+        with self._lock:
+            return dict(self._counts)
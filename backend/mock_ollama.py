@@ -0,0 +1,330 @@
+"""Mock Ollama server for load tests
+
+Implements the parts of the Ollama HTTP API the app uses (``/api/tags``,
+``/api/version``, ``/api/generate`` with and without streaming) and answers
+with canned text at a configurable speed. ``num_predict`` from the request
+options sets the number of tokens, each taking ``--token-ms``; failures can
+be injected as HTTP errors or hung requests.
+
+Like Ollama, the mock keeps each model loaded for ``keep_alive`` after a
+call (loading takes ``--load-ms``) and remembers its last prompt: only the
+words after the prefix shared with it are evaluated, at ``--prompt-token-ms``
+each, which shows up in ``prompt_eval_count`` and the time to first token.
+``--model-token-ms`` gives models their own generation speed.
+
+Only the models given with ``--model`` are installed, by default every model
+``Config.LLM_TASK_ROUTES`` routes to; like Ollama, generating with any
+other model answers HTTP 404.
+
+Usage:
+    python mock_ollama.py --port 11435 --token-ms 20 --failure-rate 0.05
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from config import Config
+
+WORDS = ('Led cross-functional teams to deliver scalable backend services, improving reliability '
+         'and reducing latency by 35% through profiling, caching and automated testing. ').split()
+
+
+class MockSettings:
+    """Latency and failure injection knobs, adjustable while the server runs"""
+
+    def __init__(self, first_token_ms: float = 50.0, token_ms: float = 20.0, max_tokens: int = 400,
+                 failure_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 600.0,
+                 seed: int = None, prompt_token_ms: float = 0.0, load_ms: float = 0.0,
+                 model_token_ms: Dict[str, float] = None, models: List[str] = None):
+        self.first_token_ms = first_token_ms
+        self.models = [full_model_name(model) for model in models or routed_models()]
+        self.model_token_ms = model_token_ms or {}
+        self.prompt_token_ms = prompt_token_ms
+        self.load_ms = load_ms
+        self.token_ms = token_ms
+        self.max_tokens = max_tokens
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'generate': 0, 'failed': 0, 'hung': 0, 'tags': 0, 'aborted': 0, 'model_not_found': 0,
+                         'loads': 0, 'prompt_tokens': 0, 'prompt_tokens_evaluated': 0}
+        self.loaded_until = {}
+        self.cached_prompts = {}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def token_seconds(self, model: str) -> float:
+        """Generation time per token for a model"""
+        return self.model_token_ms.get(model, self.token_ms) / 1000
+
+    def evaluate_prompt(self, model: str, prompt: str, keep_alive) -> Tuple[int, float]:
+        """Words of ``prompt`` that need evaluating and the model load time in seconds"""
+        tokens = prompt.split()
+        with self.lock:
+            now = time.monotonic()
+            load_seconds = 0.0
+            if now >= self.loaded_until.get(model, 0.0):
+                # Unloading drops the prompt cache with the model
+                load_seconds = self.load_ms / 1000
+                self.cached_prompts[model] = []
+                self.counters['loads'] += 1
+
+            shared = 0
+            for cached, token in zip(self.cached_prompts[model], tokens):
+                if cached != token:
+                    break
+                shared += 1
+            if tokens:
+                self.cached_prompts[model] = tokens
+            self.loaded_until[model] = now + load_seconds + keep_alive_seconds(keep_alive)
+
+            self.counters['prompt_tokens'] += len(tokens)
+            self.counters['prompt_tokens_evaluated'] += len(tokens) - shared
+        return len(tokens) - shared, load_seconds
+
+    def roll(self) -> str:
+        """Pick the outcome of one generate call: 'ok', 'fail' or 'hang'"""
+        with self.lock:
+            value = self.random.random()
+        if value < self.failure_rate:
+            return 'fail'
+        if value < self.failure_rate + self.hang_rate:
+            return 'hang'
+        return 'ok'
+
+
+def routed_models() -> List[str]:
+    """``OLLAMA_MODEL`` and every model in ``Config.LLM_TASK_ROUTES``"""
+    models = {Config.OLLAMA_MODEL}
+    for route in Config.LLM_TASK_ROUTES.values():
+        models.update(model for model in (route.get('model'), route.get('fallback')) if model)
+    return sorted(models)
+
+
+def full_model_name(name: str) -> str:
+    """Ollama's full name for a model, 'llama3.1' is 'llama3.1:latest'"""
+    return name if ':' in name else f'{name}:latest'
+
+
+def keep_alive_seconds(keep_alive) -> float:
+    """Ollama's ``keep_alive`` (seconds, or a duration like '30m') in seconds, default 5 minutes"""
+    if keep_alive is None or keep_alive == '':
+        return 300.0
+    if isinstance(keep_alive, (int, float)):
+        seconds = float(keep_alive)
+    else:
+        units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+        unit = next((u for u in ('ms', 's', 'm', 'h') if keep_alive.endswith(u)), None)
+        seconds = float(keep_alive[:-len(unit)]) * units[unit] if unit else float(keep_alive)
+    return float('inf') if seconds < 0 else seconds
+
+
+def make_handler(settings: MockSettings):
+    """Request handler class bound to ``settings``"""
+
+    class MockOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/api/tags':
+                settings.count('tags')
+                self._send_json({'models': [{'name': model, 'model': model, 'size': 0} for model in settings.models]})
+            elif self.path == '/api/version':
+                self._send_json({'version': 'mock'})
+            elif self.path == '/stats':
+                with settings.lock:
+                    self._send_json(dict(settings.counters))
+            else:
+                self._send_json({'error': 'not found'}, 404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._send_json({'error': 'invalid JSON'}, 400)
+                return
+
+            if self.path != '/api/generate':
+                self._send_json({'error': 'not found'}, 404)
+                return
+
+            settings.count('generate')
+            model = body.get('model') or ''
+            if full_model_name(model) not in settings.models:
+                settings.count('model_not_found')
+                self._send_json({'error': f"model '{model}' not found"}, 404)
+                return
+            outcome = settings.roll()
+            if outcome == 'fail':
+                settings.count('failed')
+                self._send_json({'error': 'injected failure'}, 500)
+                return
+            if outcome == 'hang':
+                settings.count('hung')
+                time.sleep(settings.hang_seconds)
+
+            started = time.perf_counter()
+            prompt = body.get('prompt') or ''
+            evaluated, load_seconds = settings.evaluate_prompt(body.get('model'), prompt, body.get('keep_alive'))
+            timings = {
+                'load': load_seconds,
+                'evaluated': evaluated,
+                'prompt_eval': (settings.first_token_ms + settings.prompt_token_ms * evaluated) / 1000
+            }
+            if not prompt:
+                # An empty prompt only loads the model
+                time.sleep(load_seconds)
+                self._send_json(self._final(body, '', 0, started, timings, 'load'))
+                return
+
+            options = body.get('options') or {}
+            tokens = min(int(options.get('num_predict') or settings.max_tokens), settings.max_tokens)
+            if body.get('stream', True):
+                self._stream(body, tokens, started, timings)
+            else:
+                self._generate(body, tokens, started, timings)
+
+        def _generate(self, body: Dict, tokens: int, started: float, timings: Dict):
+            time.sleep(timings['load'] + timings['prompt_eval'] + settings.token_seconds(body.get('model')) * tokens)
+            text = ' '.join(WORDS[i % len(WORDS)] for i in range(tokens))
+            self._send_json(self._final(body, text, tokens, started, timings))
+
+        def _stream(self, body: Dict, tokens: int, started: float, timings: Dict):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            time.sleep(timings['load'] + timings['prompt_eval'])
+            try:
+                for i in range(tokens):
+                    time.sleep(settings.token_seconds(body.get('model')))
+                    self._write_chunk({'model': body.get('model'), 'created_at': self._now(),
+                                       'response': WORDS[i % len(WORDS)] + ' ', 'done': False})
+                self._write_chunk(self._final(body, '', tokens, started, timings))
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closed the stream, Ollama stops generating too
+                settings.count('aborted')
+                self.close_connection = True
+
+        def _final(self, body: Dict, text: str, tokens: int, started: float, timings: Dict,
+                   done_reason: str = None) -> Dict:
+            """Closing message with Ollama's timing fields, durations in nanoseconds"""
+            total_ns = int((time.perf_counter() - started) * 1e9)
+            return {
+                'model': body.get('model'),
+                'created_at': self._now(),
+                'response': text,
+                'done': True,
+                'done_reason': done_reason or ('length' if tokens else 'stop'),
+                'total_duration': total_ns,
+                'load_duration': int(timings['load'] * 1e9),
+                'prompt_eval_count': timings['evaluated'],
+                'prompt_eval_duration': int(timings['prompt_eval'] * 1e9),
+                'eval_count': tokens,
+                'eval_duration': int(settings.token_seconds(body.get('model')) * tokens * 1e9)
+            }
+
+        def _write_chunk(self, message: Dict):
+            data = (json.dumps(message) + '\n').encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+        def _send_json(self, payload: Dict, status: int = 200):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        @staticmethod
+        def _now() -> str:
+            return datetime.now(timezone.utc).isoformat()
+
+    return MockOllamaHandler
+
+
+class MockServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under load test concurrency
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients abort streams on purpose, e.g. when a latency budget runs out
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_mock_server(settings: MockSettings, host: str = '127.0.0.1', port: int = 0) -> MockServer:
+    """Start the mock server in a daemon thread; ``port=0`` picks a free port"""
+    server = MockServer((host, port), make_handler(settings))
+    threading.Thread(target=server.serve_forever, name='mock-ollama', daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Mock server options, shared with loadtest.py"""
+    parser.add_argument('--first-token-ms', type=float, default=50.0, help='Latency before the first token')
+    parser.add_argument('--token-ms', type=float, default=20.0, help='Latency per generated token')
+    parser.add_argument('--prompt-token-ms', type=float, default=0.0,
+                        help='Latency per prompt word not shared with the previous prompt')
+    parser.add_argument('--load-ms', type=float, default=0.0,
+                        help='Model load latency after keep_alive has expired')
+    parser.add_argument('--model-token-ms', action='append', default=[], metavar='MODEL=MS',
+                        help='Latency per generated token for one model, repeatable')
+    parser.add_argument('--max-tokens', type=int, default=400, help='Cap on tokens per response')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 500')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='Fraction of calls that hang')
+    parser.add_argument('--hang-seconds', type=float, default=600.0, help='How long a hung call sleeps')
+    parser.add_argument('--failure-seed', type=int, help='Random seed for failure injection')
+    parser.add_argument('--model', action='append', default=[], dest='models',
+                        help='Installed model, repeatable; default every routed model')
+
+
+def settings_from_args(args) -> MockSettings:
+    model_token_ms = {}
+    for item in args.model_token_ms:
+        model, _, ms = item.rpartition('=')
+        model_token_ms[model] = float(ms)
+    return MockSettings(args.first_token_ms, args.token_ms, args.max_tokens,
+                        args.failure_rate, args.hang_rate, args.hang_seconds, args.failure_seed,
+                        args.prompt_token_ms, args.load_ms, model_token_ms, args.models)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Ollama server for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer((args.host, args.port), make_handler(settings_from_args(args)))
+    print(f"Mock Ollama listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
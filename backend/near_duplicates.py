@@ -0,0 +1,157 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    """Computes MinHash signatures of word shingles of normalized resume text"""
+
+    def __init__(self, num_perm: int = None, shingle_size: int = None, seed: int = 1):
+        self.num_perm = num_perm or Config.DEDUPE_NUM_PERM
+        self.shingle_size = shingle_size or Config.DEDUPE_SHINGLE_SIZE
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, int(_MERSENNE_PRIME), size=self.num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, int(_MERSENNE_PRIME), size=self.num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature as ``num_perm`` uint32 values"""
+        words = re.findall(r'\w+', text.lower())
+        size = self.shingle_size
+        shingles = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        # Universal hashing of every shingle under every permutation
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """LSH index that clusters near-duplicate resumes by MinHash signature
+
+    Signatures are split into ``bands`` bands; resumes sharing any band are
+    candidates and join the cluster of the first candidate whose estimated
+    Jaccard similarity reaches ``threshold``. Each insertion only looks up
+    ``bands`` buckets, and only cluster representatives are kept in the
+    buckets. Signatures live in one growing uint32 matrix, 512 bytes per resume
+    with the default 128 permutations.
+    """
+
+    def __init__(self, num_perm: int = None, bands: int = None, threshold: float = None):
+        self.num_perm = num_perm or Config.DEDUPE_NUM_PERM
+        self.bands = bands or Config.DEDUPE_BANDS
+        self.threshold = threshold if threshold is not None else Config.DEDUPE_THRESHOLD
+        if self.num_perm % self.bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.rows = self.num_perm // self.bands
+
+        self.keys: List[str] = []
+        self.representatives: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._signatures = np.zeros((1024, self.num_perm), dtype=np.uint32)
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str, signature: np.ndarray) -> Tuple[Optional[str], float]:
+        """Insert a resume, returning its cluster representative's key and similarity
+
+        Returns ``(None, 0.0)`` when the resume starts a new cluster. Adding a
+        key again returns its existing assignment, so a restarted batch can
+        replay resumes that were indexed but not finished.
+        """
+        if key in self._positions:
+            return self._assignment(self._positions[key])
+
+        index = len(self.keys)
+        if index == len(self._signatures):
+            self._signatures = np.resize(self._signatures, (index * 2, self.num_perm))
+        self._signatures[index] = signature
+        self.keys.append(key)
+        self._positions[key] = index
+
+        band_hashes = self._band_hashes(signature)
+        representative, similarity = self._find_representative(signature, band_hashes)
+
+        if representative is None:
+            self.representatives.append(index)
+            for band, band_hash in enumerate(band_hashes):
+                self._buckets[band].setdefault(band_hash, index)
+            return None, 0.0
+
+        self.representatives.append(representative)
+        return self.keys[representative], similarity
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """Duplicate groups with more than one member, keyed by representative"""
+        groups: Dict[int, List[str]] = {}
+        for index, representative in enumerate(self.representatives):
+            groups.setdefault(representative, []).append(self.keys[index])
+        return {self.keys[rep]: members for rep, members in groups.items() if len(members) > 1}
+
+    def save(self, path: str):
+        """Persist the index so later batches can detect duplicates of earlier ones"""
+        np.savez_compressed(
+            path,
+            keys=np.array(self.keys, dtype=object),
+            representatives=np.array(self.representatives, dtype=np.int64),
+            signatures=self._signatures[:len(self.keys)],
+            settings=np.array([self.num_perm, self.bands, self.threshold])
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'NearDuplicateIndex':
+        """Load an index saved with ``save``"""
+        data = np.load(path, allow_pickle=True)
+        num_perm, bands, threshold = data['settings']
+        index = cls(int(num_perm), int(bands), float(threshold))
+
+        signatures = data['signatures']
+        index.keys = [str(key) for key in data['keys']]
+        index.representatives = [int(rep) for rep in data['representatives']]
+        index._positions = {key: position for position, key in enumerate(index.keys)}
+        index._signatures = np.zeros((max(1024, len(signatures) * 2), index.num_perm), dtype=np.uint32)
+        index._signatures[:len(signatures)] = signatures
+        for position, representative in enumerate(index.representatives):
+            if representative == position:
+                for band, band_hash in enumerate(index._band_hashes(signatures[position])):
+                    index._buckets[band].setdefault(band_hash, position)
+        return index
+
+    def _assignment(self, position: int) -> Tuple[Optional[str], float]:
+        """Representative and similarity of an already indexed resume"""
+        representative = self.representatives[position]
+        if representative == position:
+            return None, 0.0
+        similarity = (self._signatures[representative] == self._signatures[position]).mean()
+        return self.keys[representative], float(similarity)
+
+    def _band_hashes(self, signature: np.ndarray) -> List[int]:
+        """Hash of each band of the signature"""
+        return [hash(signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def _find_representative(self, signature: np.ndarray, band_hashes: List[int]) -> Tuple[Optional[int], float]:
+        """Most similar candidate representative above the threshold"""
+        candidates = {self._buckets[band].get(band_hash) for band, band_hash in enumerate(band_hashes)}
+        candidates.discard(None)
+        if not candidates:
+            return None, 0.0
+
+        candidates = sorted(candidates)
+        similarities = (self._signatures[candidates] == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return candidates[best], float(similarities[best])
+        return None, 0.0
@@ -0,0 +1,73 @@
+import threading
+from typing import Iterable, List
+from config import Config
+
+# Loaded pipelines, one per profile, shared by every consumer of that profile
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def load_pipeline(profile: str):
+    """Load the spaCy pipeline for a consumer profile
+
+    Components listed under ``exclude`` in ``Config.SPACY_PROFILES`` are not
+    loaded at all. Raises ``ImportError`` or ``OSError`` when spaCy or the model
+    is missing, like ``spacy.load`` does.
+    """
+    with _pipelines_lock:
+        if profile not in _pipelines:
+            import spacy
+            settings = Config.SPACY_PROFILES[profile]
+            nlp = spacy.load(Config.SPACY_MODEL, exclude=settings.get('exclude', []))
+            print(f"Loaded spaCy model {Config.SPACY_MODEL} for '{profile}' with components: {', '.join(nlp.pipe_names)}")
+            _pipelines[profile] = nlp
+        return _pipelines[profile]
+
+
+def chunk_text(text: str, max_chars: int = None) -> List[str]:
+    """Split text into chunks of at most ``max_chars`` characters
+
+    Chunks end at the last line break, sentence end or space before the limit
+    so that no word is cut in half.
+    """
+    max_chars = max_chars or Config.SPACY_MAX_CHUNK_CHARS
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = max(window.rfind('\n'), window.rfind('. '), window.rfind(' '))
+        end = start + cut + 1 if cut > 0 else start + max_chars
+        chunks.append(text[start:end])
+        start = end
+    chunks.append(text[start:])
+
+    return chunks
+
+
+def pipe_texts(nlp, texts: Iterable[str]) -> List[List]:
+    """Run texts through ``nlp.pipe`` and return the chunk docs for each text
+
+    Long texts are chunked first and all chunks go through a single
+    ``nlp.pipe`` call using the configured batch size and process count.
+    Inference only reads the pipeline, so threads can share it; calls from
+    threads other than the main one run in-process, since forking helper
+    processes from a request thread of a threaded server is unsafe.
+    """
+    texts = list(texts)
+    owners = []
+    chunks = []
+    for index, text in enumerate(texts):
+        for chunk in chunk_text(text):
+            owners.append(index)
+            chunks.append(chunk)
+
+    docs_per_text: List[List] = [[] for _ in texts]
+    n_process = Config.SPACY_N_PROCESS if threading.current_thread() is threading.main_thread() else 1
+    docs = nlp.pipe(chunks, batch_size=Config.SPACY_BATCH_SIZE, n_process=n_process)
+    for owner, doc in zip(owners, docs):
+        docs_per_text[owner].append(doc)
+
+    return docs_per_text
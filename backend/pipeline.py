@@ -0,0 +1,270 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+from config import Config
+from metrics import LatencyWindow
+from cancellation import Cancelled, CancellationToken, count as count_cancellation
+
+
+class Stage:
+    """One named step of a pipeline and the names of the values it takes
+
+    ``func`` is called with the inputs as positional arguments, in order,
+    and its return value is stored under ``name``. ``kind`` says where it runs: 'inline'
+    in the thread running the pipeline (cheap glue, and stages that mostly
+    wait), 'thread' in the shared thread pool (I/O and C extensions that
+    release the GIL), 'process' in the process pool (pure-Python work; the
+    function and inputs must be picklable). A ``cancellable`` stage also
+    gets the run's cancellation token as ``cancel_token`` to check during
+    long work, except in the process pool, which can't see it.
+    """
+
+    KINDS = ('inline', 'thread', 'process')
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str], kind: str, cancellable: bool = False):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown stage kind '{kind}', expected one of {', '.join(self.KINDS)}")
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.kind = kind
+        self.cancellable = cancellable
+
+
+class PipelineRun:
+    """Results and stage timings of one pipeline run
+
+    ``stages`` maps each stage that ran to its start offset and duration in
+    milliseconds. The critical path is the chain of dependent stages with
+    the longest total duration, the lower bound for the run's wall time
+    however many workers there are.
+    """
+
+    def __init__(self, pipeline: 'Pipeline', results: Dict[str, Any], stages: Dict[str, Dict], wall: float):
+        self.results = results
+        self.stages = stages
+        self.wall_ms = round(wall * 1000, 1)
+        self.stage_total_ms = round(sum(timing['duration_ms'] for timing in stages.values()), 1)
+        self.critical_path, self.critical_path_ms = pipeline.critical_path(stages)
+
+    def report(self) -> Dict:
+        """Stage timings for a debug block"""
+        return {
+            'wall_ms': self.wall_ms,
+            'stage_total_ms': self.stage_total_ms,
+            'critical_path_ms': self.critical_path_ms,
+            'critical_path': self.critical_path,
+            'stages': self.stages
+        }
+
+
+class Pipeline:
+    """A DAG of named stages run by dependency order, independent stages concurrently
+
+    Stages are declared with ``stage`` and may only take values produced by
+    earlier declared stages or passed to ``run``, so the graph can't have
+    cycles. ``run`` only executes the stages its targets need, skipping any
+    whose value was passed in. Thread stages share one pool per process and
+    process stages one process pool, both created on first use; with
+    ``process_workers`` at 0, process stages run on the thread pool.
+    Durations of every stage and run go into rolling windows for metrics.
+    """
+
+    def __init__(self, name: str, inputs: Iterable[str], thread_workers: int = None,
+                 process_workers: int = None):
+        self.name = name
+        self.inputs = set(inputs)
+        self.thread_workers = thread_workers or Config.PIPELINE_THREAD_WORKERS
+        self.process_workers = Config.PIPELINE_PROCESS_WORKERS if process_workers is None else process_workers
+        self.stages: Dict[str, Stage] = {}
+        self.stage_times: Dict[str, LatencyWindow] = {}
+        self.run_times = {'wall': LatencyWindow(), 'stage_total': LatencyWindow(), 'critical_path': LatencyWindow()}
+
+        # Pools belong to the process that created them, forked workers start their own
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Drop the pools and lock inherited from the parent process"""
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, func: Callable, inputs: Sequence[str] = (), kind: str = 'thread',
+              cancellable: bool = False):
+        """Declare a stage; raises ``ValueError`` for duplicate names and unknown inputs"""
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Pipeline {self.name} already has a value named '{name}'")
+        unknown = [value for value in inputs if value not in self.stages and value not in self.inputs]
+        if unknown:
+            raise ValueError(f"Stage '{name}' takes unknown input(s): {', '.join(unknown)}")
+        self.stages[name] = Stage(name, func, inputs, kind, cancellable)
+        self.stage_times[name] = LatencyWindow()
+
+    def run(self, values: Dict[str, Any], targets: Sequence[str], token: CancellationToken = None) -> PipelineRun:
+        """Compute ``targets`` from ``values``, running each needed stage once its inputs are ready
+
+        The first stage to raise cancels the stages not yet started and its
+        exception propagates once the ones already running finish. With a
+        ``token`` the run is checked before every stage starts and while
+        waiting on the pools; once it is cancelled, ``Cancelled`` is raised
+        at once and stages still running finish in the background, their
+        results dropped.
+        """
+        results = dict(values)
+        needed = self._needed(targets, results)
+        remaining = {name: self.stages[name] for name in self.stages if name in needed}
+        timings = {}
+        pending = {}
+        started = time.perf_counter()
+
+        def ready():
+            return [stage for stage in remaining.values() if all(value in results for value in stage.inputs)]
+
+        def check(stage_name: str):
+            if token is not None:
+                token.check(f'{self.name}.{stage_name}')
+
+        def finish(stage: Stage, stage_started: float, stage_ended: float, value: Any):
+            results[stage.name] = value
+            duration = stage_ended - stage_started
+            self.stage_times[stage.name].observe(duration)
+            timings[stage.name] = {
+                'kind': stage.kind,
+                'start_ms': round((stage_started - started) * 1000, 1),
+                'duration_ms': round(duration * 1000, 1)
+            }
+
+        try:
+            while remaining or pending:
+                inline = []
+                for stage in ready():
+                    check(stage.name)
+                    del remaining[stage.name]
+                    if stage.kind == 'inline':
+                        inline.append(stage)
+                    else:
+                        pending[self._submit(stage, results, token)] = stage
+
+                # Pool stages are already running while inline ones run here
+                for stage in inline:
+                    check(stage.name)
+                    stage_started = time.perf_counter()
+                    value = stage.func(*[results[name] for name in stage.inputs], **self._extra(stage, token))
+                    finish(stage, stage_started, time.perf_counter(), value)
+                if inline:
+                    continue
+
+                if not pending:
+                    raise RuntimeError(f"Pipeline {self.name} is stuck on {', '.join(remaining)}")
+                if token is None:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                else:
+                    done, _ = wait(pending, timeout=Config.CANCELLATION_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    if not done:
+                        check(next(iter(pending.values())).name)
+                for future in done:
+                    stage = pending.pop(future)
+                    stage_started, stage_ended, value = future.result()
+                    finish(stage, stage_started, stage_ended, value)
+        except Cancelled:
+            for future in pending:
+                future.cancel()
+            count_cancellation('stages_skipped', len(remaining) + sum(future.cancelled() for future in pending))
+            raise
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            raise
+
+        run = PipelineRun(self, results, timings, time.perf_counter() - started)
+        self.run_times['wall'].observe(run.wall_ms / 1000)
+        self.run_times['stage_total'].observe(run.stage_total_ms / 1000)
+        self.run_times['critical_path'].observe(run.critical_path_ms / 1000)
+        return run
+
+    def critical_path(self, timings: Dict[str, Dict]) -> Tuple[List[str], float]:
+        """Longest chain of dependent stages by duration among the stages in ``timings``"""
+        longest = {}
+        for name in self.stages:
+            if name not in timings:
+                continue
+            before = max(
+                (longest[value] for value in self.stages[name].inputs if value in longest),
+                key=lambda path: path[1], default=([], 0.0)
+            )
+            longest[name] = (before[0] + [name], before[1] + timings[name]['duration_ms'])
+        path, total = max(longest.values(), key=lambda path: path[1], default=([], 0.0))
+        return path, round(total, 1)
+
+    def stats(self) -> Dict:
+        """Stage and run time summaries for monitoring"""
+        return {
+            'runs': {name: window.summary() for name, window in self.run_times.items()},
+            'stages': {name: window.summary() for name, window in self.stage_times.items()},
+            'thread_workers': self.thread_workers,
+            'process_workers': self.process_workers
+        }
+
+    def _needed(self, targets: Sequence[str], values: Dict[str, Any]) -> set:
+        """Stages that must run to produce ``targets`` given the values already known"""
+        needed = set()
+        stack = [target for target in targets if target not in values]
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self.stages:
+                raise ValueError(f"Pipeline {self.name} has no stage or value '{name}'")
+            needed.add(name)
+            stack.extend(value for value in self.stages[name].inputs if value not in values)
+        return needed
+
+    def _submit(self, stage: Stage, results: Dict[str, Any], token: CancellationToken = None):
+        """Start a stage on its pool; the future returns its start time, end time and value"""
+        args = [results[name] for name in stage.inputs]
+        if stage.kind == 'process' and self.process_workers:
+            # perf_counter isn't comparable across processes, so the
+            # stage is timed here from submission to result
+            submitted = time.perf_counter()
+            future = self._get_process_pool().submit(stage.func, *args)
+            return self._get_thread_pool().submit(lambda: (submitted, *_timed_result(future)))
+        return self._get_thread_pool().submit(_timed_call, stage.func, args, self._extra(stage, token))
+
+    @staticmethod
+    def _extra(stage: Stage, token: CancellationToken) -> Dict[str, Any]:
+        """Keyword arguments of a stage call besides its inputs"""
+        return {'cancel_token': token} if stage.cancellable else {}
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.thread_workers, thread_name_prefix=f'{self.name}-stage')
+            return self._thread_pool
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # Spawned, not forked: the parent has threads running
+                self._process_pool = ProcessPoolExecutor(
+                    self.process_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._process_pool
+
+
+def _timed_call(func: Callable, args: List[Any], kwargs: Dict[str, Any]):
+    started = time.perf_counter()
+    value = func(*args, **kwargs)
+    return started, time.perf_counter(), value
+
+
+def _timed_result(future):
+    value = future.result()
+    return time.perf_counter(), value
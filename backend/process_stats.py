@@ -0,0 +1,63 @@
+import os
+import time
+import threading
+from typing import Dict
+
+# Per-process bookkeeping, reset in forked workers by serve.py
+process_state = {
+    'pid': os.getpid(),
+    'started_at': time.time(),
+    'boot_seconds': None,
+    'requests_served': 0
+}
+_requests_lock = threading.Lock()
+
+
+def record_request():
+    """Count a request served by this process"""
+    with _requests_lock:
+        process_state['requests_served'] += 1
+
+
+def memory_usage() -> Dict:
+    """Resident memory of this process in MB
+
+    On Linux the proportional (``pss``) and private/shared split from
+    ``/proc/self/smaps_rollup`` is included as well, which shows how much of a
+    forked worker's memory is still shared copy-on-write with the master.
+    """
+    usage = {}
+
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        usage['rss_mb'] = round(resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2, 1)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        usage['rss_mb'] = round(max_rss / (1024 ** 2 if max_rss > 1024 ** 3 else 1024), 1)
+
+    try:
+        fields = {}
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+        usage['pss_mb'] = round(fields.get('Pss', 0) / 1024, 1)
+        usage['shared_mb'] = round((fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)) / 1024, 1)
+        usage['private_mb'] = round((fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024, 1)
+    except OSError:
+        pass
+
+    return usage
+
+
+def process_info() -> Dict:
+    """Process id, uptime, boot time, request count and memory for /api/metrics"""
+    info = dict(process_state)
+    info['pid'] = os.getpid()
+    info['uptime_seconds'] = round(time.time() - process_state['started_at'], 1)
+    info.update(memory_usage())
+    return info
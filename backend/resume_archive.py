@@ -0,0 +1,122 @@
+import io
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, Optional
+from config import Config
+
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+EMPTY_ZIP_MAGIC = b'PK\x05\x06'
+
+
+class ArchiveLimitError(Exception):
+    """The archive exceeds a size or entry count limit"""
+
+
+def sniff_resume_type(data: bytes) -> Optional[str]:
+    """File type of a resume from its content, 'pdf', 'docx' or None
+
+    Extensions in an uploaded archive can't be trusted, so PDFs are
+    recognized by their header and DOCX files by being a zip with a
+    ``word/document.xml`` part (XLSX, PPTX and other zips are rejected).
+    """
+    if data.startswith(PDF_MAGIC):
+        return 'pdf'
+    if data.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as document:
+                if 'word/document.xml' in document.namelist():
+                    return 'docx'
+        except zipfile.BadZipFile:
+            pass
+    return None
+
+
+def open_archive(stream: BinaryIO, max_entries: int = None) -> zipfile.ZipFile:
+    """Open an uploaded zip archive, checking its magic bytes and entry count
+
+    ``stream`` must be seekable since the zip index is at the end of the
+    file; entries are not extracted. Raises ``ValueError`` for anything that
+    is not a zip and ``ArchiveLimitError`` for too many entries.
+    """
+    max_entries = max_entries or Config.ARCHIVE_MAX_ENTRIES
+
+    head = stream.read(4)
+    stream.seek(0)
+    if head not in (ZIP_MAGIC, EMPTY_ZIP_MAGIC):
+        raise ValueError('Archive is not a ZIP file')
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f'Invalid ZIP archive: {e}')
+
+    files = sum(1 for info in archive.infolist() if not info.is_dir())
+    if files > max_entries:
+        archive.close()
+        raise ArchiveLimitError(f'Archive has {files} files, the limit is {max_entries}')
+    return archive
+
+
+def iter_resumes(archive: zipfile.ZipFile, max_entry_size: int = None,
+                 max_total_size: int = None) -> Iterator[Dict]:
+    """Read the entries of an archive one at a time, in archive order
+
+    Yields ``{'name', 'type', 'data'}`` for each PDF or DOCX resume and
+    ``{'name', 'skipped'}`` with a reason for every other file. Only one
+    entry is held in memory at a time and no entry is read past
+    ``max_entry_size`` decompressed bytes, whatever its header claims, so
+    memory stays flat for any archive size. Raises ``ArchiveLimitError``
+    once more than ``max_total_size`` bytes have been decompressed in total.
+    """
+    max_entry_size = max_entry_size or Config.ARCHIVE_MAX_ENTRY_SIZE
+    max_total_size = max_total_size or Config.ARCHIVE_MAX_TOTAL_SIZE
+    total = 0
+
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        name = info.filename
+        if name.startswith('__MACOSX/') or name.rsplit('/', 1)[-1].startswith('.'):
+            yield {'name': name, 'skipped': 'hidden file'}
+            continue
+        if info.flag_bits & 0x1:
+            yield {'name': name, 'skipped': 'encrypted'}
+            continue
+        if info.file_size > max_entry_size:
+            yield {'name': name, 'skipped': f'larger than {max_entry_size} bytes'}
+            continue
+
+        try:
+            data = _read_entry(archive, info, max_entry_size)
+        except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError) as e:
+            yield {'name': name, 'skipped': f'unreadable: {e}'}
+            continue
+
+        total += len(data)
+        if total > max_total_size:
+            raise ArchiveLimitError(f'Archive expands to more than {max_total_size} bytes')
+        if len(data) > max_entry_size:
+            yield {'name': name, 'skipped': f'larger than {max_entry_size} bytes'}
+            continue
+
+        file_type = sniff_resume_type(data)
+        if file_type is None:
+            yield {'name': name, 'skipped': 'not a PDF or DOCX file'}
+            continue
+
+        yield {'name': name, 'type': file_type, 'data': data}
+
+
+def _read_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int) -> bytes:
+    """Decompress one entry in chunks, stopping one chunk past ``max_size``"""
+    chunks = []
+    size = 0
+    with archive.open(info) as entry:
+        while size <= max_size:
+            chunk = entry.read(Config.ARCHIVE_READ_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+    return b''.join(chunks)
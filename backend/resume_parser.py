@@ -1,9 +1,16 @@
+import io
 import re
-import PyPDF2
-from docx import Document
-from typing import Dict, List
+from docx_extractor import extract_docx_text
+from cancellation import Cancelled, CancellationToken, check
+from typing import BinaryIO, Dict, List, Union
 
 class ResumeParser:
+    """Extracts text, sections and contact details from PDF and DOCX resumes
+    
+    Thread-safe: parsing keeps all state in local variables and the section
+    keyword table is never modified, so one instance can serve every thread.
+    """
+    
     def __init__(self):
         self.section_keywords = {
             'summary': ['summary', 'profile', 'objective', 'about'],
@@ -13,16 +20,37 @@ class ResumeParser:
             'certifications': ['certification', 'certificate', 'license']
         }
     
-    def parse_resume(self, file_path: str) -> Dict:
-        """Parse resume and extract structured information"""
+    def parse_resume(self, file_path: str, cancel_token: CancellationToken = None) -> Dict:
+        """Parse resume and extract structured information
+        
+        ``cancel_token`` is checked between PDF pages and before the text is structured.
+        """
         if file_path.endswith('.pdf'):
-            text = self._extract_pdf(file_path)
+            text = self._extract_pdf(file_path, cancel_token)
         elif file_path.endswith('.docx'):
             text = self._extract_docx(file_path)
         else:
             raise ValueError("Unsupported file format")
         
+        check(cancel_token, 'parse')
+        return self._parse_text(text)
+    
+    def parse_resume_bytes(self, data: bytes, file_type: str) -> Dict:
+        """Parse a resume held in memory, ``file_type`` being 'pdf' or 'docx'"""
+        if file_type == 'pdf':
+            text = self._extract_pdf(io.BytesIO(data))
+        elif file_type == 'docx':
+            text = self._extract_docx(io.BytesIO(data))
+        else:
+            raise ValueError("Unsupported file format")
+        
+        return self._parse_text(text)
+    
+    def _parse_text(self, text: str) -> Dict:
+        """Structure the cleaned text of a resume"""
+        # Sections are found line by line, keyword matching uses flat text
         sections = self._identify_sections(text)
+        text = re.sub(r'\s+', ' ', text).strip()
         
         return {
             'raw_text': text,
@@ -31,36 +59,40 @@ class ResumeParser:
             'total_words': len(text.split())
         }
     
-    def _extract_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
+    def _extract_pdf(self, source: Union[str, BinaryIO], cancel_token: CancellationToken = None) -> str:
+        """Extract text from a PDF file path or stream"""
+        import PyPDF2
+        
         text = ""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            pdf_reader = PyPDF2.PdfReader(source)
+            for page in pdf_reader.pages:
+                check(cancel_token, 'parse')
+                text += page.extract_text() + "\n"
+        except Cancelled:
+            raise
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
         
         return self._clean_text(text)
     
-    def _extract_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
+    def _extract_docx(self, source: Union[str, BinaryIO]) -> str:
+        """Extract text from a DOCX file path or stream, including tables, text boxes, headers and footers"""
         try:
-            doc = Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            text = extract_docx_text(source)
         except Exception as e:
             raise Exception(f"Error reading DOCX: {str(e)}")
         
         return self._clean_text(text)
     
     def _clean_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        """Clean and normalize text, keeping one line per non-empty line"""
+        # Remove extra whitespace within lines
+        text = re.sub(r'[^\S\n]+', ' ', text)
         # Remove special characters but keep basic punctuation
         text = re.sub(r'[^\w\s\-.,@()&/]', '', text)
-        return text.strip()
+        lines = (line.strip() for line in text.split('\n'))
+        return '\n'.join(line for line in lines if line)
     
     def _identify_sections(self, text: str) -> Dict[str, str]:
         """Identify and extract different sections of the resume"""
@@ -0,0 +1,100 @@
+"""Production server entry point
+
+Runs the API under gunicorn with a pre-fork model: the master process imports
+the app and warms it up (spaCy pipelines, scikit-learn, keyword cache)
+before forking workers, so the loaded models are shared copy-on-write.
+Workers are recycled after ``SERVER_MAX_REQUESTS`` requests or once their
+private (not shared with the master) memory passes
+``SERVER_MAX_WORKER_MEMORY_MB``, finishing in-flight requests first.
+
+Usage:
+    python serve.py
+
+gunicorn only runs on Unix-like systems; on Windows use ``python app.py``.
+"""
+import gc
+import os
+import time
+from gunicorn.app.base import BaseApplication
+from config import Config
+import process_stats
+
+
+def post_fork(server, worker):
+    """Reset per-process state in a freshly forked worker"""
+    process_stats.process_state.update({
+        'pid': os.getpid(),
+        'started_at': time.time(),
+        'boot_seconds': None,
+        'requests_served': 0
+    })
+
+
+def post_worker_init(worker):
+    """Record worker boot time and start its background tasks"""
+    import app as api
+
+    api.llm_generator.start_health_probe()
+    state = process_stats.process_state
+    state['boot_seconds'] = round(time.time() - state['started_at'], 3)
+    worker.log.info(f"Worker {os.getpid()} booted in {state['boot_seconds']}s")
+
+
+def post_request(worker, req, environ, resp):
+    """Recycle the worker gracefully once it passes the memory ceiling"""
+    if not Config.SERVER_MAX_WORKER_MEMORY_MB:
+        return
+
+    # Pages still shared with the master don't count against the ceiling
+    usage = process_stats.memory_usage()
+    memory_mb = usage.get('private_mb', usage['rss_mb'])
+    if memory_mb > Config.SERVER_MAX_WORKER_MEMORY_MB and worker.alive:
+        worker.log.info(
+            f"Worker {os.getpid()} memory {memory_mb} MB is over "
+            f"{Config.SERVER_MAX_WORKER_MEMORY_MB} MB, recycling"
+        )
+        # Stops accepting new connections and exits after in-flight requests
+        worker.alive = False
+
+
+class ATSServer(BaseApplication):
+    """gunicorn application that preloads and warms up the API in the master"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import app as api
+
+        api.warm_up()
+        # Move everything loaded so far out of the garbage collector's
+        # reach so collections in workers don't dirty the shared pages
+        gc.freeze()
+        return api.app
+
+
+def server_options() -> dict:
+    """gunicorn settings from Config"""
+    return {
+        'bind': f"{Config.API_HOST}:{Config.API_PORT}",
+        'workers': Config.SERVER_WORKERS,
+        'threads': Config.SERVER_THREADS,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'max_requests': Config.SERVER_MAX_REQUESTS,
+        'max_requests_jitter': Config.SERVER_MAX_REQUESTS_JITTER,
+        'timeout': Config.SERVER_TIMEOUT,
+        'graceful_timeout': Config.SERVER_GRACEFUL_TIMEOUT,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'post_request': post_request
+    }
+
+
+if __name__ == '__main__':
+    ATSServer(server_options()).run()
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from config import Config
+from metrics import Counters
+from cancellation import Cancelled
+
+try:
+    import fcntl
+except ImportError:  # Windows, coalescing stays within the process
+    fcntl = None
+
+
+def request_key(*parts) -> str:
+    """Hash request inputs (bytes or JSON-serializable values) into a coalescing key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True).encode('utf-8')
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+class _Call:
+    """In-flight call that followers in the same process wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so the work runs once
+
+    Within a process, callers with the same key wait for the first caller's
+    result. Across worker processes the first caller holds an exclusive lock
+    file for the key and writes its JSON result next to it; other processes
+    wait on the lock and read the result, which stays valid for
+    ``result_ttl`` seconds to absorb client retries. A caller whose
+    leader was cancelled (its client left) runs the call itself.
+    """
+
+    def __init__(self, directory: str = None, result_ttl: float = None, wait_timeout: float = None):
+        self.directory = directory or Config.SINGLE_FLIGHT_DIR
+        self.result_ttl = result_ttl if result_ttl is not None else Config.SINGLE_FLIGHT_RESULT_TTL
+        self.wait_timeout = wait_timeout or Config.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = Counters()
+        self._last_sweep = 0.0
+        if fcntl:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``func`` once per key, returning its result and whether it was shared"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._counters.increment('coalesced_local')
+            call.done.wait()
+            if isinstance(call.error, Cancelled):
+                self._counters.increment('leader_cancelled')
+                return self.do(key, func)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._run_across_processes(key, func)
+            return call.result, shared
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        with self._lock:
+            in_flight = len(self._calls)
+        stats = {'in_flight': in_flight, 'cross_process': fcntl is not None}
+        stats.update(self._counters.snapshot())
+        return stats
+
+    def _run_across_processes(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``func`` under the key's lock file, or reuse another process' result"""
+        if fcntl is None:
+            self._counters.increment('executed')
+            return func(), False
+
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        result_path = os.path.join(self.directory, f"{key}.json")
+
+        while True:
+            with open(lock_path, 'a') as lock_file:
+                waited = self._acquire(lock_file)
+                try:
+                    if not _is_current(lock_file, lock_path):
+                        # The sweep removed the lock file while we waited on it
+                        continue
+                    result = self._read_result(result_path)
+                    if result is not None:
+                        self._counters.increment('coalesced_remote' if waited else 'reused_recent')
+                        return result, True
+
+                    self._counters.increment('executed')
+                    result = func()
+                    self._write_result(result_path, result)
+                    return result, False
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    self._sweep()
+
+    def _acquire(self, lock_file) -> bool:
+        """Take the exclusive lock, returning whether another process held it"""
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            pass
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    # Give up waiting and take a blocking lock rather than fail
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    return True
+                time.sleep(0.05)
+
+    def _read_result(self, result_path: str):
+        """Read a stored result if it is still fresh, removing it once it has expired
+
+        Results hold the resume's contact details, so they aren't kept past
+        their use. Called with the key's lock held.
+        """
+        try:
+            if time.time() - os.path.getmtime(result_path) > self.result_ttl:
+                os.remove(result_path)
+                return None
+            with open(result_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, result_path: str, result: Any):
+        """Store a result atomically for other processes"""
+        try:
+            temp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(temp_path, result_path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not store coalesced result: {e}")
+
+    def _sweep(self):
+        """Remove expired result files and idle lock files, at most once per TTL
+
+        Lock files are only removed while no process holds them, and a
+        process that opened one before it was removed notices and retries.
+        """
+        now = time.time()
+        if now - self._last_sweep < self.result_ttl:
+            return
+        self._last_sweep = now
+
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                age = now - os.path.getmtime(path)
+                if name.endswith('.lock'):
+                    if age > self.result_ttl * 2:
+                        _remove_idle_lock(path)
+                elif age > (self.result_ttl if name.endswith('.json') else self.result_ttl * 2):
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _is_current(lock_file, lock_path: str) -> bool:
+    """Whether ``lock_file`` is still the file at ``lock_path``"""
+    try:
+        return os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino
+    except OSError:
+        return False
+
+
+def _remove_idle_lock(lock_path: str):
+    """Remove a lock file unless a process holds its lock"""
+    with open(lock_path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        if _is_current(lock_file, lock_path):
+            os.remove(lock_path)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for asyncio code, coalescing calls within this process
+
+    Followers await the leader's result instead of blocking a thread. Meant
+    for a single-process ASGI server, so there is no cross-process step.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._counters = Counters()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await ``func()`` once per key, returning its result and whether it was shared"""
+        call = self._calls.get(key)
+        if call is not None:
+            self._counters.increment('coalesced_local')
+            try:
+                # A cancelled follower must not cancel the shared call
+                return await asyncio.shield(call), True
+            except Cancelled:
+                self._counters.increment('leader_cancelled')
+                return await self.do(key, func)
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._counters.increment('executed')
+        try:
+            result = await func()
+            call.set_result(result)
+            return result, False
+        except BaseException as e:
+            if isinstance(e, Exception):
+                call.set_exception(e)
+                # Mark the error retrieved in case nobody was waiting
+                call.exception()
+            else:
+                call.cancel()
+            raise
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        stats = {'in_flight': len(self._calls), 'cross_process': False}
+        stats.update(self._counters.snapshot())
+        return stats
@@ -0,0 +1,74 @@
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Common English function words plus job posting boilerplate; they split
+# candidate phrases and are never keywords themselves
+STOP_WORDS = frozenset("""
+a about above across after again against all almost also although always am among an and any
+are around as at be became because been before being below between both but by can could did
+do does doing done down during each either else etc even ever every for from further get gets
+had has have having he her here hers him his how however i if in into is it its itself just
+least less like made make many may me might more most much must my near need needs neither no
+nor not now of off often on once one only onto or other others our ours out over own per
+please rather same shall she should since so some such than that the their theirs them then
+there these they this those though through throughout to too toward under until up upon us
+use used using very via was we well were what whatever when where whether which while who
+whom whose why will with within without would yet you your yours
+ability able candidate candidates company including ideal join looking plus position preferred
+required requirements responsibilities role strong team work working year years
+""".split())
+
+# Tokens keep characters used in tech names (c++, c#, node.js, ci/cd)
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+# Punctuation that ends a phrase; a period only when followed by whitespace
+FRAGMENT_PATTERN = re.compile(r"[,;:!?()\[\]{}\"|•·*\n]|\.\s|\.$|\s[-–—]\s")
+
+
+def candidate_phrases(text: str, max_words: int = 3) -> List[List[str]]:
+    """Split text into candidate phrases at punctuation and stop words
+
+    Runs longer than ``max_words`` are cut into ``max_words`` pieces from the
+    end, since the head noun of an English phrase comes last.
+    """
+    phrases = []
+    for fragment in FRAGMENT_PATTERN.split(text.lower()):
+        run: List[str] = []
+        for token in TOKEN_PATTERN.findall(fragment) + ['']:
+            if token and token not in STOP_WORDS and not token.isdigit():
+                run.append(token)
+                continue
+            while run:
+                phrases.append(run[-max_words:])
+                run = run[:-max_words]
+    return phrases
+
+
+def rank_phrases(text: str, max_words: int = 3, min_length: int = 3) -> List[Tuple[str, float]]:
+    """Rank the key phrases of a text, RAKE style, in time linear in its length
+
+    A word scores its degree (total length of the phrases it appears in)
+    over its frequency, which favours words that occur inside multi-word
+    phrases. A phrase scores the sum of its word scores times the number of
+    times the phrase occurs, so repeated requirements rank first.
+    """
+    phrases = [phrase for phrase in candidate_phrases(text, max_words)
+               if len(' '.join(phrase)) > min_length]
+
+    frequency: Counter = Counter()
+    degree: Counter = Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+
+    occurrences: Dict[str, int] = Counter(' '.join(phrase) for phrase in phrases)
+    scores = {}
+    for phrase in phrases:
+        key = ' '.join(phrase)
+        if key not in scores:
+            word_score = sum(degree[word] / frequency[word] for word in phrase)
+            scores[key] = word_score * occurrences[key]
+
+    # Stable sort keeps first occurrence order among equal scores
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
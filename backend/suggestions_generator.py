@@ -201,8 +201,26 @@ class SuggestionsGenerator:
         
         return suggestions
     
+    def project_ideas(self, missing_skills: List[str]) -> List[str]:
+        """Rule-based project ideas that would demonstrate the missing skills"""
+        if not missing_skills:
+            return []
+        
+        skills = ', '.join(missing_skills[:3])
+        project_types = self._project_types(missing_skills) or ['a portfolio project']
+        return [f"Build {project_type} using {skills}" for project_type in project_types[:4]]
+    
     def _suggest_projects_by_skills(self, missing_skills: List[str]) -> str:
         """Suggest specific project types based on missing skills"""
+        suggestions = self._project_types(missing_skills)
+        
+        if suggestions:
+            return ', '.join(suggestions[:2])
+        
+        return 'projects demonstrating the required technologies'
+    
+    def _project_types(self, missing_skills: List[str]) -> List[str]:
+        """Kinds of projects that match the categories of the missing skills"""
         skills_lower = [skill.lower() for skill in missing_skills]
         
         # Project suggestions based on skill categories
@@ -232,11 +250,7 @@ class SuggestionsGenerator:
         if any(skill in skills_lower for skill in project_templates['database']):
             suggestions.append('a database-driven application')
         
-        if suggestions:
-            return ', '.join(suggestions[:2])
-        
-        return 'projects demonstrating the required technologies'
-    
+        return suggestions
     
     def _generate_summary(self, score: float, missing_keywords: Dict, suggestions: Dict) -> Dict:
         """Generate executive summary of suggestions"""
@@ -105,8 +105,7 @@ export default function AddJobModal({ isOpen, onClose, onSave, initialData }) {
                 ...formData,
                 id: initialData ? initialData.id : crypto.randomUUID(),
                 createdAt: createdTimestamp,
-                // For files, we store the File object directly; idb-keyval handles it.
-                // We structure it to keep metadata.
+                // New files are uploaded with the job; a stored file ({ name, hash }) is kept.
                 cvFile: cvFile ? { name: cvFile.name, data: cvFile } : (initialData?.cvFile),
                 coverLetterFile: clFile ? { name: clFile.name, data: clFile } : (initialData?.coverLetterFile),
             };
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import Modal from './Modal';
 import { Download, Trash2, MapPin, User, Calendar, Briefcase, Link, AlertTriangle, Globe, Edit2, Check, X } from 'lucide-react';
-import { downloadFile } from '../lib/storage';
+import { downloadJobFile } from '../lib/storage';
 
 const STATUS_COLORS = {
     'Applied': 'bg-gray',
@@ -364,14 +364,14 @@ export default function JobDetailsModal({ job, isOpen, onClose, onDelete, onEdit
                     <label className="label">Attachments</label>
                     <div style={{ display: 'flex', gap: '1rem', flexWrap: 'wrap' }}>
                         {job.cvFile ? (
-                            <button className="btn" style={{ backgroundColor: 'white', color: 'black', gap: '0.5rem' }} onClick={() => downloadFile(job.cvFile)}>
+                            <button className="btn" style={{ backgroundColor: 'white', color: 'black', gap: '0.5rem' }} onClick={() => downloadJobFile(job.id, 'cvFile')}>
                                 <Download size={16} />
                                 Download CV
                             </button>
                         ) : <span style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>No CV attached</span>}
 
                         {job.coverLetterFile ? (
-                            <button className="btn" style={{ backgroundColor: 'white', color: 'black', gap: '0.5rem' }} onClick={() => downloadFile(job.coverLetterFile)}>
+                            <button className="btn" style={{ backgroundColor: 'white', color: 'black', gap: '0.5rem' }} onClick={() => downloadJobFile(job.id, 'coverLetterFile')}>
                                 <Download size={16} />
                                 Download Cover Letter
                             </button>
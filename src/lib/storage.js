@@ -1,42 +1,84 @@
-import { get, set, update } from 'idb-keyval';
+import { get, set, del, update } from 'idb-keyval';
 
 const STORE_KEY = 'ats_jobs';
 const SKILLS_KEY = 'ats_skills';
+const JOBS_URL = '/api/jobs';
+// Largest page the backend returns (JOB_LIST_MAX_PAGE_SIZE)
+const PAGE_SIZE = 500;
+const FILE_FIELDS = ['cvFile', 'coverLetterFile'];
 
-// Initialize store if empty
+async function request(url, options) {
+  const response = await fetch(url, options);
+  const body = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    throw new Error(body.error || `Request failed with status ${response.status}`);
+  }
+  return body;
+}
+
+// Jobs used to live in IndexedDB; move any left there to the backend store.
+// Jobs that fail to upload stay in IndexedDB and are retried on the next load.
 export async function initStorage() {
-  const jobs = await get(STORE_KEY);
-  if (!jobs) {
-    await set(STORE_KEY, []);
+  const localJobs = await get(STORE_KEY);
+  if (!localJobs) return;
+
+  const failed = [];
+  for (const job of localJobs) {
+    try {
+      await saveJob(job);
+    } catch (err) {
+      console.error(`Failed to move job ${job.id} to the server:`, err);
+      failed.push(job);
+    }
+  }
+  if (failed.length) {
+    await set(STORE_KEY, failed);
+  } else {
+    await del(STORE_KEY);
   }
 }
 
 export async function getJobs() {
-  return (await get(STORE_KEY)) || [];
+  const jobs = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    const page = await request(`${JOBS_URL}?${params}`);
+    jobs.push(...page.jobs);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return jobs;
 }
 
+// Saves one job; only newly picked files ({ name, data }) are uploaded,
+// stored files ({ name, hash }) are kept by the server
 export async function saveJob(job) {
-  await update(STORE_KEY, (val) => {
-    const jobs = val || [];
-    const existingIndex = jobs.findIndex(j => j.id === job.id);
-    if (existingIndex >= 0) {
-      jobs[existingIndex] = job;
-      return [...jobs];
+  // hasDescription and updatedAt are set by the server
+  const fields = { ...job };
+  delete fields.hasDescription;
+  delete fields.updatedAt;
+  const form = new FormData();
+  for (const field of FILE_FIELDS) {
+    const file = fields[field];
+    delete fields[field];
+    if (file && file.data) {
+      form.append(field, file.data instanceof Blob ? file.data : new Blob([file.data]), file.name);
     }
-    return [job, ...jobs];
-  });
+  }
+  form.append('job', JSON.stringify(fields));
+  return request(`${JOBS_URL}/${encodeURIComponent(job.id)}`, { method: 'PUT', body: form });
 }
 
 export async function deleteJob(id) {
-  await update(STORE_KEY, (val) => {
-    const jobs = val || [];
-    return jobs.filter(j => j.id !== id);
-  });
+  await request(`${JOBS_URL}/${encodeURIComponent(id)}`, { method: 'DELETE' });
 }
 
 export async function getJob(id) {
-  const jobs = await getJobs();
-  return jobs.find(j => j.id === id);
+  const response = await fetch(`${JOBS_URL}/${encodeURIComponent(id)}`);
+  if (response.status === 404) return undefined;
+  if (!response.ok) throw new Error(`Request failed with status ${response.status}`);
+  return response.json();
 }
 
 // Skills Storage
@@ -63,17 +105,11 @@ export async function deleteSkill(id) {
   });
 }
 
-// Helper to download file from blob directly
-export function downloadFile(fileObj) {
-  if (!fileObj || !fileObj.data) return;
-
-  const blob = fileObj.data instanceof Blob ? fileObj.data : new Blob([fileObj.data]);
-  const url = URL.createObjectURL(blob);
+// Download a job's stored 'cvFile' or 'coverLetterFile'
+export function downloadJobFile(jobId, field) {
   const a = document.createElement('a');
-  a.href = url;
-  a.download = fileObj.name;
+  a.href = `${JOBS_URL}/${encodeURIComponent(jobId)}/files/${field}`;
   document.body.appendChild(a);
   a.click();
   document.body.removeChild(a);
-  URL.revokeObjectURL(url);
 }